@@ -1,3 +1,4 @@
+import functools
 import pathlib
 
 from ._generate_versioned_filename_for_outputs import generate_versioned_filename
@@ -7,19 +8,64 @@ USER_QUERY_INPUT = pathlib.Path.cwd() / "user_input" / "user_queries.txt"
 USER_DF_COLS_INPUT = pathlib.Path.cwd() / "user_input" / "df_cols.txt"
 OUTPUT_FILE_DIR = pathlib.Path.cwd() / "results" / "outputs" 
 SIMILARITY_CALC_RES_DIR = pathlib.Path.cwd() / "results" / "similarity_calcs_res" 
+METRICS_DIR = pathlib.Path.cwd() / "results" / "metrics"
+EMBEDDING_CACHE_DIR = pathlib.Path.cwd() / "cache" / "embeddings"
+EMBEDDING_CACHE_MAX_ENTRIES = 100_000
+COLUMN_INDEX_PATH = pathlib.Path.cwd() / "cache" / "column_indexes.pkl"
+DATE_FORMATS_CACHE_PATH = pathlib.Path.cwd() / "cache" / "date_formats.json"
+QUERY_RESULT_CACHE_PATH = pathlib.Path.cwd() / "cache" / "query_results.pkl"
+QUERY_RESULT_CACHE_MAX_ENTRIES = 10_000
+COMPILED_MODEL_DIR = pathlib.Path.cwd() / "cache" / "compiled"
+BENCHMARK_RESULTS_DIR = pathlib.Path.cwd() / "results" / "benchmarks"
+BENCHMARK_DATA_DIR = pathlib.Path.cwd() / "cache" / "benchmarks"
 
-o_filename = generate_versioned_filename(
-    directory= OUTPUT_FILE_DIR,
-    prefix= "results_",
-    )
 
-cs_filename = generate_versioned_filename(
-    directory= SIMILARITY_CALC_RES_DIR,
-    prefix= "detailed_summary_",
-    )
+# the versioned output paths scan the results directories, so they are only computed on first access
+@functools.lru_cache(maxsize= None)
+def _versioned_output_paths(suffix: str = ".json") -> dict:
+    o_filename = generate_versioned_filename(
+        directory= OUTPUT_FILE_DIR,
+        prefix= "results_",
+        suffix= suffix,
+        )
 
-OUTPUT_FILE_PATH = OUTPUT_FILE_DIR / o_filename
-SIMILARITY_CALC_RES_PATH = SIMILARITY_CALC_RES_DIR / cs_filename
+    cs_filename = generate_versioned_filename(
+        directory= SIMILARITY_CALC_RES_DIR,
+        prefix= "detailed_summary_",
+        suffix= suffix,
+        )
+
+    return {
+        "OUTPUT": OUTPUT_FILE_DIR / o_filename,
+        "SIMILARITY_CALC_RES": SIMILARITY_CALC_RES_DIR / cs_filename,
+    }
+
+
+# JSON and JSON Lines outputs are versioned separately, each against the existing files of its own suffix
+_VERSIONED_OUTPUT_NAMES = {
+    "OUTPUT_FILE_PATH": (".json", "OUTPUT"),
+    "SIMILARITY_CALC_RES_PATH": (".json", "SIMILARITY_CALC_RES"),
+    "OUTPUT_JSONL_PATH": (".jsonl", "OUTPUT"),
+    "SIMILARITY_CALC_RES_JSONL_PATH": (".jsonl", "SIMILARITY_CALC_RES"),
+}
+
+
+# only runs writing metrics create the metrics directory
+@functools.lru_cache(maxsize= None)
+def _versioned_metrics_path() -> pathlib.Path:
+    return METRICS_DIR / generate_versioned_filename(
+        directory= METRICS_DIR,
+        prefix= "metrics_",
+        )
+
+
+def __getattr__(name: str):
+    if name in _VERSIONED_OUTPUT_NAMES:
+        suffix, key = _VERSIONED_OUTPUT_NAMES[name]
+        return _versioned_output_paths(suffix)[key]
+    if name == "METRICS_FILE_PATH":
+        return _versioned_metrics_path()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 ORIGINAL_FILENAME_KEY = "original_filename"
 VALUE_KEY = "value"
@@ -32,4 +78,16 @@ __all__ = [
     "USER_DF_COLS_INPUT",
     "OUTPUT_FILE_PATH",
     "SIMILARITY_CALC_RES_PATH",
+    "OUTPUT_JSONL_PATH",
+    "SIMILARITY_CALC_RES_JSONL_PATH",
+    "METRICS_FILE_PATH",
+    "EMBEDDING_CACHE_DIR",
+    "EMBEDDING_CACHE_MAX_ENTRIES",
+    "COLUMN_INDEX_PATH",
+    "DATE_FORMATS_CACHE_PATH",
+    "QUERY_RESULT_CACHE_PATH",
+    "QUERY_RESULT_CACHE_MAX_ENTRIES",
+    "COMPILED_MODEL_DIR",
+    "BENCHMARK_RESULTS_DIR",
+    "BENCHMARK_DATA_DIR",
 ]
\ No newline at end of file
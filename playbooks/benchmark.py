@@ -0,0 +1,301 @@
+import argparse
+import datetime
+import functools
+import json
+import logging
+import os
+import pandas as pd
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+
+# append the root path to system paths for relative imports
+root_path = pathlib.Path.cwd()
+sys.path.append(str(root_path))
+
+from src.ai_utils import LazyTextEmbedding
+from src.metrics import peak_rss_mb, run_metrics
+from default_configs import (
+    USER_QUERY_INPUT,
+    USER_DF_COLS_INPUT,
+    COMPILED_MODEL_DIR,
+    BENCHMARK_RESULTS_DIR,
+    BENCHMARK_DATA_DIR,
+    generate_versioned_filename,
+)
+from src.utils import (
+    add_string_version_columns_with_column_name,
+    build_column_indexes,
+    build_query_result,
+    filter_data_by_cols,
+    load_compact_dataset,
+    match_queries,
+    process_user_input,
+    write_synthetic_shipments,
+    StartupProfiler,
+    NumpyEncoder,
+    convert_date_columns,
+)
+
+# logger setup
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+
+def load_textual_model(inference_mode: str = "fp32", backend: str = "eager"):
+    """
+    Builds the DistilBERT model without an embedding cache, so the embedding stage is really measured.
+
+    Args:
+        inference_mode (str, optional): The CPU inference mode, "fp32", "int8" or "bf16" (default is "fp32").
+        backend (str, optional): The inference backend, "eager", "torchscript" or "compile" (default is "eager").
+
+    Returns:
+        DistilBertTextEmbedding: The embedding model.
+    """
+    from src.ai_utils import DistilBertTextEmbedding
+
+    return DistilBertTextEmbedding(inference_mode= inference_mode, backend= backend, compiled_dir= COMPILED_MODEL_DIR)
+
+
+def parse_cardinality(value: str) -> tuple:
+    """
+    Parses a COLUMN=N cardinality option.
+
+    Args:
+        value (str): The option value.
+
+    Returns:
+        tuple: The column name and its number of distinct values.
+    """
+    column, sep, n = value.partition("=")
+    if not sep or not n.isdigit():
+        raise argparse.ArgumentTypeError(f"expected COLUMN=N, got '{value}'")
+    return column, int(n)
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses the command line options of the benchmark.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description= "Time every stage of the pipeline on synthetic shipment datasets.")
+    parser.add_argument(
+        "--rows",
+        type= int,
+        nargs= "+",
+        default= [10_000, 100_000, 1_000_000],
+        help= "sizes of the synthetic datasets, in rows (e.g. --rows 10000 1000000 10000000).",
+    )
+    parser.add_argument(
+        "--cardinality",
+        type= parse_cardinality,
+        action= "append",
+        default= [],
+        metavar= "COLUMN=N",
+        help= "number of distinct values of a column, e.g. Carrier_name=1000 (repeatable, default: the real dataset's).",
+    )
+    parser.add_argument("--seed", type= int, default= 0, help= "random seed of the synthetic datasets.")
+    parser.add_argument(
+        "--data-dir",
+        type= pathlib.Path,
+        default= BENCHMARK_DATA_DIR,
+        help= "directory the synthetic CSV files are written to and reused from.",
+    )
+    parser.add_argument(
+        "--inference-mode",
+        choices= ["fp32", "int8", "bf16"],
+        default= "fp32",
+        help= "DistilBERT CPU inference mode.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices= ["eager", "torchscript", "compile"],
+        default= "eager",
+        help= "DistilBERT inference backend.",
+    )
+    parser.add_argument(
+        "--compact-load",
+        action= "store_true",
+        help= "load only the selected columns with compact dtypes, as the runner does, instead of the full CSV.",
+    )
+    parser.add_argument(
+        "--baseline",
+        type= pathlib.Path,
+        default= None,
+        help= "a previous benchmark JSON file; the ratio of every stage time to it is logged.",
+    )
+    return parser.parse_args()
+
+
+def synthetic_dataset_path(data_dir: pathlib.Path, n_rows: int, cardinalities: dict, seed: int) -> pathlib.Path:
+    """
+    Names the synthetic CSV of a configuration, so it is generated once and reused by the next runs.
+
+    Args:
+        data_dir (pathlib.Path): The directory of the synthetic datasets.
+        n_rows (int): The number of rows.
+        cardinalities (dict): The requested cardinalities.
+        seed (int): The random seed.
+
+    Returns:
+        pathlib.Path: The CSV path.
+    """
+    card = "_".join(f"{col}-{n}" for col, n in sorted(cardinalities.items()))
+    return data_dir / f"shipments_{n_rows}_seed{seed}{'_' + card if card else ''}.csv"
+
+
+def benchmark_dataset(
+    data_path: pathlib.Path,
+    cols: list,
+    queries: list,
+    textual_model,
+    compact_load: bool = False,
+) -> dict:
+    """
+    Runs the pipeline of `playbooks/runner.py` in batch mode on a dataset and times every stage.
+
+    Args:
+        data_path (pathlib.Path): The CSV dataset.
+        cols (list): The selected columns.
+        queries (list): The user queries.
+        textual_model: The loaded embedding model.
+        compact_load (bool, optional): Whether to load the data with `load_compact_dataset` (default is False).
+
+    Returns:
+        dict: The duration of every stage in seconds, the number of embedded values, the forward passes,
+            tokens and values scored (see `RunMetrics`) and the peak RSS.
+    """
+    profiler = StartupProfiler()
+    run_metrics.reset()
+    with profiler.stage("csv_load"):
+        if compact_load:
+            df_filtered_cols = load_compact_dataset(data_path= data_path, cols= cols)
+        else:
+            df_filtered_cols = filter_data_by_cols(df= pd.read_csv(filepath_or_buffer= data_path, delimiter= ";"), cols= cols)
+    with profiler.stage("convert_date_columns"):
+        df_proc_date_cols = convert_date_columns(df= df_filtered_cols)
+    with profiler.stage("add_string_version_columns"):
+        df = add_string_version_columns_with_column_name(df= df_proc_date_cols)
+    with profiler.stage("embedding"):
+        column_indexes = build_column_indexes(df= df, textual_model= textual_model)
+        embedded_queries = textual_model.embed_texts([q.lower() for q in queries])
+    with profiler.stage("scoring"):
+        query_col_res = match_queries(embedded_queries= embedded_queries, column_indexes= column_indexes)
+        query_results = [
+            build_query_result(query= q, col_res= col_res, column_indexes= column_indexes)
+            for q, col_res in zip(queries, query_col_res)
+        ]
+    with profiler.stage("json_output"), tempfile.TemporaryDirectory() as tmp_dir:
+        with open(pathlib.Path(tmp_dir) / "results.json", "w") as f:
+            f.write(json.dumps([r for r in query_results if r], cls= NumpyEncoder, indent= 4))
+        with open(pathlib.Path(tmp_dir) / "detailed_summary.json", "w") as f:
+            f.write(json.dumps(dict(zip(queries, query_col_res)), cls= NumpyEncoder, indent= 4))
+
+    return {
+        "rows": int(df.shape[0]),
+        "embedded_values": {col: len(column_index.values) for col, column_index in column_indexes.items()},
+        "stages": {name: round(seconds, 4) for name, seconds in profiler.stages.items()},
+        "total": round(sum(profiler.stages.values()), 4),
+        "counters": dict(run_metrics.counters),
+        # the peak of the whole process so far
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare_with_baseline(runs: list, baseline_path: pathlib.Path) -> None:
+    """
+    Logs the ratio of every stage time to the same stage of a previous benchmark, by dataset size.
+
+    Args:
+        runs (list): The runs of this benchmark.
+        baseline_path (pathlib.Path): The previous benchmark JSON file.
+    """
+    with open(baseline_path) as f:
+        baseline_runs = {run["rows"]: run for run in json.load(f)["runs"]}
+    for run in runs:
+        baseline = baseline_runs.get(run["rows"])
+        if baseline is None:
+            logger.info(f"{run['rows']} rows: not in the baseline {baseline_path}")
+            continue
+        ratios = {
+            name: round(seconds / baseline["stages"][name], 2)
+            for name, seconds in run["stages"].items()
+            if baseline["stages"].get(name)
+        }
+        logger.info(f"{run['rows']} rows, stage time / baseline: {ratios}")
+
+
+if __name__ == "__main__":
+    """
+    benchmark of the pipeline stages on synthetic datasets.
+
+    for every requested size, this script:
+    1. generates a synthetic shipment CSV with the schema of the real dataset, or reuses it.
+    2. times the CSV load, date conversion, string versions, embedding, scoring and JSON output stages.
+    3. writes every timing to a versioned JSON file in results/benchmarks, to compare runs.
+    """
+
+    args = parse_args()
+    run_metrics.enabled = True
+    cardinalities = dict(args.cardinality)
+
+    selected_cols = process_user_input(user_input_path= USER_DF_COLS_INPUT)
+    user_input = process_user_input(user_input_path= USER_QUERY_INPUT)
+
+    # the model is loaded once, outside the timed stages
+    textual_model = LazyTextEmbedding(functools.partial(
+        load_textual_model,
+        inference_mode= args.inference_mode,
+        backend= args.backend,
+    ))
+    textual_model.load()
+    logger.info(f"model loaded in {textual_model.load_seconds:.2f}s")
+
+    runs = []
+    for n_rows in args.rows:
+        data_path = synthetic_dataset_path(args.data_dir, n_rows, cardinalities, args.seed)
+        if not data_path.exists():
+            start = time.perf_counter()
+            write_synthetic_shipments(data_path, n_rows, cardinalities= cardinalities, seed= args.seed)
+            logger.info(f"synthetic dataset of {n_rows} rows written to {data_path} in {time.perf_counter() - start:.2f}s")
+
+        run = benchmark_dataset(data_path, selected_cols, user_input, textual_model, compact_load= args.compact_load)
+        logger.info(f"{n_rows} rows: {run}")
+        runs.append(run)
+
+    if args.baseline is not None:
+        compare_with_baseline(runs, args.baseline)
+
+    benchmark = {
+        "created": datetime.datetime.now().isoformat(timespec= "seconds"),
+        "config": {
+            "cardinalities": cardinalities,
+            "seed": args.seed,
+            "columns": selected_cols,
+            "n_queries": len(user_input),
+            "inference_mode": args.inference_mode,
+            "backend": args.backend,
+            "compact_load": args.compact_load,
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "model_load_seconds": round(textual_model.load_seconds, 4),
+        "runs": runs,
+    }
+    output_path = BENCHMARK_RESULTS_DIR / generate_versioned_filename(directory= BENCHMARK_RESULTS_DIR, prefix= "benchmark_")
+    with open(output_path, "w") as f:
+        f.write(json.dumps(benchmark, cls= NumpyEncoder, indent= 4))
+    logger.info(f"benchmark results saved to {output_path}")
@@ -1,7 +1,15 @@
+import time
+
+# reference for the startup report, taken before the heavy imports
+_start = time.perf_counter()
+
+import argparse
+import concurrent.futures
+import functools
 import json
 import logging
 import numpy as np
-import pandas as pd
+import os
 import pathlib
 import sys
 
@@ -9,23 +17,48 @@ import sys
 root_path = pathlib.Path.cwd()
 sys.path.append(str(root_path))
 
-from src.ai_utils import DistilBertTextEmbedding
+import default_configs
+from src.ai_utils import LazyTextEmbedding, ParallelTextEmbedding
+from src.metrics import peak_rss_mb, run_metrics
 from default_configs import (
     DATA_PATH,
     USER_QUERY_INPUT,
     USER_DF_COLS_INPUT,
-    OUTPUT_FILE_PATH,
-    SIMILARITY_CALC_RES_PATH,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    COLUMN_INDEX_PATH,
+    COMPILED_MODEL_DIR,
+    DATE_FORMATS_CACHE_PATH,
+    QUERY_RESULT_CACHE_PATH,
+    QUERY_RESULT_CACHE_MAX_ENTRIES,
     ORIGINAL_FILENAME_KEY,
-    VALUE_KEY,
-    SCORE_KEY,
 )
 from src.utils import (
     add_string_version_columns_with_column_name,
-    filter_data_by_cols,
-    find_best_match,
-    get_overall_best_result,
+    build_column_indexes,
+    pipeline_column_indexes,
+    cached_date_formats,
+    evaluate_ann_recall,
+    evaluate_inference_mode,
+    evaluate_quantization,
+    fingerprint_column_indexes,
+    frame_memory_mb,
+    JsonLinesWriter,
+    load_compact_dataset,
+    build_query_result,
+    build_top_k_result,
+    cached_match_queries,
+    ColumnRouter,
+    match_queries,
+    match_queries_top_k,
+    match_queries_routed,
     process_user_input,
+    QueryResultCache,
+    RangeQueryIndex,
+    build_range_result,
+    refresh_column_indexes,
+    stream_column_indexes,
+    StartupProfiler,
     NumpyEncoder,
     convert_date_columns,
 )
@@ -38,9 +71,250 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# model initialization
-textual_model = DistilBertTextEmbedding()
+profiler = StartupProfiler(start= _start)
+profiler.record("imports", time.perf_counter() - _start)
+
+
+def load_textual_model(inference_mode: str = "fp32", backend: str = "eager"):
+    """
+    Builds the DistilBERT model with the persistent embedding cache. Importing torch is deferred to here.
+
+    Args:
+        inference_mode (str, optional): The CPU inference mode, "fp32", "int8" or "bf16" (default is "fp32").
+        backend (str, optional): The inference backend, "eager", "torchscript" or "compile" (default is "eager").
+
+    Returns:
+        DistilBertTextEmbedding: The embedding model.
+    """
+    from src.ai_utils import DistilBertTextEmbedding
+
+    return DistilBertTextEmbedding(
+        cache_dir= EMBEDDING_CACHE_DIR,
+        cache_max_entries= EMBEDDING_CACHE_MAX_ENTRIES,
+        inference_mode= inference_mode,
+        backend= backend,
+        compiled_dir= COMPILED_MODEL_DIR,
+    )
+
+
+def score_queries_one_by_one(
+    queries: list,
+    textual_model,
+    column_indexes: dict,
+    top_k: int = None,
+    result_cache: QueryResultCache = None,
+    router: ColumnRouter = None,
+):
+    """
+    Embeds and scores the queries one at a time.
+
+    Args:
+        queries (list): The user queries.
+        textual_model: The embedding model.
+        column_indexes (dict): The column indexes, keyed by original column name.
+        top_k (int, optional): The number of matches kept per column, or None for the best match only
+            (default is None).
+        result_cache (QueryResultCache, optional): The query result cache, cached queries are neither
+            embedded nor scored (default is None).
+        router (ColumnRouter, optional): Scores only the columns routed to every query (default is None,
+            every column is scored).
+
+    Yields:
+        dict: The best match (or the `top_k` best matches) of each scored column for the next query, keyed
+            by original column name.
+    """
+    for q in queries:
+        if result_cache is not None:
+            yield cached_match_queries([q], textual_model, column_indexes, result_cache, top_k, router)[0]
+            continue
+        embedded_query = textual_model.embed_text(q.lower())  # embed the query
+        if router is not None:
+            yield match_queries_routed([q], np.atleast_2d(embedded_query), column_indexes, router, top_k)[0]
+            continue
+        if top_k:
+            yield match_queries_top_k(np.atleast_2d(embedded_query), column_indexes, top_k)[0]
+            continue
+        yield {
+            original_column: column_index.best_match(embedded_query)
+            for original_column, column_index in column_indexes.items()
+        }
+
 
+def parse_args() -> argparse.Namespace:
+    """
+    Parses the command line options of the runner.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description= "Match user queries against the shipment dataset.")
+    parser.add_argument(
+        "--batch",
+        action= "store_true",
+        help= "embed all queries in one batched pass and score each column with a single matrix product.",
+    )
+    parser.add_argument(
+        "--ann-column",
+        action= "append",
+        default= [],
+        help= "search this column with an approximate nearest-neighbour index (repeatable).",
+    )
+    parser.add_argument(
+        "--ann-lists",
+        type= int,
+        default= None,
+        help= "number of k-means lists of the ANN indexes (default: square root of the number of values).",
+    )
+    parser.add_argument(
+        "--ann-probe",
+        type= int,
+        default= 8,
+        help= "number of lists searched per query by the ANN indexes. Higher is slower but more accurate.",
+    )
+    parser.add_argument(
+        "--ann-recall-report",
+        action= "store_true",
+        help= "log the recall and latency of the ANN indexes against the exact scorer for the user queries.",
+    )
+    parser.add_argument(
+        "--quantize",
+        choices= ["float16", "int8"],
+        default= None,
+        help= "scan float16 or int8 copies of the column embeddings instead of float32 (ANN columns excluded).",
+    )
+    parser.add_argument(
+        "--rescore-k",
+        type= int,
+        default= 10,
+        help= "number of best quantized candidates rescored with the exact float32 embeddings (0 disables rescoring).",
+    )
+    parser.add_argument(
+        "--quantization-report",
+        action= "store_true",
+        help= "log the memory saved by float16/int8 storage and its ranking agreement with float32 for the user queries.",
+    )
+    parser.add_argument(
+        "--inference-mode",
+        choices= ["fp32", "int8", "bf16"],
+        default= "fp32",
+        help= "DistilBERT CPU inference mode: full precision, dynamic int8 quantization or bfloat16 autocast.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices= ["eager", "torchscript", "compile"],
+        default= "eager",
+        help= "DistilBERT inference backend. torchscript graphs are cached in cache/compiled and reused; falls back to eager if unavailable.",
+    )
+    parser.add_argument(
+        "--workers",
+        type= int,
+        default= 0,
+        help= "embed the column values on this many worker processes, each with its own model (0: embed in this process).",
+    )
+    parser.add_argument(
+        "--threads-per-worker",
+        type= int,
+        default= 1,
+        help= "number of torch threads of every --workers process.",
+    )
+    parser.add_argument(
+        "--inference-mode-report",
+        action= "store_true",
+        help= "log how closely the int8/bf16 inference modes agree with fp32 on the dataset and the user queries.",
+    )
+    parser.add_argument(
+        "--stream",
+        action= "store_true",
+        help= "read the dataset in chunks and build the column indexes incrementally, for datasets larger than RAM.",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type= int,
+        default= 100_000,
+        help= "number of rows read at once in --stream and --incremental modes.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action= "store_true",
+        help= "reuse the persisted column indexes and only index the rows appended to the dataset since the last run.",
+    )
+    parser.add_argument(
+        "--index-path",
+        type= pathlib.Path,
+        default= COLUMN_INDEX_PATH,
+        help= "file the column indexes are persisted to in --incremental mode.",
+    )
+    parser.add_argument(
+        "--row-ids",
+        choices= ["list", "ranges", "bitmap"],
+        default= "list",
+        help= "report matching rows as a list of row ids, as [first, last] ranges of consecutive rows, or as a compressed bitmap.",
+    )
+    parser.add_argument(
+        "--top-k",
+        type= int,
+        default= None,
+        metavar= "K",
+        help= "report the K best (column, value) candidates of every query instead of the best one.",
+    )
+    parser.add_argument(
+        "--route-columns",
+        type= int,
+        default= None,
+        metavar= "N",
+        help= "only score the N columns whose name and values best match every query, instead of every column.",
+    )
+    parser.add_argument(
+        "--route-fallback-overlap",
+        type= float,
+        default= 0.0,
+        metavar= "SHARE",
+        help= "with --route-columns, score every column when no column knows more than this share of the query words (default: 0.0).",
+    )
+    parser.add_argument(
+        "--range-queries",
+        action= "store_true",
+        help= "answer comparison and extreme queries on numeric and date columns (e.g. \"days less than 5\") from their sorted values, without embedding them.",
+    )
+    parser.add_argument(
+        "--query-cache",
+        action= "store_true",
+        help= "reuse the results of queries already answered on the same column indexes, persisted to cache/query_results.pkl.",
+    )
+    parser.add_argument(
+        "--query-cache-ttl",
+        type= float,
+        default= None,
+        metavar= "SECONDS",
+        help= "age after which a cached query result expires (default: never).",
+    )
+    parser.add_argument(
+        "--semantic-threshold",
+        type= float,
+        default= None,
+        metavar= "COSINE",
+        help= "with --query-cache, also reuse the result of a cached query whose embedding has at least this cosine similarity with the new query.",
+    )
+    parser.add_argument(
+        "--jsonl",
+        action= "store_true",
+        help= "write the results as JSON Lines, one record per query as soon as the query completes.",
+    )
+    parser.add_argument(
+        "--metrics",
+        action= "store_true",
+        help= "count forward passes, tokens, values scored and cache hits, and write them to results/metrics.",
+    )
+    args = parser.parse_args()
+    if args.inference_mode_report and (args.stream or args.incremental):
+        parser.error("--inference-mode-report needs the in-memory dataset, it cannot be combined with --stream or --incremental")
+    if (args.query_cache_ttl is not None or args.semantic_threshold is not None) and not args.query_cache:
+        parser.error("--query-cache-ttl and --semantic-threshold need --query-cache")
+    if args.route_columns is not None and args.route_columns < 1:
+        parser.error("--route-columns must be at least 1")
+    if args.top_k is not None and args.top_k < 1:
+        parser.error("--top-k must be at least 1")
+    return args
 
 
 if __name__ == "__main__":
@@ -48,107 +322,329 @@ if __name__ == "__main__":
     main script for processing user queries and filtering data based on embeddings.
 
     this script:
-    1. loads a CSV dataset.
-    2. filters the dataset by selected columns from a text file.
-    3. reads user queries from a text file.
-    4. uses a DistilBERT-based model to process the queries.
+    1. reads the selected columns from a text file.
+    2. reads user queries from a text file.
+    3. loads the selected columns of a CSV dataset, in full or chunk by chunk.
+    4. embeds the unique values of every column once with a DistilBERT-based model.
     5. computes cosine similarity between query embeddings and dataset column values.
     6. outputs the best-matched results for each query, including row IDs.
     """
 
-    # step 1: load data
-    logger.info(f"loading data from {DATA_PATH}...")
-    df_raw = pd.read_csv(
-        filepath_or_buffer= DATA_PATH,
-        delimiter= ";",
-    )
-    logger.info(f"data loaded successfully. Data size: {df_raw.shape[0]} rows, {df_raw.shape[1]} columns")
-    
-    # step 2: get the selected columns to filter the DataFrame
+    args = parse_args()
+    run_metrics.enabled = args.metrics
+
+    # model initialization, deferred until the first embedding is needed
+    if args.workers:
+        from src.ai_utils import DistilBertTextEmbedding
+
+        textual_model = ParallelTextEmbedding(
+            model_factory= functools.partial(
+                DistilBertTextEmbedding,
+                inference_mode= args.inference_mode,
+                backend= args.backend,
+                compiled_dir= COMPILED_MODEL_DIR,
+            ),
+            n_workers= args.workers,
+            threads_per_worker= args.threads_per_worker,
+            cache_dir= EMBEDDING_CACHE_DIR,
+            cache_max_entries= EMBEDDING_CACHE_MAX_ENTRIES,
+        )
+    else:
+        textual_model = LazyTextEmbedding(functools.partial(
+            load_textual_model,
+            inference_mode= args.inference_mode,
+            backend= args.backend,
+        ))
+        if not args.incremental and (os.cpu_count() or 1) > 1:
+            # the model loads on a spare core while the data is read and preprocessed; an up-to-date
+            # incremental index may not need it
+            textual_model.preload()
+    ann_columns = {col: {"n_lists": args.ann_lists, "n_probe": args.ann_probe} for col in args.ann_column}
+
+    stage_start = time.perf_counter()
+
+    # step 1: get the selected columns to filter the DataFrame
     logger.info(f"extracting the selected columns to filter by from {USER_DF_COLS_INPUT}...")
     selected_cols = process_user_input(user_input_path= USER_DF_COLS_INPUT)
 
-    # filter the DataFrame
-    logger.info(f"filtering DataFrame to include only the selected columns: {selected_cols}")
-    df_filtered_cols = filter_data_by_cols(df= df_raw, cols= selected_cols)
-    df_proc_date_cols = convert_date_columns(df= df_filtered_cols)
-    df = add_string_version_columns_with_column_name(df= df_proc_date_cols)
-    logger.info(f"data filtered successfully. New data size: {df.shape[0]} rows, {df.shape[1]} columns")
-
-    # step 3: get the list of queries
+    # step 2: get the list of queries, parsed in the background while the column indexes are built
     logger.info(f"extracting user queries from {USER_QUERY_INPUT}...")
-    user_input = process_user_input(user_input_path= USER_QUERY_INPUT)
-    logger.info(f"user queries extracted successfully. Total queries: {len(user_input)}")
+    input_reader = concurrent.futures.ThreadPoolExecutor(max_workers= 1, thread_name_prefix= "query-input")
+    user_input_future = input_reader.submit(process_user_input, user_input_path= USER_QUERY_INPUT)
+    input_reader.shutdown(wait= False)
+    profiler.record("read_inputs", time.perf_counter() - stage_start)
 
-    # step 4: process one query at a time
-    query_results = []
-    detailed_record = {}
-    for q in user_input:
-        logger.info(f"now processing user query: {q}")  
-        embedded_query = textual_model.embed_text(q.lower())  # embed the query
-        col_res = {}
-        processed_columns = set()  # keep track of processed columns to avoid duplicates
-
-        # iterate over all columns in the DataFrame
-        for column in df.columns:
-            logger.info(f"calculating similarities for {column} column...")  
-            if column.startswith("s_"):  # for "s_" columns, use the original column name
-                original_column = column[2:]  # strip "s_" prefix to get the original column name
-                if original_column in processed_columns:  # skip if already processed
-                    continue
-            else:
-                original_column = column
-                if f"s_{original_column}" in df.columns:  # skip original column if "s_" exists
-                    continue
-
-            # columns unique values
-            column_values = df[column].unique()
-
-            # step 5: find the queries best match from the columns unique values 
-            best_match = find_best_match(
-                unique_col_values= column_values,
-                embedded_query= embedded_query,
-                column= column,
+    stage_start = time.perf_counter()
+    memory_footprint = {}  # DataFrame memory per stage, in MB, when the whole dataset is loaded
+    if args.incremental:
+        # steps 3 and 4: only read and embed the rows appended since the persisted indexes were built
+        logger.info(f"refreshing the column indexes persisted in {args.index_path}...")
+        column_indexes = refresh_column_indexes(
+            data_path= DATA_PATH,
+            cols= selected_cols,
+            textual_model= textual_model,
+            index_path= args.index_path,
+            chunksize= args.chunksize,
+        )
+        for col, ivf_kwargs in ann_columns.items():
+            column_indexes[col].enable_ann(**ivf_kwargs)
+    elif args.stream:
+        # steps 3 and 4: read the selected columns chunk by chunk, embedding new unique values as they appear
+        logger.info(f"streaming the selected columns {selected_cols} from {DATA_PATH} in chunks of {args.chunksize} rows...")
+        column_indexes = stream_column_indexes(
+            data_path= DATA_PATH,
+            cols= selected_cols,
+            textual_model= textual_model,
+            chunksize= args.chunksize,
+            ann_columns= ann_columns,
+        )
+    else:
+        # step 3: load data
+        with profiler.stage("data_load"):
+            # only the selected columns are read, text as categoricals; every stage replaces the previous frame
+            logger.info(f"loading the selected columns {selected_cols} from {DATA_PATH}...")
+            df = load_compact_dataset(data_path= DATA_PATH, cols= selected_cols)
+            memory_footprint["load"] = frame_memory_mb(df)
+            logger.info(f"data loaded successfully. Data size: {df.shape[0]} rows, {df.shape[1]} columns")
+
+            # the date columns are only detected again when the dataset changed
+            date_formats = cached_date_formats(df= df, data_path= DATA_PATH, cache_path= DATE_FORMATS_CACHE_PATH)
+
+        if args.inference_mode_report:
+            # the report embeds the whole preprocessed DataFrame
+            df = convert_date_columns(df= df, date_formats= date_formats)
+            memory_footprint["convert_date_columns"] = frame_memory_mb(df)
+            df = add_string_version_columns_with_column_name(df= df)
+            memory_footprint["add_string_version_columns"] = frame_memory_mb(df)
+            logger.info(f"data processed successfully. New data size: {df.shape[0]} rows, {df.shape[1]} columns")
+
+            # step 4: embed the unique values of every searchable column once, for all queries
+            logger.info("building the column indexes...")
+            column_indexes = build_column_indexes(
+                df= df,
+                textual_model= textual_model,
+                ann_columns= ann_columns,
+            )
+        else:
+            # step 4: preprocess the columns one by one in the background, embedding each as soon as it is ready
+            logger.info("preprocessing the columns and building the column indexes...")
+            column_indexes = pipeline_column_indexes(
                 df= df,
-                original_column= original_column,
                 textual_model= textual_model,
+                date_formats= date_formats,
+                ann_columns= ann_columns,
+                stage_memory_mb= memory_footprint,
             )
+        logger.info(f"DataFrame memory footprint per stage (MB): {memory_footprint}, peak RSS: {peak_rss_mb()} MB")
+    profiler.record("index_build", time.perf_counter() - stage_start)
+    logger.info(f"column indexes built successfully for columns: {list(column_indexes)}")
 
-            # mark the column as processed
-            processed_columns.add(original_column)
-            col_res[original_column] = best_match  # use the original column name as the key
-            detailed_record[q] = col_res
+    user_input = user_input_future.result()
+    logger.info(f"user queries extracted successfully. Total queries: {len(user_input)}")
+
+    if args.ann_recall_report:
+        embedded_queries = textual_model.embed_texts([q.lower() for q in user_input])
+        for col in args.ann_column:
+            recall_report = evaluate_ann_recall(column_indexes[col], embedded_queries)
+            logger.info(f"ANN recall report for {col}: {recall_report}")
+
+    if args.inference_mode_report:
+        from src.ai_utils import DistilBertTextEmbedding
 
-        # determine the overall best result across columns
-        overall_best_result = get_overall_best_result(col_res)
-        if overall_best_result:
-            f_col_name, f_value, f_best_score = (
-                overall_best_result[ORIGINAL_FILENAME_KEY],
-                overall_best_result[VALUE_KEY],
-                overall_best_result[SCORE_KEY],
+        # uncached models, so both modes really embed every value
+        reference_model = DistilBertTextEmbedding()
+        for mode in ([args.inference_mode] if args.inference_mode != "fp32" else ["int8", "bf16"]):
+            inference_mode_report = evaluate_inference_mode(
+                reference_model= reference_model,
+                candidate_model= DistilBertTextEmbedding(inference_mode= mode),
+                df= df,
+                queries= user_input,
             )
-            matching_rows = df[df[f_col_name] == f_value].index.tolist()
-            adjusted_rows = [index + 2 for index in matching_rows]
-
-            # store the results for this query into the final query_results list
-            query_results.append({
-                "column_name": f_col_name,
-                "value": f_value,
-                "row_ids": [f'row{row}' for row in adjusted_rows],
-                "best_score": float(f_best_score),
-                "user_query": q,
-            })
+            logger.info(f"{mode} inference mode report against fp32: {inference_mode_report}")
+
+    if args.quantization_report:
+        embedded_queries = textual_model.embed_texts([q.lower() for q in user_input])
+        for col, column_index in column_indexes.items():
+            quantization_report = evaluate_quantization(column_index, embedded_queries, rescore_k= args.rescore_k)
+            logger.info(f"quantization report for {col}: {quantization_report}")
+
+    router = None
+    if args.route_columns:
+        router = ColumnRouter(
+            column_indexes,
+            textual_model,
+            top_n= args.route_columns,
+            fallback_overlap= args.route_fallback_overlap,
+        )
+        logger.info(f"scoring the {args.route_columns} best routed columns of every query")
+
+    # structured queries are answered from the sorted column values, only the others are embedded and scored
+    structured = [None] * len(user_input)
+    if args.range_queries:
+        range_index = RangeQueryIndex(column_indexes)
+        structured = [range_index.match(q) for q in user_input]
+        logger.info(
+            f"answered {sum(m is not None for m in structured)} of {len(user_input)} queries "
+            f"from the sorted values of {len(range_index.columns)} numeric and date columns"
+        )
+    scored_queries = [q for q, range_match in zip(user_input, structured) if range_match is None]
+
+    result_cache = None
+    if args.query_cache:
+        # fingerprinted before quantization moves the float32 embeddings to disk
+        result_cache = QueryResultCache(
+            fingerprint= fingerprint_column_indexes(
+                column_indexes,
+                args.inference_mode,
+                args.top_k,
+                args.quantize,
+                args.rescore_k if args.quantize else None,
+                ann_columns,
+                (router.top_n, router.name_weight, router.fallback_overlap) if router is not None else None,
+            ),
+            cache_path= QUERY_RESULT_CACHE_PATH,
+            max_entries= QUERY_RESULT_CACHE_MAX_ENTRIES,
+            ttl_seconds= args.query_cache_ttl,
+            semantic_threshold= args.semantic_threshold,
+        )
+
+    if args.quantize:
+        for col, column_index in column_indexes.items():
+            if column_index.ann is None:
+                column_index.quantize(dtype= args.quantize, rescore_k= args.rescore_k)
+        logger.info(f"column embeddings quantized to {args.quantize} (rescoring the best {args.rescore_k} candidates)")
+
+    # step 5: find the queries best match from each column's unique values
+    stage_start = time.perf_counter()
+    if not scored_queries:
+        query_col_res = []
+    elif args.batch:
+        logger.info(f"embedding all {len(scored_queries)} user queries in one batch...")
+        if result_cache is not None:
+            # only the queries missing from the cache are embedded and scored
+            query_col_res = cached_match_queries(
+                scored_queries, textual_model, column_indexes, result_cache, args.top_k, router
+            )
+        else:
+            embedded_queries = textual_model.embed_texts([q.lower() for q in scored_queries])
+
+            # one (queries x values) similarity matrix per column
+            if router is not None:
+                query_col_res = match_queries_routed(scored_queries, embedded_queries, column_indexes, router, args.top_k)
+            elif args.top_k:
+                query_col_res = match_queries_top_k(embedded_queries, column_indexes, args.top_k)
+            else:
+                query_col_res = match_queries(embedded_queries= embedded_queries, column_indexes= column_indexes)
+    else:
+        logger.info(f"processing {len(scored_queries)} user queries one by one...")
+        # scored lazily, so with --jsonl every result is written as soon as its query completes
+        query_col_res = score_queries_one_by_one(
+            scored_queries,
+            textual_model,
+            column_indexes,
+            top_k= args.top_k,
+            result_cache= result_cache,
+            router= router,
+        )
+
+    if args.jsonl:
+        output_file_path = default_configs.OUTPUT_JSONL_PATH
+        similarity_calc_res_path = default_configs.SIMILARITY_CALC_RES_JSONL_PATH
+        results_writer = JsonLinesWriter(output_file_path)
+        detailed_writer = JsonLinesWriter(similarity_calc_res_path)
+
+    query_results = []
+    detailed_record = {}
+    scored_col_res = iter(query_col_res)
+    for q, range_match in zip(user_input, structured):
+        if range_match is not None:
+            query_result = build_range_result(q, range_match, row_id_format= args.row_ids, top_k= args.top_k)
+            col_res = {range_match[ORIGINAL_FILENAME_KEY]: {
+                key: value for key, value in range_match.items() if key != "row_positions"
+            }}
+        # determine the overall best result (or the top k candidates) across columns
+        elif args.top_k:
+            col_res = next(scored_col_res)
+            query_result = build_top_k_result(
+                query= q,
+                col_top= col_res,
+                column_indexes= column_indexes,
+                k= args.top_k,
+                row_id_format= args.row_ids,
+            )
+        else:
+            col_res = next(scored_col_res)
+            query_result = build_query_result(
+                query= q,
+                col_res= col_res,
+                column_indexes= column_indexes,
+                row_id_format= args.row_ids,
+            )
+        if args.jsonl:
+            detailed_writer.write({q: col_res})
+            if query_result:
+                results_writer.write(query_result)
+        else:
+            # store it into the final query_results list
+            detailed_record[q] = col_res
+            if query_result:
+                query_results.append(query_result)
+
+    profiler.record("query_scoring", time.perf_counter() - stage_start)
+    logger.info(
+        f"scored {len(user_input)} queries against {len(column_indexes)} columns "
+        f"({sum(len(column_index) for column_index in column_indexes.values())} values) "
+        f"in {time.perf_counter() - stage_start:.2f}s"
+    )
 
     # step 6: output the final results
-    logger.info(f"query results: {query_results}")
-    ser_query_res = str(json.dumps(query_results, cls= NumpyEncoder, indent= 4)).strip()
-    with open(OUTPUT_FILE_PATH, "w") as f:
-        f.write(ser_query_res)
-
-    logger.info(f"query results saved to {OUTPUT_FILE_PATH}")
-
-    # serialize the data - ignore this, i had to hack at it 'till my json displayed nicely in the file
-    ser_detailed_record = str(json.dumps(detailed_record, cls= NumpyEncoder, indent= 4)).strip()
-    with open(SIMILARITY_CALC_RES_PATH, "w") as f:
-        f.write(ser_detailed_record)
-    logger.info(f"similarity calculations saved to {SIMILARITY_CALC_RES_PATH}")
+    stage_start = time.perf_counter()
+    if args.jsonl:
+        results_writer.close()
+        detailed_writer.close()
+        logger.info(f"{results_writer.n_records} query results saved to {output_file_path}")
+    else:
+        output_file_path = default_configs.OUTPUT_FILE_PATH
+        similarity_calc_res_path = default_configs.SIMILARITY_CALC_RES_PATH
+        logger.info(f"query results: {query_results}")
+        ser_query_res = str(json.dumps(query_results, cls= NumpyEncoder, indent= 4)).strip()
+        with open(output_file_path, "w") as f:
+            f.write(ser_query_res)
+
+        logger.info(f"query results saved to {output_file_path}")
+
+        # serialize the data - ignore this, i had to hack at it 'till my json displayed nicely in the file
+        ser_detailed_record = str(json.dumps(detailed_record, cls= NumpyEncoder, indent= 4)).strip()
+        with open(similarity_calc_res_path, "w") as f:
+            f.write(ser_detailed_record)
+    logger.info(f"similarity calculations saved to {similarity_calc_res_path}")
+
+    if result_cache is not None:
+        result_cache.save()
+        logger.info(f"query result cache stats: {result_cache.stats()}")
+
+    # persist the embeddings so the next run does not recompute them
+    if textual_model.is_loaded:
+        textual_model.save_cache()
+        logger.info(f"embedding cache stats: {textual_model.embedding_cache.stats()}")
+    profiler.record("write_outputs", time.perf_counter() - stage_start)
+
+    # model_load is part of the stage that first needed an embedding
+    if textual_model.is_loaded:
+        profiler.record("model_load", textual_model.load_seconds)
+    logger.info(f"startup report (seconds): {profiler.report()}")
+
+    if args.metrics:
+        embedding_cache = textual_model.embedding_cache if textual_model.is_loaded else None
+        metrics_path = run_metrics.write(
+            default_configs.METRICS_FILE_PATH,
+            stages= profiler.report(),
+            memory_footprint_mb= memory_footprint,
+            embedding_cache= embedding_cache.stats() if embedding_cache is not None else None,
+            query_cache= result_cache.stats() if result_cache is not None else None,
+            config= vars(args),
+        )
+        logger.info(f"run metrics saved to {metrics_path}: {run_metrics.report()}")
+
+    if args.workers:
+        textual_model.close()
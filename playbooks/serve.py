@@ -0,0 +1,116 @@
+import argparse
+import asyncio
+import logging
+import pathlib
+import sys
+
+# append the root path to system paths for relative imports
+root_path = pathlib.Path.cwd()
+sys.path.append(str(root_path))
+
+from src.ai_utils import DistilBertTextEmbedding
+from src.service import QueryService
+from default_configs import (
+    DATA_PATH,
+    USER_DF_COLS_INPUT,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    COLUMN_INDEX_PATH,
+)
+from src.utils import (
+    process_user_input,
+    refresh_column_indexes,
+)
+
+# logger setup
+logging.basicConfig(
+    format="%(asctime)s - %(levelname)s - %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+    level=logging.INFO,
+)
+logger = logging.getLogger(__name__)
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses the command line options of the query service.
+
+    Returns:
+        argparse.Namespace: The parsed options.
+    """
+    parser = argparse.ArgumentParser(description= "Serve shipment dataset queries over HTTP.")
+    parser.add_argument("--host", default= "127.0.0.1", help= "interface to listen on.")
+    parser.add_argument("--port", type= int, default= 8000, help= "port to listen on.")
+    parser.add_argument(
+        "--batch-window-ms",
+        type= float,
+        default= 5.0,
+        help= "how long the first query of a micro-batch waits for concurrent queries.",
+    )
+    parser.add_argument(
+        "--max-batch-size",
+        type= int,
+        default= 64,
+        help= "maximum number of queries embedded in one forward pass.",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type= int,
+        default= 100_000,
+        help= "number of rows read at once when indexing the dataset.",
+    )
+    parser.add_argument(
+        "--index-path",
+        type= pathlib.Path,
+        default= COLUMN_INDEX_PATH,
+        help= "file the column indexes are persisted to.",
+    )
+    return parser.parse_args()
+
+
+async def main(args: argparse.Namespace) -> None:
+    """
+    Loads the model and the column indexes once, then serves queries until interrupted.
+
+    Args:
+        args (argparse.Namespace): The parsed options.
+    """
+    textual_model = DistilBertTextEmbedding(
+        cache_dir= EMBEDDING_CACHE_DIR,
+        cache_max_entries= EMBEDDING_CACHE_MAX_ENTRIES,
+    )
+
+    selected_cols = process_user_input(user_input_path= USER_DF_COLS_INPUT)
+    logger.info(f"refreshing the column indexes persisted in {args.index_path}...")
+    column_indexes = refresh_column_indexes(
+        data_path= DATA_PATH,
+        cols= selected_cols,
+        textual_model= textual_model,
+        index_path= args.index_path,
+        chunksize= args.chunksize,
+    )
+    textual_model.save_cache()
+
+    service = QueryService(
+        textual_model= textual_model,
+        column_indexes= column_indexes,
+        batch_window_ms= args.batch_window_ms,
+        max_batch_size= args.max_batch_size,
+    )
+    await service.start(host= args.host, port= args.port)
+    try:
+        await service.serve_forever()
+    finally:
+        await service.stop()
+        logger.info(f"served {service.n_queries} queries in {service.n_batches} batches")
+
+
+if __name__ == "__main__":
+    """
+    resident query service: keeps the DistilBERT model and the column indexes in memory and answers
+    POST /query requests, embedding concurrent queries together in micro-batches.
+    """
+    try:
+        asyncio.run(main(parse_args()))
+    except KeyboardInterrupt:
+        logger.info("query service stopped")
@@ -1,7 +1,30 @@
-from .base_huggingface_embedding import HuggingFaceEmbedding
-from .distilbert_text_embedding_model import DistilBertTextEmbedding
+import importlib
+
+# exports are imported on first access, so `EmbeddingCache`, `LazyTextEmbedding` or `ParallelTextEmbedding` do not pull in torch
+_LAZY_EXPORTS = {
+    "EmbeddingCache": ".embedding_cache",
+    "LazyTextEmbedding": ".lazy_text_embedding",
+    "ParallelTextEmbedding": ".parallel_text_embedding",
+    "HuggingFaceEmbedding": ".base_huggingface_embedding",
+    "DistilBertTextEmbedding": ".distilbert_text_embedding_model",
+}
 
 __all__ = [
+    "EmbeddingCache",
+    "LazyTextEmbedding",
+    "ParallelTextEmbedding",
     "HuggingFaceEmbedding",
     "DistilBertTextEmbedding",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
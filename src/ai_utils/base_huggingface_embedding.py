@@ -1,9 +1,20 @@
 import logging
+import numpy as np
+import pathlib
 import torch
+import warnings
+
+from typing import Callable, List, Optional, Sequence, Union
+from .compiled_backend import build_compiled_encoder
+from .embedding_cache import EmbeddingCache
+from src.metrics import run_metrics
 
 # setup logger
 logger = logging.getLogger(__name__)
 
+# "fp32": full precision, "int8": dynamic int8 quantization of the linear layers, "bf16": bfloat16 autocast
+INFERENCE_MODES = ("fp32", "int8", "bf16")
+
 
 class HuggingFaceEmbedding:
     """
@@ -19,6 +30,10 @@ class HuggingFaceEmbedding:
         truncate (bool): Whether to truncate input text that exceeds the maximum length.
         padding (bool): Whether to pad the input text to the maximum length.
         emb_max_len (int): The maximum length for input text.
+        batch_size (int): The number of texts passed through the model at once by `encode_batch`.
+        inference_mode (str): The CPU inference mode, one of "fp32", "int8" or "bf16".
+        backend (str): The inference backend in use, "eager", "torchscript" or "compile".
+        embedding_cache (Optional[EmbeddingCache]): The persistent embedding cache, if enabled.
     """
 
     def __init__(
@@ -29,6 +44,8 @@ class HuggingFaceEmbedding:
         truncate: bool = True, 
         padding: bool = True,
         emb_max_len: int = 100,
+        batch_size: int = 32,
+        inference_mode: str = "fp32",
     ):
         """
         Initializes the HuggingFaceEmbedding class with tokenizer, model, and other configuration options.
@@ -40,13 +57,131 @@ class HuggingFaceEmbedding:
             truncate (bool, optional): Whether to truncate input text that exceeds the maximum length (default is True).
             padding (bool, optional): Whether to pad the input text to the maximum length (default is True).
             emb_max_len (int, optional): The maximum length for input text (default is 100).
+            batch_size (int, optional): The number of texts passed through the model at once by
+                `encode_batch` (default is 32).
+            inference_mode (str, optional): "fp32" for full precision, "int8" to quantize the weights of the
+                linear layers to int8 (activations are quantized on the fly), or "bf16" to run the forward
+                pass under bfloat16 autocast (default is "fp32").
+
+        Raises:
+            ValueError: If the inference mode is not supported.
         """
+        if inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"inference_mode must be one of {INFERENCE_MODES}, got '{inference_mode}'")
+
+        if inference_mode == "int8":
+            with warnings.catch_warnings():
+                # the eager-mode quantization API warns about its planned migration to torchao
+                warnings.simplefilter("ignore")
+                model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
         self.tokenizer = tokenizer
         self.model = model
         self.return_tensors = return_tensors
         self.truncate = truncate
         self.padding = padding
         self.emb_max_len = emb_max_len
+        self.batch_size = batch_size
+        self.inference_mode = inference_mode
+        self.backend = "eager"
+        self._compiled_encoder: Optional[Callable[[torch.Tensor, torch.Tensor], torch.Tensor]] = None
+        self.embedding_cache: Optional[EmbeddingCache] = None
+
+    @property
+    def model_name(self) -> str:
+        """
+        str: The name or path the model was loaded from.
+        """
+        return getattr(self.model.config, "_name_or_path", None) or type(self.model).__name__
+
+    @property
+    def cache_namespace(self) -> str:
+        """
+        str: Everything that influences the embedding of a text, used to key the embedding cache.
+        """
+        return (
+            f"{self.model_name}|emb_max_len={self.emb_max_len}|truncation={self.truncate}"
+            f"|inference_mode={self.inference_mode}"
+        )
+
+    def enable_cache(self, cache_dir: Union[str, pathlib.Path], max_entries: int = 100_000) -> EmbeddingCache:
+        """
+        Attaches a persistent embedding cache bound to the current model and tokenizer settings.
+
+        Args:
+            cache_dir (str or pathlib.Path): The directory holding the cache files.
+            max_entries (int, optional): The maximum number of cached embeddings (default is 100,000).
+
+        Returns:
+            EmbeddingCache: The attached cache.
+        """
+        self.embedding_cache = EmbeddingCache(
+            cache_dir=cache_dir,
+            namespace=self.cache_namespace,
+            max_entries=max_entries,
+        )
+        return self.embedding_cache
+
+    def save_cache(self) -> None:
+        """
+        Persists the embedding cache to disk, if one is attached.
+        """
+        if self.embedding_cache is not None:
+            self.embedding_cache.save()
+
+    def enable_backend(self, backend: str, compiled_dir: Optional[Union[str, pathlib.Path]] = None) -> str:
+        """
+        Replaces the eager forward pass with a TorchScript graph or a torch.compile'd module.
+
+        The graph returns the [CLS] embeddings directly. A TorchScript graph is cached in `compiled_dir` and
+        reused by later runs. If the backend cannot be built, or fails at inference time, the eager model
+        is used instead.
+
+        Args:
+            backend (str): "eager", "torchscript" or "compile".
+            compiled_dir (str or pathlib.Path, optional): The directory of the TorchScript artifacts. The graph
+                is traced again on every run if None (default is None).
+
+        Returns:
+            str: The backend in use, "eager" if the requested one is unavailable.
+        """
+        self._compiled_encoder = build_compiled_encoder(
+            model=self.model,
+            tokenizer=self.tokenizer,
+            backend=backend,
+            model_key=f"{self.model_name}|inference_mode={self.inference_mode}",
+            compiled_dir=compiled_dir,
+            autocast=self.inference_mode == "bf16",
+        )
+        self.backend = backend if self._compiled_encoder is not None else "eager"
+        return self.backend
+
+    def _forward_cls(self, inputs) -> torch.Tensor:
+        """
+        Runs the model in the configured inference mode and extracts the [CLS] token embeddings.
+
+        Args:
+            inputs (BatchEncoding): The tokenized batch.
+
+        Returns:
+            torch.Tensor: The float32 [CLS] embeddings, of shape (batch_size, hidden_size).
+        """
+        if run_metrics.enabled:
+            run_metrics.increment("forward_passes")
+            run_metrics.increment("texts_embedded", int(inputs["attention_mask"].shape[0]))
+            run_metrics.increment("tokens_processed", int(inputs["attention_mask"].sum()))
+
+        with run_metrics.timer("forward_pass"), torch.no_grad(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=self.inference_mode == "bf16"):
+            if self._compiled_encoder is not None:
+                try:
+                    return self._compiled_encoder(inputs["input_ids"], inputs["attention_mask"]).float()
+                except Exception as eee:
+                    logger.warning(f"{self.backend} backend failed, falling back to eager inference: {str(eee)}")
+                    self._compiled_encoder, self.backend = None, "eager"
+            outputs = self.model(**inputs)
+
+        # outputs.last_hidden_state has shape (batch_size, sequence_length, hidden_size)
+        return outputs.last_hidden_state[:, 0, :].float()
 
     def encode(self, text):
         """
@@ -74,15 +209,68 @@ class HuggingFaceEmbedding:
                 max_length=self.emb_max_len,
             )
 
-            # get embeddings from the model
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-
-            # return the [CLS] token embedding (first token)
-            # outputs.last_hidden_state has shape (batch_size, sequence_length, hidden_size)
-            return outputs.last_hidden_state[:, 0, :].squeeze().cpu().numpy()
+            # get the [CLS] token embedding (first token) from the model
+            return self._forward_cls(inputs).squeeze().cpu().numpy()
 
         except Exception as eee:
             # log the error and re-raise it
             logger.error(f"Error embedding text: {str(eee)}")
             raise eee
+
+    def encode_batch(self, texts: Sequence[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Encodes a list of texts into a matrix of [CLS] token embeddings.
+
+        The texts are tokenized once, sorted by token length and split into batches, so each batch is
+        only padded to its own longest text (short values like "UPS" are never padded to the longest
+        value of a column). The embeddings are written back in the order of the input texts.
+
+        Args:
+            texts (Sequence[str]): The input texts to be encoded.
+            batch_size (int, optional): The number of texts per forward pass (default is `self.batch_size`).
+
+        Returns:
+            numpy.ndarray: A contiguous float32 matrix of shape (len(texts), hidden_size).
+
+        Raises:
+            Exception: If an error occurs during text embedding.
+        """
+        batch_size = batch_size or self.batch_size
+        texts = list(texts)
+        hidden_size = self.model.config.hidden_size
+        embeddings = np.empty((len(texts), hidden_size), dtype=np.float32)
+        if not texts:
+            return embeddings
+
+        try:
+            # tokenize everything once, without padding, to learn each text's length
+            tokenized = self.tokenizer(
+                texts,
+                truncation=self.truncate,
+                padding=False,
+                max_length=self.emb_max_len,
+            )
+            input_ids: List[List[int]] = tokenized["input_ids"]
+            order = np.argsort([len(ids) for ids in input_ids], kind="stable")
+
+            for start in range(0, len(texts), batch_size):
+                batch_idx = order[start:start + batch_size]
+
+                # pad the bucket to its own longest text only
+                inputs = self.tokenizer.pad(
+                    {
+                        "input_ids": [input_ids[i] for i in batch_idx],
+                        "attention_mask": [tokenized["attention_mask"][i] for i in batch_idx],
+                    },
+                    return_tensors=self.return_tensors,
+                )
+
+                # keep the [CLS] token embedding (first token) of every text in the batch
+                embeddings[batch_idx] = self._forward_cls(inputs).cpu().numpy()
+
+            return embeddings
+
+        except Exception as eee:
+            # log the error and re-raise it
+            logger.error(f"Error embedding texts: {str(eee)}")
+            raise eee
@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import os
+import pathlib
+import tempfile
+import torch
+import transformers
+import unittest
+import warnings
+
+from typing import Callable, Optional, Union
+
+# setup logger
+logger = logging.getLogger(__name__)
+
+# "eager": the HuggingFace forward, "torchscript": a frozen traced graph cached on disk, "compile": torch.compile
+BACKENDS = ("eager", "torchscript", "compile")
+
+# texts of different lengths used to trace the graph and to check it against the eager model
+_EXAMPLE_TEXTS = ["UPS", "estimated arrival date on july 5 2023", "apparel products shipped by dhl"]
+
+
+class ClsEncoder(torch.nn.Module):
+    """
+    Wraps a HuggingFace encoder so its forward pass returns the [CLS] token embeddings.
+
+    Extracting the [CLS] token inside the module makes it part of the traced or compiled graph, and the
+    graph only takes and returns plain tensors.
+    """
+
+    def __init__(self, model: torch.nn.Module):
+        """
+        Args:
+            model (PreTrainedModel): The HuggingFace encoder.
+        """
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state[:, 0, :]
+
+
+def _artifact_path(compiled_dir: pathlib.Path, model_key: str) -> pathlib.Path:
+    """
+    Names the TorchScript artifact of a model, so a different model, mode or library version is never reused.
+
+    Args:
+        compiled_dir (pathlib.Path): The directory holding the artifacts.
+        model_key (str): Everything that influences the model's graph (name, inference mode, ...).
+
+    Returns:
+        pathlib.Path: The artifact path.
+    """
+    key = f"{model_key}|torch={torch.__version__}|transformers={transformers.__version__}"
+    return compiled_dir / f"cls_encoder_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}.pt"
+
+
+def _trace(encoder: ClsEncoder, tokenizer, autocast: bool) -> torch.jit.ScriptModule:
+    """
+    Traces and freezes the [CLS] encoder on example inputs.
+
+    Args:
+        encoder (ClsEncoder): The encoder to trace.
+        tokenizer (PreTrainedTokenizer): The tokenizer producing the example inputs.
+        autocast (bool): Whether to trace under bfloat16 autocast.
+
+    Returns:
+        torch.jit.ScriptModule: The frozen graph.
+    """
+    inputs = tokenizer(_EXAMPLE_TEXTS[:2], return_tensors="pt", padding=True)
+    with torch.no_grad(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=autocast):
+        traced = torch.jit.trace(encoder.eval(), (inputs["input_ids"], inputs["attention_mask"]), check_trace=False)
+    return torch.jit.freeze(traced)
+
+
+def build_compiled_encoder(
+    model: torch.nn.Module,
+    tokenizer,
+    backend: str,
+    model_key: str,
+    compiled_dir: Optional[Union[str, pathlib.Path]] = None,
+    autocast: bool = False,
+) -> Optional[Callable[[torch.Tensor, torch.Tensor], torch.Tensor]]:
+    """
+    Builds a traced or compiled [CLS] encoder, checked against the eager model.
+
+    The "torchscript" graph is saved to `compiled_dir` and loaded by the next runs instead of being traced
+    again. If building the graph fails or its embeddings differ from the eager ones, a warning is logged
+    and None is returned, so the caller keeps using the eager model.
+
+    Args:
+        model (PreTrainedModel): The HuggingFace encoder.
+        tokenizer (PreTrainedTokenizer): Its tokenizer.
+        backend (str): "torchscript" or "compile".
+        model_key (str): Everything that influences the model's graph, used to name the artifact.
+        compiled_dir (str or pathlib.Path, optional): The directory of the TorchScript artifacts. The graph
+            is traced on every run if None (default is None).
+        autocast (bool, optional): Whether the model runs under bfloat16 autocast (default is False).
+
+    Returns:
+        Optional[Callable]: The encoder, taking input ids and attention mask, or None to fall back to eager.
+
+    Raises:
+        ValueError: If the backend is not supported.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"backend must be one of {BACKENDS}, got '{backend}'")
+    if backend == "eager":
+        return None
+
+    encoder = ClsEncoder(model).eval()
+    try:
+        with warnings.catch_warnings():
+            # TorchScript warns about its deprecation in favour of torch.export on every call
+            warnings.simplefilter("ignore")
+            if backend == "compile":
+                compiled = torch.compile(encoder, dynamic=True)
+            elif compiled_dir is None:
+                compiled = _trace(encoder, tokenizer, autocast)
+            else:
+                artifact_path = _artifact_path(pathlib.Path(compiled_dir), model_key)
+                if artifact_path.exists():
+                    logger.info(f"loading the TorchScript encoder from {artifact_path}")
+                    compiled = torch.jit.load(str(artifact_path))
+                else:
+                    compiled = _trace(encoder, tokenizer, autocast)
+                    artifact_path.parent.mkdir(parents=True, exist_ok=True)
+                    fd, tmp_path = tempfile.mkstemp(dir=artifact_path.parent, suffix=".tmp")
+                    os.close(fd)
+                    try:
+                        torch.jit.save(compiled, tmp_path)
+                        os.replace(tmp_path, artifact_path)
+                    finally:
+                        pathlib.Path(tmp_path).unlink(missing_ok=True)
+                    logger.info(f"TorchScript encoder saved to {artifact_path}")
+
+            # check the graph on other shapes than the traced ones (this also triggers torch.compile)
+            inputs = tokenizer(_EXAMPLE_TEXTS, return_tensors="pt", padding=True)
+            with torch.no_grad(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=autocast):
+                expected = encoder(inputs["input_ids"], inputs["attention_mask"]).float()
+                actual = compiled(inputs["input_ids"], inputs["attention_mask"]).float()
+        cosines = torch.nn.functional.cosine_similarity(expected, actual, dim=1)
+        if not bool(torch.all(cosines > 0.999)):
+            raise RuntimeError(f"the {backend} embeddings differ from the eager ones (cosines {cosines.tolist()})")
+    except Exception as eee:
+        logger.warning(f"{backend} backend unavailable, falling back to eager inference: {str(eee)}")
+        return None
+
+    logger.info(f"using the {backend} inference backend")
+    return compiled
+
+
+class TestBuildCompiledEncoder(unittest.TestCase):
+    """
+    Unit tests for the build_compiled_encoder function, on a tiny randomly initialized DistilBERT.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Creates a tiny DistilBERT model and a tokenizer with a small vocabulary.
+        """
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list("abcdefghijklmnopqrstuvwxyz0123456789")
+        vocab_path = pathlib.Path(cls.tmp_dir.name) / "vocab.txt"
+        vocab_path.write_text("\n".join(vocab))
+        cls.tokenizer = transformers.DistilBertTokenizer(str(vocab_path))
+        torch.manual_seed(0)
+        cls.model = transformers.DistilBertModel(
+            transformers.DistilBertConfig(vocab_size=len(vocab), dim=32, hidden_dim=64, n_layers=2, n_heads=2)
+        ).eval()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        Removes the temporary files.
+        """
+        cls.tmp_dir.cleanup()
+
+    def test_torchscript_artifact_is_reused(self) -> None:
+        """
+        tests that the traced encoder matches the eager model and is loaded from disk on the next build.
+        """
+        compiled_dir = pathlib.Path(self.tmp_dir.name) / "compiled"
+        traced = build_compiled_encoder(self.model, self.tokenizer, "torchscript", "tiny", compiled_dir)
+        self.assertIsNotNone(traced)
+        self.assertEqual(len(list(compiled_dir.glob("*.pt"))), 1)
+
+        with self.assertLogs(logger, level="INFO") as logs:
+            loaded = build_compiled_encoder(self.model, self.tokenizer, "torchscript", "tiny", compiled_dir)
+        self.assertTrue(any("loading the TorchScript encoder" in line for line in logs.output))
+
+        inputs = self.tokenizer(["ups 1", "dhl express 2023"], return_tensors="pt", padding=True)
+        with torch.no_grad():
+            expected = self.model(**inputs).last_hidden_state[:, 0, :]
+            torch.testing.assert_close(loaded(inputs["input_ids"], inputs["attention_mask"]), expected)
+
+    def test_failure_falls_back_to_eager(self) -> None:
+        """
+        tests that a model that cannot be traced falls back to eager inference.
+        """
+        self.assertIsNone(build_compiled_encoder(torch.nn.Identity(), self.tokenizer, "torchscript", "identity"))
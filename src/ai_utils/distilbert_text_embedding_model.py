@@ -1,8 +1,11 @@
 import logging
 import numpy as np
+import pathlib
+import tempfile
 import torch
 import unittest
 
+from typing import Optional, Sequence, Union
 from transformers import DistilBertModel, DistilBertTokenizer
 from .base_huggingface_embedding import HuggingFaceEmbedding
 
@@ -18,24 +21,58 @@ class DistilBertTextEmbedding(HuggingFaceEmbedding):
     to generate embeddings for textual input data.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        model_name: str = "distilbert-base-uncased",
+        cache_dir: Optional[Union[str, pathlib.Path]] = None,
+        cache_max_entries: int = 100_000,
+        batch_size: int = 32,
+        inference_mode: str = "fp32",
+        backend: str = "eager",
+        compiled_dir: Optional[Union[str, pathlib.Path]] = None,
+    ):
         """
         Initializes the DistilBERT tokenizer and model.
 
         Loads the pretrained DistilBERT model and tokenizer for text embedding and passes them
         to the parent HuggingFaceEmbedding class.
+
+        Args:
+            model_name (str, optional): The pretrained model name or path (default is "distilbert-base-uncased").
+            cache_dir (str or pathlib.Path, optional): The directory of the persistent embedding cache.
+                No cache is used if None (default is None).
+            cache_max_entries (int, optional): The maximum number of cached embeddings (default is 100,000).
+            batch_size (int, optional): The number of texts per forward pass in `embed_texts` (default is 32).
+            inference_mode (str, optional): The CPU inference mode, "fp32", "int8" (dynamic quantization of
+                the linear layers) or "bf16" (bfloat16 autocast) (default is "fp32").
+            backend (str, optional): The inference backend, "eager", "torchscript" (a frozen graph cached in
+                `compiled_dir`) or "compile" (torch.compile). Falls back to "eager" if unavailable
+                (default is "eager").
+            compiled_dir (str or pathlib.Path, optional): The directory of the TorchScript artifacts
+                (default is None, the local model directory if `model_name` is one).
         """
-        logger.info("Creating the DistilBert tokenizer and model.")
-        tokenizer = DistilBertTokenizer.from_pretrained('distilbert-base-uncased')
-        model = DistilBertModel.from_pretrained('distilbert-base-uncased')
+        logger.info(f"Creating the DistilBert tokenizer and model ({inference_mode} inference).")
+        tokenizer = DistilBertTokenizer.from_pretrained(model_name)
+        model = DistilBertModel.from_pretrained(model_name)
         
         # initialize parent class with tokenizer and model
-        super().__init__(tokenizer, model)
+        super().__init__(tokenizer, model, batch_size=batch_size, inference_mode=inference_mode)
+
+        if backend != "eager":
+            if compiled_dir is None and pathlib.Path(model_name).is_dir():
+                compiled_dir = pathlib.Path(model_name) / "compiled"
+            self.enable_backend(backend, compiled_dir=compiled_dir)
+
+        if cache_dir is not None:
+            self.enable_cache(cache_dir=cache_dir, max_entries=cache_max_entries)
 
     def embed_text(self, text):
         """
         Embeds text using the DistilBERT model.
 
+        If an embedding cache is attached, the cached embedding is returned when available and new
+        embeddings are added to it.
+
         Args:
             text (str): The input text to embed.
 
@@ -47,11 +84,60 @@ class DistilBertTextEmbedding(HuggingFaceEmbedding):
         """
         try:
             # logger.info(f"Encoding text: {text[:50]}...")  # log only the first 50 characters
-            return self.encode(text)
+            if self.embedding_cache is None:
+                return self.encode(text)
+
+            # reuse the embedding if this text was already embedded with the same settings
+            embedded = self.embedding_cache.get(text)
+            if embedded is None:
+                embedded = self.encode(text)
+                self.embedding_cache.put(text, embedded)
+            return embedded
         except Exception as eee:
             logger.error(f"Error embedding text: {str(eee)}")
             raise eee
 
+    def embed_texts(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embeds a list of texts using batched forward passes of the DistilBERT model.
+
+        If an embedding cache is attached, only the texts missing from the cache are passed through
+        the model, and their embeddings are added to it.
+
+        Args:
+            texts (Sequence[str]): The input texts to embed.
+
+        Returns:
+            numpy.ndarray: A float32 matrix of shape (len(texts), hidden_size), one row per input text.
+
+        Raises:
+            Exception: If an error occurs during text embedding.
+        """
+        try:
+            texts = list(texts)
+            if self.embedding_cache is None:
+                return self.encode_batch(texts)
+
+            embeddings = np.empty((len(texts), self.model.config.hidden_size), dtype=np.float32)
+            missing = {}  # text -> positions in `texts`, so duplicates are embedded once
+            for i, text in enumerate(texts):
+                cached = self.embedding_cache.get(text)
+                if cached is None:
+                    missing.setdefault(text, []).append(i)
+                else:
+                    embeddings[i] = cached
+
+            if missing:
+                missing_texts = list(missing)
+                for text, embedded in zip(missing_texts, self.encode_batch(missing_texts)):
+                    embeddings[missing[text]] = embedded
+                    self.embedding_cache.put(text, embedded)
+
+            return embeddings
+        except Exception as eee:
+            logger.error(f"Error embedding texts: {str(eee)}")
+            raise eee
+
 
 class TestDistilBertTextEmbedding(unittest.TestCase):
     """
@@ -100,3 +186,41 @@ class TestDistilBertTextEmbedding(unittest.TestCase):
 
         # check if the result is a numpy ndarray
         self.assertIsInstance(embedded_vector, np.ndarray)
+
+    def test_embed_texts_matches_embed_text(self):
+        """
+        Tests that batched embeddings keep the input order and match single-text embeddings.
+        """
+        texts = ["UPS", "apparel products", "estimated arrival date on July 5 2023"]
+        embedded_matrix = self.distilbert_embed.embed_texts(texts)
+
+        self.assertEqual(embedded_matrix.shape, (len(texts), 768))
+        self.assertEqual(embedded_matrix.dtype, np.float32)
+        for text, embedded_vector in zip(texts, embedded_matrix):
+            np.testing.assert_allclose(embedded_vector, self.distilbert_embed.embed_text(text), atol=1e-4)
+
+    def test_inference_modes_agree_with_fp32(self):
+        """
+        Tests that the int8 and bf16 inference modes produce embeddings close to the fp32 ones, cached separately.
+        """
+        texts = ["UPS", "apparel products", "estimated arrival date on July 5 2023"]
+        reference = self.distilbert_embed.embed_texts(texts)
+        for mode in ("int8", "bf16"):
+            model = DistilBertTextEmbedding(inference_mode=mode)
+            embedded_matrix = model.embed_texts(texts)
+            cosines = np.sum(reference * embedded_matrix, axis=1) / (
+                np.linalg.norm(reference, axis=1) * np.linalg.norm(embedded_matrix, axis=1)
+            )
+            self.assertEqual(embedded_matrix.dtype, np.float32)
+            self.assertTrue(np.all(cosines > 0.95), f"{mode}: {cosines}")
+            self.assertNotEqual(model.cache_namespace, self.distilbert_embed.cache_namespace)
+
+    def test_torchscript_backend_matches_eager(self):
+        """
+        Tests that the TorchScript backend produces the same embeddings as the eager model.
+        """
+        with tempfile.TemporaryDirectory() as compiled_dir:
+            model = DistilBertTextEmbedding(backend="torchscript", compiled_dir=compiled_dir)
+            self.assertEqual(model.backend, "torchscript")
+            texts = ["UPS", "apparel products", "estimated arrival date on July 5 2023"]
+            np.testing.assert_allclose(model.embed_texts(texts), self.distilbert_embed.embed_texts(texts), atol=1e-4)
@@ -0,0 +1,261 @@
+import hashlib
+import logging
+import numpy as np
+import os
+import pathlib
+import tempfile
+import unittest
+
+from collections import OrderedDict
+from typing import Dict, Optional, Union
+
+# setup logger
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Persistent, size-bounded LRU cache of text embeddings.
+
+    Each cache instance is bound to a namespace describing how the embeddings were produced
+    (model name, tokenizer settings, ...). Entries are keyed by the normalized input text, kept
+    in least-recently-used order in memory and written to a single `.npz` file per namespace,
+    so the same text is only ever embedded once across queries and across runs.
+
+    Attributes:
+        cache_dir (pathlib.Path): The directory holding the cache files.
+        namespace (str): A description of the embedding settings the cache is bound to.
+        max_entries (int): The maximum number of embeddings kept before evicting the least recently used.
+        hits (int): The number of lookups answered from the cache.
+        misses (int): The number of lookups that were not in the cache.
+        evictions (int): The number of entries dropped to respect `max_entries`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, pathlib.Path],
+        namespace: str,
+        max_entries: int = 100_000,
+    ):
+        """
+        Initializes the cache and loads any previously persisted entries for the namespace.
+
+        Args:
+            cache_dir (str or pathlib.Path): The directory holding the cache files.
+            namespace (str): A description of the embedding settings the cache is bound to.
+            max_entries (int, optional): The maximum number of cached embeddings (default is 100,000).
+
+        Raises:
+            ValueError: If `max_entries` is not a positive integer.
+        """
+        if max_entries <= 0:
+            raise ValueError(f"max_entries must be a positive integer, got {max_entries}")
+
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._dirty = False
+        self.load()
+
+    @property
+    def path(self) -> pathlib.Path:
+        """
+        pathlib.Path: The file the cache for this namespace is persisted to.
+        """
+        digest = hashlib.sha1(self.namespace.encode("utf-8")).hexdigest()[:16]
+        return self.cache_dir / f"embeddings_{digest}.npz"
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalizes text into a cache key by collapsing runs of whitespace.
+
+        Whitespace is the only normalization applied since tokenizers split on it anyway; casing is
+        left to the caller because it is model specific.
+
+        Args:
+            text (str): The raw input text.
+
+        Returns:
+            str: The normalized cache key.
+        """
+        return " ".join(str(text).split())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, text: str) -> bool:
+        return self.normalize(text) in self._entries
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Looks up the embedding of a text, marking it as recently used.
+
+        Args:
+            text (str): The input text.
+
+        Returns:
+            Optional[np.ndarray]: The cached embedding, or None on a cache miss.
+        """
+        key = self.normalize(text)
+        vector = self._entries.get(key)
+        if vector is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return vector
+
+    def put(self, text: str, vector: np.ndarray) -> None:
+        """
+        Stores the embedding of a text, evicting the least recently used entries if the cache is full.
+
+        Args:
+            text (str): The input text.
+            vector (np.ndarray): The embedding of the text.
+        """
+        key = self.normalize(text)
+        self._entries[key] = np.asarray(vector, dtype=np.float32)
+        self._entries.move_to_end(key)
+        self._dirty = True
+        self._evict()
+
+    def _evict(self) -> None:
+        """
+        Drops least recently used entries until the cache respects `max_entries`.
+        """
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Summarizes the cache usage since it was created.
+
+        Returns:
+            Dict[str, Union[int, float]]: The entries, hits, misses, evictions and hit rate of the cache.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def load(self) -> None:
+        """
+        Loads the persisted entries for the namespace, if any.
+
+        Files written for a different namespace (e.g. a hash collision) or that cannot be read are ignored.
+        """
+        if not self.path.exists():
+            return
+
+        try:
+            with np.load(self.path, allow_pickle=False) as stored:
+                if str(stored["namespace"]) != self.namespace:
+                    logger.info(f"ignoring embedding cache {self.path}: namespace mismatch")
+                    return
+                texts, vectors = stored["texts"], stored["vectors"]
+        except Exception as eee:
+            logger.error(f"Error loading embedding cache {self.path}: {str(eee)}")
+            return
+
+        # entries are persisted oldest first, so re-inserting them restores the LRU order
+        self._entries = OrderedDict(zip(texts.tolist(), vectors))
+        self._evict()
+        logger.info(f"loaded {len(self._entries)} cached embeddings from {self.path}")
+
+    def save(self) -> None:
+        """
+        Persists the cache to disk if it changed since it was loaded.
+
+        The file is written to a temporary path first and moved into place, so an interrupted run never
+        leaves a truncated cache behind.
+        """
+        if not self._dirty:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        texts = np.array(list(self._entries.keys()), dtype=str)
+        vectors = (
+            np.stack(list(self._entries.values())).astype(np.float32, copy=False)
+            if self._entries
+            else np.empty((0, 0), dtype=np.float32)
+        )
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".npz.tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, namespace=np.array(self.namespace), texts=texts, vectors=vectors)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self._dirty = False
+        logger.info(f"saved {len(self._entries)} cached embeddings to {self.path}")
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """
+    Unit tests for the EmbeddingCache class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a temporary cache directory for each test.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = pathlib.Path(self.tmp_dir.name)
+
+    def tearDown(self) -> None:
+        """
+        Removes the temporary cache directory.
+        """
+        self.tmp_dir.cleanup()
+
+    def test_hits_and_misses(self) -> None:
+        """
+        tests that lookups are counted and whitespace variants share an entry.
+        """
+        cache = EmbeddingCache(self.cache_dir, namespace="model|100|True")
+        self.assertIsNone(cache.get("ups"))
+        cache.put("ups", np.ones(4))
+        np.testing.assert_array_equal(cache.get("  ups "), np.ones(4, dtype=np.float32))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_eviction(self) -> None:
+        """
+        tests that the least recently used entry is evicted once the cache is full.
+        """
+        cache = EmbeddingCache(self.cache_dir, namespace="model|100|True", max_entries=2)
+        cache.put("a", np.zeros(2))
+        cache.put("b", np.zeros(2))
+        cache.get("a")
+        cache.put("c", np.zeros(2))
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_persistence_across_instances(self) -> None:
+        """
+        tests that saved entries are reloaded for the same namespace only.
+        """
+        cache = EmbeddingCache(self.cache_dir, namespace="model|100|True")
+        cache.put("apparel", np.arange(3))
+        cache.save()
+
+        reloaded = EmbeddingCache(self.cache_dir, namespace="model|100|True")
+        np.testing.assert_array_equal(reloaded.get("apparel"), np.arange(3, dtype=np.float32))
+
+        other = EmbeddingCache(self.cache_dir, namespace="model|50|True")
+        self.assertEqual(len(other), 0)
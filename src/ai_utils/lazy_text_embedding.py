@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+import unittest
+
+from typing import Any, Callable, Optional
+
+# setup logger
+logger = logging.getLogger(__name__)
+
+
+class LazyTextEmbedding:
+    """
+    Proxy deferring the construction of an embedding model until it is first used.
+
+    Loading DistilBERT (importing torch and transformers, reading the weights) takes seconds, so the
+    runner wraps it in this proxy: data loading and preprocessing start immediately, and runs that never
+    embed anything (e.g. an up-to-date incremental index with cached query embeddings) never load it.
+    Every attribute access is forwarded to the model, which is built on the first one. `preload` starts
+    building it on a background thread instead, so it loads while the data is read; the first use then
+    waits for it.
+
+    Attributes:
+        load_seconds (Optional[float]): The time spent building the model, None until it is built.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        """
+        Initializes the proxy without building the model.
+
+        Args:
+            factory (Callable[[], Any]): Builds the model, e.g. `lambda: DistilBertTextEmbedding()`.
+        """
+        self._factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """
+        bool: Whether the model has been built.
+        """
+        return self._model is not None
+
+    def load(self) -> Any:
+        """
+        Builds the model if it was not built yet.
+
+        Returns:
+            Any: The model.
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    start = time.perf_counter()
+                    model = self._factory()
+                    self.load_seconds = time.perf_counter() - start
+                    logger.info(f"embedding model loaded in {self.load_seconds:.2f}s")
+                    self._model = model
+        return self._model
+
+    def preload(self) -> threading.Thread:
+        """
+        Starts building the model on a background thread.
+
+        A failed preload is logged and the model is built again on first use, which raises the error.
+
+        Returns:
+            threading.Thread: The (daemon) thread building the model.
+        """
+        thread = threading.Thread(target=self._preload, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def _preload(self) -> None:
+        try:
+            self.load()
+        except Exception as eee:
+            logger.error(f"Error preloading the embedding model: {str(eee)}")
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes not found on the proxy itself
+        if name.startswith("__") or name in ("_factory", "_model", "_lock"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+
+class TestLazyTextEmbedding(unittest.TestCase):
+    """
+    Unit tests for the LazyTextEmbedding class.
+    """
+
+    def test_model_built_on_first_use_only(self) -> None:
+        """
+        tests that the factory is called once, on the first forwarded attribute access.
+        """
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+
+        calls = []
+        lazy_model = LazyTextEmbedding(lambda: calls.append(1) or FakeTextEmbedding())
+        self.assertFalse(lazy_model.is_loaded)
+        self.assertEqual(calls, [])
+
+        lazy_model.embed_text("ups")
+        lazy_model.embed_texts(["dhl"])
+        self.assertTrue(lazy_model.is_loaded)
+        self.assertEqual(calls, [1])
+        self.assertEqual(lazy_model.embedded_texts, ["ups", "dhl"])
+        self.assertIsNotNone(lazy_model.load_seconds)
+
+    def test_preload_in_background(self) -> None:
+        """
+        tests that a preloaded model is built once and that its first use waits for it.
+        """
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+
+        calls = []
+
+        def slow_factory():
+            time.sleep(0.2)
+            calls.append(1)
+            return FakeTextEmbedding()
+
+        lazy_model = LazyTextEmbedding(slow_factory)
+        thread = lazy_model.preload()
+        self.assertEqual(lazy_model.embed_texts(["ups"]).shape[0], 1)
+        thread.join()
+        self.assertEqual(calls, [1])
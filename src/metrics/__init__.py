@@ -0,0 +1,7 @@
+from ._run_metrics import RunMetrics, run_metrics, peak_rss_mb
+
+__all__ = [
+    "RunMetrics",
+    "run_metrics",
+    "peak_rss_mb",
+]
@@ -0,0 +1,158 @@
+import contextlib
+import json
+import pathlib
+import sys
+import tempfile
+import time
+import unittest
+
+from typing import Any, Dict, Iterator, Optional, Union
+
+
+__all__ = ["RunMetrics", "run_metrics", "peak_rss_mb"]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Returns the peak resident memory of the process in megabytes, or None where it is not available.
+
+    Returns:
+        Optional[float]: The peak RSS, in MB.
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class RunMetrics:
+    """
+    Counts the work done by the hot paths of a run: forward passes, tokens, values scored, cache hits.
+
+    Hot paths call `increment` and `timer` unconditionally; both return immediately while the metrics are
+    disabled, which is the default, so instrumented code costs one attribute check per call. Counters of
+    worker processes (see `ParallelTextEmbedding`) are not collected.
+
+    Attributes:
+        enabled (bool): Whether counters and timers are recorded.
+        counters (Dict[str, int]): The counters, e.g. "forward_passes" or "values_scored".
+        timings (Dict[str, float]): The accumulated duration of every timer, in seconds.
+    """
+
+    def __init__(self, enabled: bool = False):
+        """
+        Initializes empty metrics.
+
+        Args:
+            enabled (bool, optional): Whether to record metrics (default is False).
+        """
+        self.enabled = enabled
+        self.counters: Dict[str, int] = {}
+        self.timings: Dict[str, float] = {}
+
+    def reset(self) -> None:
+        """
+        Clears the counters and timers.
+        """
+        self.counters.clear()
+        self.timings.clear()
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Adds to a counter, if the metrics are enabled.
+
+        Args:
+            name (str): The counter name.
+            value (int, optional): The amount to add (default is 1).
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    @contextlib.contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """
+        Adds the duration of the enclosed block to a timer, if the metrics are enabled.
+
+        Args:
+            name (str): The timer name.
+        """
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Returns the counters, the timers rounded to milliseconds and the peak RSS of the process.
+
+        Returns:
+            Dict[str, Any]: The "counters", "timings" (in seconds) and "peak_rss_mb".
+        """
+        return {
+            "counters": dict(self.counters),
+            "timings": {name: round(seconds, 3) for name, seconds in self.timings.items()},
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def write(self, path: Union[str, pathlib.Path], **sections: Any) -> pathlib.Path:
+        """
+        Writes the report to a JSON file, with extra sections such as the stage timings of the run.
+
+        Args:
+            path (str or pathlib.Path): The JSON file to write.
+            **sections (Any): JSON-serializable sections added to the report.
+
+        Returns:
+            pathlib.Path: The path of the written file.
+        """
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({**sections, **self.report()}, f, indent=4, default=str)
+        return path
+
+
+# the metrics of the current process, enabled by the playbooks that write them
+run_metrics = RunMetrics()
+
+
+class TestRunMetrics(unittest.TestCase):
+    """
+    Unit tests for the RunMetrics class.
+    """
+
+    def test_disabled_records_nothing(self) -> None:
+        """
+        tests that disabled metrics ignore counters and timers.
+        """
+        metrics = RunMetrics()
+        metrics.increment("forward_passes")
+        with metrics.timer("forward_pass"):
+            pass
+        self.assertEqual(metrics.report()["counters"], {})
+        self.assertEqual(metrics.report()["timings"], {})
+
+    def test_enabled_counts_and_writes(self) -> None:
+        """
+        tests that enabled metrics accumulate counters and timers and are written with extra sections.
+        """
+        metrics = RunMetrics(enabled=True)
+        metrics.increment("tokens", 7)
+        metrics.increment("tokens", 3)
+        with metrics.timer("scoring"):
+            pass
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = metrics.write(pathlib.Path(tmp_dir) / "metrics.json", stages={"data_load": 0.5})
+            with open(path) as f:
+                written = json.load(f)
+
+        self.assertEqual(written["counters"], {"tokens": 10})
+        self.assertIn("scoring", written["timings"])
+        self.assertEqual(written["stages"], {"data_load": 0.5})
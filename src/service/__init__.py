@@ -0,0 +1,5 @@
+from ._query_service import QueryService
+
+__all__ = [
+    "QueryService",
+]
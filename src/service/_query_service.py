@@ -0,0 +1,321 @@
+import asyncio
+import json
+import logging
+import unittest
+
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils import NumpyEncoder, build_query_result, match_queries
+
+
+__all__ = ["QueryService"]
+
+logger = logging.getLogger(__name__)
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class QueryService:
+    """
+    Resident HTTP/JSON query service keeping the embedding model and the column indexes in memory.
+
+    Concurrent requests are coalesced into micro-batches: the first query waits at most `batch_window_ms`
+    for other queries to arrive, then all the queued queries are embedded in a single forward pass and
+    scored with one matrix product per column.
+
+    Endpoints:
+        POST /query: body {"query": "..."} or {"queries": ["...", ...]}; returns the list of result records,
+            with the same fields as the runner's `query_results`.
+        GET /health: returns the service status and micro-batching statistics.
+
+    Attributes:
+        textual_model (Any): The model used for embedding the queries.
+        column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+        batch_window_ms (float): How long the first query of a batch waits for more queries.
+        max_batch_size (int): The maximum number of queries embedded in one forward pass.
+        n_batches (int): The number of micro-batches processed.
+        n_queries (int): The number of queries processed.
+    """
+
+    def __init__(
+        self,
+        textual_model: Any,
+        column_indexes: Dict[str, Any],
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 64,
+    ):
+        """
+        Initializes the service. Call `start` to listen for requests.
+
+        Args:
+            textual_model (Any): The model used for embedding the queries.
+            column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+            batch_window_ms (float, optional): How long the first query of a batch waits for more queries
+                (default is 5 ms).
+            max_batch_size (int, optional): The maximum number of queries per forward pass (default is 64).
+        """
+        self.textual_model = textual_model
+        self.column_indexes = column_indexes
+        self.batch_window_ms = batch_window_ms
+        self.max_batch_size = max_batch_size
+        self.n_batches = 0
+        self.n_queries = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8000) -> Tuple[str, int]:
+        """
+        Starts the micro-batcher and listens for HTTP requests.
+
+        Args:
+            host (str, optional): The interface to bind (default is the loopback interface).
+            port (int, optional): The port to bind, 0 for any free port (default is 8000).
+
+        Returns:
+            Tuple[str, int]: The bound host and port.
+        """
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batcher())
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        bound_host, bound_port = self._server.sockets[0].getsockname()[:2]
+        logger.info(f"query service listening on http://{bound_host}:{bound_port}")
+        return bound_host, bound_port
+
+    async def serve_forever(self) -> None:
+        """
+        Serves requests until the task is cancelled.
+        """
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        """
+        Stops listening and cancels the micro-batcher.
+        """
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+
+    async def search(self, queries: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Queues queries for the next micro-batch and waits for their results.
+
+        Args:
+            queries (List[str]): The user queries.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: The result record of every query (None if no column matched).
+        """
+        loop = asyncio.get_running_loop()
+        futures = []
+        for query in queries:
+            future = loop.create_future()
+            await self._queue.put((query, future))
+            futures.append(future)
+        return list(await asyncio.gather(*futures))
+
+    async def _run_batcher(self) -> None:
+        """
+        Collects queued queries into micro-batches and resolves their futures.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+
+            # wait a little for concurrent queries to join the batch
+            deadline = loop.time() + self.batch_window_ms / 1000
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            queries = [query for query, _ in batch]
+            try:
+                # the forward pass and scoring are blocking, keep the event loop responsive
+                results = await loop.run_in_executor(None, self._process_batch, queries)
+            except Exception as eee:
+                logger.error(f"Error processing a batch of {len(queries)} queries: {str(eee)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(eee)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def _process_batch(self, queries: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Embeds a batch of queries in one forward pass and builds their result records.
+
+        Args:
+            queries (List[str]): The user queries.
+
+        Returns:
+            List[Optional[Dict[str, Any]]]: The result record of every query.
+        """
+        embedded_queries = self.textual_model.embed_texts([query.lower() for query in queries])
+        query_col_res = match_queries(embedded_queries=embedded_queries, column_indexes=self.column_indexes)
+        self.n_batches += 1
+        self.n_queries += len(queries)
+        return [
+            build_query_result(query=query, col_res=col_res, column_indexes=self.column_indexes)
+            for query, col_res in zip(queries, query_col_res)
+        ]
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        Serves the HTTP requests of one client connection.
+
+        Args:
+            reader (asyncio.StreamReader): The connection's input stream.
+            writer (asyncio.StreamWriter): The connection's output stream.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                status, payload = await self._route(method, path, body)
+                response = json.dumps(payload, cls=NumpyEncoder).encode("utf-8")
+                keep_alive = headers.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(response)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + response
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError) as eee:
+            logger.info(f"closing connection: {str(eee)}")
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        """
+        Dispatches a request to its endpoint.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The request path.
+            body (bytes): The request body.
+
+        Returns:
+            Tuple[int, Any]: The HTTP status code and the JSON-serializable response.
+        """
+        if path == "/health":
+            return 200, {"status": "ok", "batches": self.n_batches, "queries": self.n_queries}
+        if path != "/query":
+            return 404, {"error": f"unknown path {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        try:
+            request = json.loads(body or b"{}")
+            queries = request["queries"] if "queries" in request else [request["query"]]
+            if not all(isinstance(query, str) for query in queries):
+                raise TypeError("queries must be strings")
+        except (ValueError, KeyError, TypeError) as eee:
+            return 400, {"error": f'expected {{"query": "..."}} or {{"queries": [...]}}: {str(eee)}'}
+
+        try:
+            return 200, [result for result in await self.search(queries) if result]
+        except Exception as eee:
+            return 500, {"error": str(eee)}
+
+
+class TestQueryService(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit tests for the QueryService class, against a loopback port.
+    """
+
+    async def asyncSetUp(self) -> None:
+        """
+        Starts a service on a free loopback port with a fake embedding model.
+        """
+        import pandas as pd
+        from src.utils import build_column_indexes
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+
+        self.model = FakeTextEmbedding()
+        df = pd.DataFrame({"Carrier_name": ["UPS", "DHL", "UPS"], "Priority": ["High", "Low", "Low"]})
+        self.column_indexes = build_column_indexes(df, self.model)
+        self.service = QueryService(self.model, self.column_indexes, batch_window_ms=50)
+        self.host, self.port = await self.service.start(port=0)
+
+    async def asyncTearDown(self) -> None:
+        """
+        Stops the service.
+        """
+        await self.service.stop()
+
+    async def _request(self, method: str, path: str, payload: Optional[dict] = None) -> Tuple[int, Any]:
+        """
+        Sends one HTTP request and reads the JSON response.
+        """
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nConnection: close\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, content = response.partition(b"\r\n\r\n")
+        return int(head.split(b" ")[1]), json.loads(content)
+
+    async def test_query_returns_runner_record(self) -> None:
+        """
+        tests that a query returns the same record as the runner's query_results.
+        """
+        status, results = await self._request("POST", "/query", {"query": "UPS"})
+        self.assertEqual(status, 200)
+        self.assertEqual(results[0]["column_name"], "Carrier_name")
+        self.assertEqual(results[0]["value"], "UPS")
+        self.assertEqual(results[0]["row_ids"], ["row2", "row4"])
+        self.assertEqual(results[0]["user_query"], "UPS")
+
+    async def test_concurrent_queries_are_micro_batched(self) -> None:
+        """
+        tests that concurrent requests are embedded together in one batch.
+        """
+        responses = await asyncio.gather(*[
+            self._request("POST", "/query", {"query": query}) for query in ["UPS", "DHL", "high priority"]
+        ])
+        self.assertEqual([status for status, _ in responses], [200, 200, 200])
+        self.assertEqual(self.service.n_queries, 3)
+        self.assertEqual(self.service.n_batches, 1)
+
+    async def test_bad_requests(self) -> None:
+        """
+        tests that malformed requests and unknown paths are rejected.
+        """
+        self.assertEqual((await self._request("POST", "/query", {"text": "UPS"}))[0], 400)
+        self.assertEqual((await self._request("GET", "/query"))[0], 405)
+        self.assertEqual((await self._request("GET", "/unknown"))[0], 404)
+        self.assertEqual((await self._request("GET", "/health"))[1]["status"], "ok")
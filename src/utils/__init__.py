@@ -1,19 +1,112 @@
-from ._process_user_input import process_user_input
-from ._filter_data_cols import filter_data_by_cols
-from ._get_column_type import get_column_type
-from ._add_string_version_columns_with_column_name import add_string_version_columns_with_column_name
-from ._find_best_match import find_best_match
-from ._get_overall_best_result import get_overall_best_result
-from ._numpy_encoder import NumpyEncoder
-from ._convert_date_columns import convert_date_columns
+import importlib
+
+# exports are imported on first access, so utility-only tools only load the modules they use
+_LAZY_EXPORTS = {
+    "process_user_input": "._process_user_input",
+    "filter_data_by_cols": "._filter_data_cols",
+    "load_compact_dataset": "._load_compact_dataset",
+    "frame_memory_mb": "._load_compact_dataset",
+    "get_column_type": "._get_column_type",
+    "add_string_version_columns_with_column_name": "._add_string_version_columns_with_column_name",
+    "QuantizedEmbeddings": "._quantized_embeddings",
+    "evaluate_quantization": "._quantized_embeddings",
+    "IVFIndex": "._ivf_index",
+    "evaluate_ann_recall": "._ivf_index",
+    "ColumnIndex": "._column_index",
+    "get_searchable_columns": "._column_index",
+    "build_column_indexes": "._column_index",
+    "ColumnIndexBuilder": "._column_index_builder",
+    "pipeline_column_indexes": "._pipeline_column_indexes",
+    "index_csv_chunks": "._stream_column_indexes",
+    "stream_column_indexes": "._stream_column_indexes",
+    "save_column_indexes": "._column_index_store",
+    "load_column_indexes": "._column_index_store",
+    "refresh_column_indexes": "._refresh_column_indexes",
+    "evaluate_inference_mode": "._evaluate_inference_mode",
+    "find_best_match": "._find_best_match",
+    "get_overall_best_result": "._get_overall_best_result",
+    "match_queries": "._search_queries",
+    "build_query_result": "._search_queries",
+    "match_queries_top_k": "._search_queries",
+    "build_top_k_result": "._search_queries",
+    "ColumnRouter": "._column_router",
+    "match_queries_routed": "._column_router",
+    "RangeQueryIndex": "._range_queries",
+    "build_range_result": "._range_queries",
+    "QueryResultCache": "._query_result_cache",
+    "fingerprint_column_indexes": "._query_result_cache",
+    "cached_match_queries": "._query_result_cache",
+    "encode_row_ranges": "._row_id_encoding",
+    "decode_row_ranges": "._row_id_encoding",
+    "encode_row_bitmap": "._row_id_encoding",
+    "decode_row_bitmap": "._row_id_encoding",
+    "JsonLinesWriter": "._json_lines_writer",
+    "StartupProfiler": "._startup_profiler",
+    "generate_synthetic_shipments": "._generate_synthetic_shipments",
+    "write_synthetic_shipments": "._generate_synthetic_shipments",
+    "NumpyEncoder": "._numpy_encoder",
+    "convert_date_columns": "._convert_date_columns",
+    "detect_date_columns": "._convert_date_columns",
+    "cached_date_formats": "._convert_date_columns",
+}
 
 __all__ = [
     "process_user_input",
     "filter_data_by_cols",
+    "load_compact_dataset",
+    "frame_memory_mb",
     "get_column_type",
     "add_string_version_columns_with_column_name",
+    "QuantizedEmbeddings",
+    "evaluate_quantization",
+    "IVFIndex",
+    "evaluate_ann_recall",
+    "ColumnIndex",
+    "get_searchable_columns",
+    "build_column_indexes",
+    "pipeline_column_indexes",
+    "ColumnIndexBuilder",
+    "index_csv_chunks",
+    "stream_column_indexes",
+    "save_column_indexes",
+    "load_column_indexes",
+    "refresh_column_indexes",
+    "evaluate_inference_mode",
     "find_best_match",
     "get_overall_best_result",
+    "match_queries",
+    "build_query_result",
+    "match_queries_top_k",
+    "build_top_k_result",
+    "ColumnRouter",
+    "match_queries_routed",
+    "RangeQueryIndex",
+    "build_range_result",
+    "QueryResultCache",
+    "fingerprint_column_indexes",
+    "cached_match_queries",
+    "encode_row_ranges",
+    "decode_row_ranges",
+    "encode_row_bitmap",
+    "decode_row_bitmap",
+    "JsonLinesWriter",
+    "StartupProfiler",
+    "generate_synthetic_shipments",
+    "write_synthetic_shipments",
     "NumpyEncoder",
     "convert_date_columns",
-]
\ No newline at end of file
+    "detect_date_columns",
+    "cached_date_formats",
+]
+
+
+def __getattr__(name: str):
+    if name in _LAZY_EXPORTS:
+        value = getattr(importlib.import_module(_LAZY_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
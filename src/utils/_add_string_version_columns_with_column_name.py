@@ -1,62 +1,128 @@
+import numpy as np
 import pandas as pd
 from typing import Any
 import unittest
 
-def add_string_version_columns_with_column_name(df: pd.DataFrame) -> pd.DataFrame:
+
+__all__ = ["add_string_version_columns_with_column_name"]
+
+
+# dates are phrased "on July 5 2023"
+_DATE_FORMAT = "%B %-d %Y"
+
+
+def _clean_column_name(col_name: str) -> str:
     """
-    Adds new columns to the DataFrame for non-string columns.
-    Each new column contains string representations of the original values,
-    prefixed with the cleaned column name and the column name prefixed by 's_'.
+    Cleans a column name by replacing underscores, dashes, or slashes with spaces
+    and converting it to lowercase.
 
     Args:
-        df (pd.DataFrame): The input DataFrame.
+        col_name (str): The original column name.
 
     Returns:
-        pd.DataFrame: A DataFrame with new columns added for non-string columns.
+        str: The cleaned column name.
     """
-    def clean_column_name(col_name: str) -> str:
-        """
-        Cleans a column name by replacing underscores, dashes, or slashes with spaces
-        and converting it to lowercase.
+    return col_name.replace("_", " ").replace("-", " ").replace("/", " ").strip().lower()
 
-        Args:
-            col_name (str): The original column name.
 
-        Returns:
-            str: The cleaned column name.
-        """
-        return col_name.replace("_", " ").replace("-", " ").replace("/", " ").strip().lower()
+def _convert_value(value: Any, clean_name: str) -> str:
+    """
+    Converts a value to a string, prefixed by the cleaned column name.
+    Formats dates in 'Month Day Year' format.
 
-    def convert_value(value: Any, col_name: str) -> str:
-        """
-        Converts a value to a string, prefixed by the cleaned column name.
-        Formats dates in 'Month Day Year' format.
+    Args:
+        value (Any): The original value.
+        clean_name (str): The cleaned column name.
 
-        Args:
-            value (Any): The original value.
-            col_name (str): The column name.
+    Returns:
+        str: The converted value with the column name prefix.
+    """
+    if isinstance(value, pd.Timestamp):
+        # format dates as 'Month Day Year' (e.g., "July 8 2023" for single-digit days)
+        value = f"on {value.strftime(_DATE_FORMAT)}"
+    return f"{clean_name} {value}"
 
-        Returns:
-            str: The converted value with the column name prefix.
-        """
-        clean_name = clean_column_name(col_name)
-        if isinstance(value, pd.Timestamp):
-            # format dates as 'Month Day Year' (e.g., "July 8 2023" for single-digit days)
-            value = value.strftime("%B %-d %Y") if hasattr(value, "strftime") else value.strftime("%B %#d %Y")
-            value = f"on {value}"
-        return f"{clean_name} {value}"
 
+def _is_string_column(series: pd.Series) -> bool:
+    """
+    Tells whether a column already holds strings, so it needs no string version.
+
+    Args:
+        series (pd.Series): The column.
 
+    Returns:
+        bool: Whether the column is a string column.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # a categorical column is handled like the object column it replaces, which is not a string
+        # column if it has missing values
+        return pd.api.types.is_string_dtype(series.cat.categories) and not series.hasnans
+    return pd.api.types.is_string_dtype(series)
+
+
+def _string_version(series: pd.Series, col_name: str) -> pd.Categorical:
+    """
+    Converts a column to its string version, formatting each unique value once.
+
+    Args:
+        series (pd.Series): The original column.
+        col_name (str): The column name.
+
+    Returns:
+        pd.Categorical: The string versions, one per row.
+    """
+    clean_name = _clean_column_name(col_name)
+    codes, uniques = pd.factorize(series)
+    missing = codes < 0
+
+    if pd.api.types.is_datetime64_any_dtype(series):
+        formatted = (f"{clean_name} on " + pd.Index(uniques).strftime(_DATE_FORMAT)).to_numpy(dtype=object)
+    else:
+        # the uniques keep the column dtype, so `map` passes them as it would pass the rows; a missing value
+        # is appended if the column has some, as `map` passes nullable integers as floats then
+        unique_values = pd.Series(uniques)
+        if missing.any():
+            unique_values = unique_values.reindex(range(len(uniques) + 1))
+        formatted = unique_values.map(lambda value: _convert_value(value, clean_name)).to_numpy(dtype=object)
+        formatted = formatted[:len(uniques)]
+
+    # missing values are formatted per row, as None, NaN and NaT print differently
+    if missing.any():
+        missing_codes, missing_uniques = pd.factorize(
+            series[missing].map(lambda value: _convert_value(value, clean_name)).to_numpy(dtype=object)
+        )
+        codes = codes.copy()
+        codes[missing] = len(formatted) + missing_codes
+        formatted = np.concatenate([formatted, np.asarray(missing_uniques, dtype=object)])
+
+    # distinct values can share a string version, e.g. 1 and "1" in a mixed column
+    category_codes, categories = pd.factorize(formatted)
+    return pd.Categorical.from_codes(category_codes[codes], categories=categories)
+
+
+def add_string_version_columns_with_column_name(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Adds new columns to the DataFrame for non-string columns.
+    Each new column contains string representations of the original values,
+    prefixed with the cleaned column name and the column name prefixed by 's_'.
+
+    Only the unique values of a column are formatted, and the new columns are categorical, so their
+    memory and formatting time grow with the number of unique values rather than with the rows.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame.
+
+    Returns:
+        pd.DataFrame: A DataFrame with new categorical columns added for non-string columns.
+    """
     # create a copy of the DataFrame to add new columns
     df = df.copy()
 
     for col in df.columns:
         # check if the column is not already a string column
-        if not pd.api.types.is_string_dtype(df[col]):
-            # generate the new column name
-            new_col_name = f"s_{col}"
-            # add the new column with string-converted values
-            df[new_col_name] = df[col].map(lambda value: convert_value(value, col))
+        if not _is_string_column(df[col]):
+            # add the new column, named with the 's_' prefix, with string-converted values
+            df[f"s_{col}"] = _string_version(df[col], col)
 
     return df
 
@@ -101,13 +167,13 @@ class TestAddStringVersionColumnsWithColumnName(unittest.TestCase):
         self.assertEqual(converted_df["s_Numeric_Column"].iloc[2], "numeric column 3")
         
         # Date column checks (formatted in "Month Day Year")
-        self.assertEqual(converted_df["s_Date_Column"].iloc[0], "date column on January 01 2023")
-        self.assertEqual(converted_df["s_Date_Column"].iloc[1], "date column on January 02 2023")
-        self.assertEqual(converted_df["s_Date_Column"].iloc[2], "date column on January 03 2023")
+        self.assertEqual(converted_df["s_Date_Column"].iloc[0], "date column on January 1 2023")
+        self.assertEqual(converted_df["s_Date_Column"].iloc[1], "date column on January 2 2023")
+        self.assertEqual(converted_df["s_Date_Column"].iloc[2], "date column on January 3 2023")
         
         # Mixed column checks
         self.assertEqual(converted_df["s_Mixed_Column"].iloc[0], "mixed column 1")
-        self.assertEqual(converted_df["s_Mixed_Column"].iloc[2], "mixed column on January 01 2023")
+        self.assertEqual(converted_df["s_Mixed_Column"].iloc[2], "mixed column on January 1 2023")
 
     def test_original_columns_unchanged(self) -> None:
         """
@@ -134,5 +200,30 @@ class TestAddStringVersionColumnsWithColumnName(unittest.TestCase):
         """
         converted_df = add_string_version_columns_with_column_name(self.df)
         # Validate the formatted date strings
-        self.assertEqual(converted_df["s_Date_Column"].iloc[0], "date column on January 01 2023")
-        self.assertEqual(converted_df["s_Date_Column"].iloc[2], "date column on January 03 2023")
+        self.assertEqual(converted_df["s_Date_Column"].iloc[0], "date column on January 1 2023")
+        self.assertEqual(converted_df["s_Date_Column"].iloc[2], "date column on January 3 2023")
+
+    def test_categorical_unique_formatting(self) -> None:
+        """
+        Tests that the new columns are categorical, with one category per string and missing values kept.
+        """
+        df = pd.DataFrame({
+            "Delivery_distance": [100.0, None, 100.0, 250.5],
+            "Date_Column": pd.to_datetime(["2023-07-05", None, "2023-07-05", "2023-12-31"]),
+            "Mixed_Column": [1, "1", None, 2],
+        })
+        converted_df = add_string_version_columns_with_column_name(df)
+
+        self.assertIsInstance(converted_df["s_Delivery_distance"].dtype, pd.CategoricalDtype)
+        self.assertEqual(
+            converted_df["s_Delivery_distance"].tolist(),
+            ["delivery distance 100.0", "delivery distance nan", "delivery distance 100.0", "delivery distance 250.5"],
+        )
+        self.assertEqual(
+            converted_df["s_Date_Column"].tolist(),
+            ["date column on July 5 2023", "date column NaT", "date column on July 5 2023", "date column on December 31 2023"],
+        )
+        self.assertCountEqual(
+            converted_df["s_Mixed_Column"].cat.categories,
+            ["mixed column 1", "mixed column None", "mixed column 2"],
+        )
@@ -0,0 +1,581 @@
+import numpy as np
+import pandas as pd
+import tempfile
+import unittest
+
+from default_configs import (
+    ORIGINAL_FILENAME_KEY,
+    VALUE_KEY,
+    SCORE_KEY,
+)
+from typing import Any, Dict, List, Optional, Tuple
+from src.metrics import run_metrics
+from ._ivf_index import IVFIndex
+from ._quantized_embeddings import QuantizedEmbeddings
+
+
+__all__ = ["ColumnIndex", "get_searchable_columns", "build_column_indexes"]
+
+
+def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalizes the rows of a matrix, leaving all-zero rows untouched.
+
+    Args:
+        matrix (np.ndarray): A 1-D vector or a 2-D matrix with one vector per row.
+
+    Returns:
+        np.ndarray: A float32 array with unit-length rows.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def _spill_to_disk(matrix: np.ndarray) -> np.ndarray:
+    """
+    Moves a matrix to an anonymous temporary file mapped read-only in memory.
+
+    The pages of the mapping are only read when rows are accessed and can be evicted by the OS, so the
+    matrix stops counting against resident memory. The file is deleted when the mapping is released.
+
+    Args:
+        matrix (np.ndarray): The matrix to move.
+
+    Returns:
+        np.ndarray: The memory-mapped matrix, or the matrix itself if it is empty.
+    """
+    if matrix.size == 0:
+        return matrix
+    with tempfile.TemporaryFile() as f:
+        np.ascontiguousarray(matrix).tofile(f)
+        f.flush()
+        return np.memmap(f, dtype=matrix.dtype, mode="r", shape=matrix.shape)
+
+
+def _top_k_positions(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Finds the positions of the k highest scores of every row without sorting the whole rows.
+
+    The k best positions are selected with `np.argpartition` in linear time, then only those k are sorted.
+
+    Args:
+        scores (np.ndarray): The scores, one row per query.
+        k (int): The number of positions per row, capped at the row length.
+
+    Returns:
+        np.ndarray: The positions of shape (n_rows, k), sorted by decreasing score.
+    """
+    k = min(k, scores.shape[1])
+    if k == 1:
+        return np.argmax(scores, axis=1)[:, None]
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+
+class ColumnIndex:
+    """
+    Embeddings of the unique values of one searchable column.
+
+    The embeddings are stored as an L2-normalized float32 matrix, so the cosine similarity of a query
+    against every value of the column is a single matrix-vector product. The row positions of every
+    value are kept as an inverted index in compressed sparse row layout: the rows of the value at
+    position `i` are `row_positions[row_offsets[i]:row_offsets[i + 1]]`.
+
+    Attributes:
+        column (str): The column the values were taken from (the "s_" column if one exists).
+        original_column (str): The original column name.
+        values (np.ndarray): The unique values used for comparison.
+        original_values (np.ndarray): The original values, aligned with `values`.
+        embeddings (np.ndarray): The L2-normalized float32 embedding matrix, one row per value.
+        row_offsets (np.ndarray): The start of each value's rows in `row_positions`, plus the total count.
+        row_positions (np.ndarray): The row positions of all the values, grouped by value.
+        ann (Optional[IVFIndex]): The approximate nearest-neighbour index used instead of the exact
+            scan, if enabled.
+        quantized (Optional[QuantizedEmbeddings]): The compressed embeddings scanned instead of the
+            float32 matrix, if enabled.
+        rescore_k (int): The number of best compressed candidates rescored with the float32 embeddings.
+    """
+
+    def __init__(
+        self,
+        column: str,
+        original_column: str,
+        values: np.ndarray,
+        original_values: np.ndarray,
+        embeddings: np.ndarray,
+        row_offsets: Optional[np.ndarray] = None,
+        row_positions: Optional[np.ndarray] = None,
+    ):
+        """
+        Initializes the index from already embedded values.
+
+        Args:
+            column (str): The column the values were taken from.
+            original_column (str): The original column name.
+            values (np.ndarray): The unique values used for comparison.
+            original_values (np.ndarray): The original values, aligned with `values`.
+            embeddings (np.ndarray): The embedding matrix, one row per value.
+            row_offsets (np.ndarray, optional): The start of each value's rows in `row_positions`, plus the
+                total count. No rows are indexed if None (default is None).
+            row_positions (np.ndarray, optional): The row positions of all the values, grouped by value.
+
+        Raises:
+            ValueError: If the values, original values, embeddings and row offsets are not aligned.
+        """
+        if not len(values) == len(original_values) == len(embeddings):
+            raise ValueError(
+                f"values ({len(values)}), original values ({len(original_values)}) and "
+                f"embeddings ({len(embeddings)}) of column '{column}' must have the same length"
+            )
+        if row_offsets is None:
+            row_offsets = np.zeros(len(values) + 1, dtype=np.int64)
+            row_positions = np.empty(0, dtype=np.int32)
+        if len(row_offsets) != len(values) + 1:
+            raise ValueError(f"row offsets of column '{column}' must have one entry per value plus one")
+
+        self.column = column
+        self.original_column = original_column
+        self.values = np.asarray(values, dtype=object)
+        self.original_values = np.asarray(original_values, dtype=object)
+        self.embeddings = np.ascontiguousarray(_l2_normalize(embeddings))
+        self.row_offsets = np.asarray(row_offsets, dtype=np.int64)
+        self.row_positions = np.asarray(row_positions)
+        self._value_positions: Optional[Dict[Any, int]] = None
+        self._na_position: Optional[int] = None
+        self.ann: Optional[IVFIndex] = None
+        self.quantized: Optional[QuantizedEmbeddings] = None
+        self.rescore_k = 0
+
+    @staticmethod
+    def _group_rows(df: pd.DataFrame, column: str, original_column: str) -> Dict[str, np.ndarray]:
+        """
+        Finds the unique values of a column and the rows holding each of them.
+
+        Args:
+            df (pd.DataFrame): The DataFrame containing the data.
+            column (str): The column whose unique values are embedded.
+            original_column (str): The original column name (used if 's_' prefix is applied).
+
+        Returns:
+            Dict[str, np.ndarray]: The `values`, `original_values`, `row_offsets` and `row_positions` of the index.
+        """
+        # group the rows by original value in one pass; the "s_" string form is a function of the
+        # original value, so each code identifies a unique (string form, original value) pair
+        codes, _ = pd.factorize(df[original_column], use_na_sentinel=False)
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes, minlength=codes.max() + 1 if len(codes) else 0)
+        row_offsets = np.concatenate([[0], np.cumsum(counts)])
+
+        # codes follow the order of appearance, so the first row of each group keeps the `unique()` order
+        first_rows = order[row_offsets[:-1]]
+        values = df[column].to_numpy(dtype=object)[first_rows]
+        original_values = df[original_column].iloc[first_rows].to_numpy(dtype=object)
+
+        position_dtype = np.int32 if len(df) < np.iinfo(np.int32).max else np.int64
+        return {
+            "values": values,
+            "original_values": original_values,
+            "row_offsets": row_offsets,
+            "row_positions": order.astype(position_dtype),
+        }
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        column: str,
+        original_column: str,
+        textual_model: Any,
+    ) -> "ColumnIndex":
+        """
+        Builds the index of a column from the DataFrame produced by `add_string_version_columns_with_column_name`.
+
+        Args:
+            df (pd.DataFrame): The DataFrame containing the data.
+            column (str): The column whose unique values are embedded.
+            original_column (str): The original column name (used if 's_' prefix is applied).
+            textual_model (Any): The model used for embedding the textual values.
+
+        Returns:
+            ColumnIndex: The index of the column.
+        """
+        groups = cls._group_rows(df, column, original_column)
+        embeddings = textual_model.embed_texts([str(value).lower() for value in groups["values"]])
+        return cls(column, original_column, embeddings=embeddings, **groups)
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def rows_at(self, position: int) -> np.ndarray:
+        """
+        Looks up the row positions of the value at a given position of the index.
+
+        Args:
+            position (int): The position of the value in `values`.
+
+        Returns:
+            np.ndarray: The sorted row positions holding the value.
+        """
+        return self.row_positions[self.row_offsets[position]:self.row_offsets[position + 1]]
+
+    def rows_for_value(self, original_value: Any) -> np.ndarray:
+        """
+        Looks up the row positions holding an original value of the column.
+
+        Args:
+            original_value (Any): The original value, e.g. the VALUE_KEY of a best match.
+
+        Returns:
+            np.ndarray: The sorted row positions holding the value, empty if the value is not in the column.
+        """
+        if self._value_positions is None:
+            self._value_positions = {value: i for i, value in enumerate(self.original_values) if not pd.isna(value)}
+            self._na_position = next((i for i, value in enumerate(self.original_values) if pd.isna(value)), None)
+
+        position = self._na_position if pd.isna(original_value) else self._value_positions.get(original_value)
+        if position is None:
+            return self.row_positions[:0]
+        return self.rows_at(position)
+
+    def scores(self, embedded_query: np.ndarray) -> np.ndarray:
+        """
+        Computes the cosine similarity between a query embedding and every value of the column.
+
+        Args:
+            embedded_query (np.ndarray): The embedding vector of the query.
+
+        Returns:
+            np.ndarray: The similarity scores, aligned with `values`.
+        """
+        return self.embeddings @ _l2_normalize(embedded_query)
+
+    def enable_ann(self, **ivf_kwargs: Any) -> IVFIndex:
+        """
+        Builds an approximate nearest-neighbour index used by `best_match` instead of the exact scan.
+
+        Args:
+            **ivf_kwargs: The `IVFIndex` settings (n_lists, n_probe, ...).
+
+        Returns:
+            IVFIndex: The fitted ANN index.
+        """
+        self.ann = IVFIndex(**ivf_kwargs).fit(self.embeddings)
+        return self.ann
+
+    def quantize(self, dtype: str = "int8", rescore_k: int = 0, spill_float32: bool = True) -> QuantizedEmbeddings:
+        """
+        Scans a float16 or int8 copy of the embeddings in `best_match` instead of the float32 matrix.
+
+        Args:
+            dtype (str, optional): The storage type, "float16" or "int8" (default is "int8").
+            rescore_k (int, optional): The number of best compressed candidates rescored with the exact
+                float32 embeddings, 0 to keep the compressed scores (default is 0).
+            spill_float32 (bool, optional): Whether to move the float32 matrix to a memory-mapped temporary
+                file, so only the rescored rows are read back (default is True).
+
+        Returns:
+            QuantizedEmbeddings: The compressed embeddings.
+        """
+        self.quantized = QuantizedEmbeddings(dtype).fit(self.embeddings)
+        self.rescore_k = rescore_k
+        if spill_float32:
+            self.embeddings = _spill_to_disk(self.embeddings)
+        return self.quantized
+
+    def _match(self, best: int, score: float) -> dict:
+        """
+        Builds the best match dictionary for the value at position `best`.
+
+        Args:
+            best (int): The position of the best value.
+            score (float): The similarity score of the best value.
+
+        Returns:
+            dict: The best match dictionary, see `best_match`.
+        """
+        return {
+            ORIGINAL_FILENAME_KEY: self.original_column,
+            VALUE_KEY: self.original_values[best],
+            SCORE_KEY: score,
+            "value_used_for_comparison": self.values[best],
+        }
+
+    def best_match(self, embedded_query: np.ndarray) -> dict:
+        """
+        Finds the value of the column most similar to a query embedding.
+
+        Args:
+            embedded_query (np.ndarray): The embedding vector of the query.
+
+        Returns:
+            dict: The same dictionary as `find_best_match`, containing:
+                - ORIGINAL_FILENAME_KEY (str): The name of the original column.
+                - VALUE_KEY (Any): The best matching value.
+                - SCORE_KEY (float): The highest similarity score.
+                - "value_used_for_comparison" (Any): The value the query was compared with.
+        """
+        return self.best_matches(np.atleast_2d(embedded_query))[0]
+
+    def best_matches(self, embedded_queries: np.ndarray) -> List[dict]:
+        """
+        Finds the best value of the column for many queries at once.
+
+        Args:
+            embedded_queries (np.ndarray): The query embeddings, one row per query.
+
+        Returns:
+            List[dict]: One best match dictionary per query, see `best_match`.
+        """
+        if len(self) == 0:
+            return [{ORIGINAL_FILENAME_KEY: None, VALUE_KEY: None, SCORE_KEY: None} for _ in embedded_queries]
+        return [matches[0] for matches in self.top_matches(embedded_queries, k=1)]
+
+    def top_matches(self, embedded_queries: np.ndarray, k: int) -> List[List[dict]]:
+        """
+        Finds the k best values of the column for many queries at once.
+
+        All the queries are scored against all the values with a single (queries x values) matrix product,
+        or against the probed lists of the ANN index if one is enabled. With quantized embeddings, the
+        product runs on the compressed vectors and the best `max(rescore_k, k)` candidates of every query
+        are rescored with the float32 embeddings. The k best values are selected by partial selection
+        (`np.argpartition`), so they cost about the same as the best one.
+
+        Args:
+            embedded_queries (np.ndarray): The query embeddings, one row per query.
+            k (int): The number of values per query.
+
+        Returns:
+            List[List[dict]]: For every query, up to k match dictionaries (see `best_match`) sorted by
+                decreasing score; fewer if the column has fewer values or the ANN lists probed hold fewer.
+        """
+        if len(self) == 0:
+            return [[] for _ in embedded_queries]
+
+        run_metrics.increment("column_searches", len(embedded_queries))
+        if self.ann is not None:
+            scores, positions = self.ann.search(_l2_normalize(embedded_queries), k=k)
+            if np.all(positions[:, 0] >= 0):
+                run_metrics.increment("ann_searches", len(embedded_queries))
+                return [
+                    [self._match(int(p), s) for s, p in zip(query_scores, query_positions) if p >= 0]
+                    for query_scores, query_positions in zip(scores, positions)
+                ]
+            # a query only probed empty lists, fall back to the exact scan
+
+        embedded_queries = _l2_normalize(embedded_queries)
+        run_metrics.increment("values_scored", len(embedded_queries) * len(self))
+        if self.quantized is not None:
+            scores = self.quantized.scores(embedded_queries)
+            if self.rescore_k:
+                top = min(max(self.rescore_k, k), len(self))
+                run_metrics.increment("values_rescored", len(embedded_queries) * top)
+                # sorted candidates read the memory-mapped float32 rows in file order
+                candidates = np.sort(np.argpartition(-scores, top - 1, axis=1)[:, :top], axis=1)
+                matches = []
+                for embedded_query, query_candidates in zip(embedded_queries, candidates):
+                    exact_scores = self.embeddings[query_candidates] @ embedded_query
+                    best = _top_k_positions(exact_scores[None, :], k)[0]
+                    matches.append([self._match(int(query_candidates[b]), exact_scores[b]) for b in best])
+                return matches
+        else:
+            scores = embedded_queries @ self.embeddings.T
+        best = _top_k_positions(scores, k)
+        return [
+            [self._match(int(b), query_scores[b]) for b in query_best]
+            for query_scores, query_best in zip(scores, best)
+        ]
+
+
+def get_searchable_columns(df: pd.DataFrame) -> List[Tuple[str, str]]:
+    """
+    Lists the columns to search, preferring the "s_" string version of a column when it exists.
+
+    Args:
+        df (pd.DataFrame): The DataFrame produced by `add_string_version_columns_with_column_name`.
+
+    Returns:
+        List[Tuple[str, str]]: (column, original column) pairs, in DataFrame column order.
+    """
+    searchable_columns = []
+    for column in df.columns:
+        if column.startswith("s_"):  # for "s_" columns, use the original column name
+            original_column = column[2:]
+        elif f"s_{column}" in df.columns:  # skip original column if "s_" exists
+            continue
+        else:
+            original_column = column
+        searchable_columns.append((column, original_column))
+    return searchable_columns
+
+
+def build_column_indexes(
+    df: pd.DataFrame,
+    textual_model: Any,
+    ann_columns: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, ColumnIndex]:
+    """
+    Builds the index of every searchable column of a DataFrame.
+
+    The unique values of all the columns are embedded with a single `embed_texts` call, so a batched or
+    parallel model sees the whole workload at once.
+
+    Args:
+        df (pd.DataFrame): The DataFrame produced by `add_string_version_columns_with_column_name`.
+        textual_model (Any): The model used for embedding the textual values.
+        ann_columns (Dict[str, Dict[str, Any]], optional): The original columns searched with an approximate
+            nearest-neighbour index, mapped to their `IVFIndex` settings (default is None, exact search only).
+
+    Returns:
+        Dict[str, ColumnIndex]: The column indexes, keyed by original column name.
+    """
+    searchable_columns = get_searchable_columns(df)
+    groups = [ColumnIndex._group_rows(df, column, original_column) for column, original_column in searchable_columns]
+    embeddings = textual_model.embed_texts([
+        str(value).lower() for column_groups in groups for value in column_groups["values"]
+    ])
+
+    # split the embedding matrix back into one block per column
+    splits = np.cumsum([len(column_groups["values"]) for column_groups in groups])[:-1]
+    column_indexes = {
+        original_column: ColumnIndex(column, original_column, embeddings=column_embeddings, **column_groups)
+        for (column, original_column), column_groups, column_embeddings
+        in zip(searchable_columns, groups, np.split(embeddings, splits))
+    }
+
+    for original_column, ivf_kwargs in (ann_columns or {}).items():
+        column_indexes[original_column].enable_ann(**ivf_kwargs)
+    return column_indexes
+
+
+class TestColumnIndex(unittest.TestCase):
+    """
+    Unit tests for the ColumnIndex class and its helpers.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Sets up a DataFrame with an "s_" column and a fake embedding model.
+        """
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+
+        cls.df = pd.DataFrame({
+            "Carrier_name": ["UPS", "FedEx", "UPS", "DHL"],
+            "Days": [2, 5, 2, 3],
+            "s_Days": ["days 2", "days 5", "days 2", "days 3"],
+        })
+        cls.model = FakeTextEmbedding()
+
+    def test_searchable_columns(self) -> None:
+        """
+        tests that the "s_" column replaces its original column.
+        """
+        self.assertEqual(get_searchable_columns(self.df), [("Carrier_name", "Carrier_name"), ("s_Days", "Days")])
+
+    def test_values_are_aligned(self) -> None:
+        """
+        tests that unique values are mapped back to their original values.
+        """
+        index = ColumnIndex.from_dataframe(self.df, "s_Days", "Days", self.model)
+        self.assertEqual(list(index.values), ["days 2", "days 5", "days 3"])
+        self.assertEqual(list(index.original_values), [2, 5, 3])
+        np.testing.assert_allclose(np.linalg.norm(index.embeddings, axis=1), 1.0, rtol=1e-6)
+
+    def test_rows_for_value(self) -> None:
+        """
+        tests that the inverted index returns the same rows as a boolean mask scan.
+        """
+        index = ColumnIndex.from_dataframe(self.df, "Carrier_name", "Carrier_name", self.model)
+        for value in self.df["Carrier_name"].unique():
+            expected = np.flatnonzero(self.df["Carrier_name"] == value)
+            np.testing.assert_array_equal(index.rows_for_value(value), expected)
+        self.assertEqual(len(index.rows_for_value("Maersk")), 0)
+
+    def test_best_match_matches_loop(self) -> None:
+        """
+        tests that the vectorized best match agrees with a per-value cosine similarity loop.
+        """
+        indexes = build_column_indexes(self.df, self.model)
+        query = self.model.embed_text("ups")
+        best_match = indexes["Carrier_name"].best_match(query)
+
+        loop_scores = [
+            np.dot(query, self.model.embed_text(value.lower()))
+            / (np.linalg.norm(query) * np.linalg.norm(self.model.embed_text(value.lower())))
+            for value in indexes["Carrier_name"].values
+        ]
+        self.assertEqual(best_match[ORIGINAL_FILENAME_KEY], "Carrier_name")
+        self.assertEqual(best_match[VALUE_KEY], "UPS")
+        self.assertAlmostEqual(float(best_match[SCORE_KEY]), max(loop_scores), places=5)
+
+    def test_best_matches_agree_with_best_match(self) -> None:
+        """
+        tests that scoring many queries at once gives the same result as one query at a time.
+        """
+        index = ColumnIndex.from_dataframe(self.df, "Carrier_name", "Carrier_name", self.model)
+        queries = self.model.embed_texts(["ups", "fedex ground", "dhl express"])
+        batch_matches = index.best_matches(queries)
+
+        for query, batch_match in zip(queries, batch_matches):
+            single_match = index.best_match(query)
+            self.assertEqual(batch_match[VALUE_KEY], single_match[VALUE_KEY])
+            self.assertAlmostEqual(float(batch_match[SCORE_KEY]), float(single_match[SCORE_KEY]), places=5)
+
+    def test_ann_column_probing_every_list_is_exact(self) -> None:
+        """
+        tests that an ANN column searching all its lists returns the exact best match.
+        """
+        indexes = build_column_indexes(self.df, self.model, ann_columns={"Carrier_name": {"n_lists": 2, "n_probe": 2}})
+        self.assertIsNotNone(indexes["Carrier_name"].ann)
+        self.assertIsNone(indexes["Days"].ann)
+
+        query = self.model.embed_text("fedex")
+        exact = ColumnIndex.from_dataframe(self.df, "Carrier_name", "Carrier_name", self.model).best_match(query)
+        self.assertEqual(indexes["Carrier_name"].best_match(query)[VALUE_KEY], exact[VALUE_KEY])
+
+    def test_quantized_best_match(self) -> None:
+        """
+        tests that quantized columns keep the exact best match, with exact scores when rescored.
+        """
+        queries = self.model.embed_texts(["ups", "fedex ground", "dhl express"])
+        exact = ColumnIndex.from_dataframe(self.df, "Carrier_name", "Carrier_name", self.model).best_matches(queries)
+
+        for dtype in ("float16", "int8"):
+            index = ColumnIndex.from_dataframe(self.df, "Carrier_name", "Carrier_name", self.model)
+            index.quantize(dtype, rescore_k=2)
+            self.assertIsInstance(index.embeddings, np.memmap)
+            for match, expected in zip(index.best_matches(queries), exact):
+                self.assertEqual(match[VALUE_KEY], expected[VALUE_KEY])
+                self.assertAlmostEqual(float(match[SCORE_KEY]), float(expected[SCORE_KEY]), places=5)
+
+            index.rescore_k = 0
+            for match, expected in zip(index.best_matches(queries), exact):
+                self.assertEqual(match[VALUE_KEY], expected[VALUE_KEY])
+                self.assertAlmostEqual(float(match[SCORE_KEY]), float(expected[SCORE_KEY]), places=1)
+
+    def test_top_matches(self) -> None:
+        """
+        tests that the top k values are the k best of a full sort, exact, ANN and quantized.
+        """
+        df = pd.DataFrame({"Carrier_name": ["UPS", "FedEx", "DHL", "USPS", "Maersk", "UPS Freight"]})
+        queries = self.model.embed_texts(["ups", "fedex ground"])
+        index = ColumnIndex.from_dataframe(df, "Carrier_name", "Carrier_name", self.model)
+        all_scores = _l2_normalize(queries) @ index.embeddings.T
+
+        for query_scores, matches in zip(all_scores, index.top_matches(queries, k=3)):
+            expected = np.argsort(-query_scores, kind="stable")[:3]
+            self.assertEqual([match[VALUE_KEY] for match in matches], list(index.original_values[expected]))
+            np.testing.assert_allclose([match[SCORE_KEY] for match in matches], query_scores[expected], rtol=1e-6)
+        self.assertEqual([len(matches) for matches in index.top_matches(queries, k=10)], [6, 6])
+
+        exact = [[match[VALUE_KEY] for match in matches] for matches in index.top_matches(queries, k=3)]
+        index.enable_ann(n_lists=2, n_probe=2)
+        ann = [[match[VALUE_KEY] for match in matches] for matches in index.top_matches(queries, k=3)]
+        self.assertEqual(ann, exact)
+
+        index.ann = None
+        index.quantize("int8", rescore_k=1)
+        quantized = [[match[VALUE_KEY] for match in matches] for matches in index.top_matches(queries, k=3)]
+        self.assertEqual(quantized, exact)
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+import unittest
+
+from typing import Any, Dict, List
+from ._column_index import ColumnIndex
+
+
+__all__ = ["ColumnIndexBuilder"]
+
+# dictionary key standing in for missing values, which do not compare equal to themselves
+_NA_KEY = ("__missing__",)
+
+
+class ColumnIndexBuilder:
+    """
+    Builds a ColumnIndex incrementally, one chunk of rows at a time.
+
+    Only the unique values seen so far and the row positions of every value are kept, so a column can be
+    indexed without ever holding the full table in memory. New unique values are embedded as soon as a
+    chunk introduces them, so embedding overlaps with reading the rest of the data.
+
+    Attributes:
+        column (str): The column the values are taken from (the "s_" column if one exists).
+        original_column (str): The original column name.
+        textual_model (Any): The model used for embedding the textual values.
+    """
+
+    def __init__(self, column: str, original_column: str, textual_model: Any):
+        """
+        Initializes an empty builder.
+
+        Args:
+            column (str): The column the values are taken from.
+            original_column (str): The original column name.
+            textual_model (Any): The model used for embedding the textual values.
+        """
+        self.column = column
+        self.original_column = original_column
+        self.textual_model = textual_model
+        self._value_codes: Dict[Any, int] = {}
+        self._values: List[Any] = []
+        self._original_values: List[Any] = []
+        self._embeddings: List[np.ndarray] = []
+        self._row_codes: List[np.ndarray] = []
+        self._row_positions: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @classmethod
+    def from_column_index(cls, column_index: ColumnIndex, textual_model: Any) -> "ColumnIndexBuilder":
+        """
+        Creates a builder holding the values, embeddings and rows of an existing index, so it can be extended.
+
+        Args:
+            column_index (ColumnIndex): The index to extend.
+            textual_model (Any): The model used for embedding new values.
+
+        Returns:
+            ColumnIndexBuilder: The builder.
+        """
+        builder = cls(column_index.column, column_index.original_column, textual_model)
+        builder._values = list(column_index.values)
+        builder._original_values = list(column_index.original_values)
+        builder._value_codes = {
+            _NA_KEY if pd.isna(value) else value: code for code, value in enumerate(builder._original_values)
+        }
+        builder._embeddings = [column_index.embeddings]
+        counts = np.diff(column_index.row_offsets)
+        builder._row_codes = [np.repeat(np.arange(len(counts), dtype=np.int64), counts)]
+        builder._row_positions = [column_index.row_positions]
+        return builder
+
+    def add_chunk(self, values: pd.Series, original_values: pd.Series, row_positions: np.ndarray) -> int:
+        """
+        Adds a chunk of rows to the index, embedding the values it sees for the first time.
+
+        Args:
+            values (pd.Series): The values used for comparison of the chunk's rows.
+            original_values (pd.Series): The original values of the chunk's rows, aligned with `values`.
+            row_positions (np.ndarray): The row positions of the chunk's rows in the full dataset.
+
+        Returns:
+            int: The number of new unique values found in the chunk.
+        """
+        chunk_codes, chunk_uniques = pd.factorize(original_values, use_na_sentinel=False)
+        first_rows = np.unique(chunk_codes, return_index=True)[1]
+        chunk_values = values.to_numpy(dtype=object)[first_rows]
+
+        # translate the chunk's codes into codes of the whole column, registering new values
+        global_codes = np.empty(len(chunk_uniques), dtype=np.int64)
+        new_values = []
+        for i, (value, original_value) in enumerate(zip(chunk_values, original_values.iloc[first_rows])):
+            key = _NA_KEY if pd.isna(original_value) else original_value
+            code = self._value_codes.get(key)
+            if code is None:
+                code = self._value_codes[key] = len(self._values)
+                self._values.append(value)
+                self._original_values.append(original_value)
+                new_values.append(value)
+            global_codes[i] = code
+
+        if new_values:
+            self._embeddings.append(self.textual_model.embed_texts([str(value).lower() for value in new_values]))
+
+        self._row_codes.append(global_codes[chunk_codes])
+        self._row_positions.append(np.asarray(row_positions))
+        return len(new_values)
+
+    def build(self) -> ColumnIndex:
+        """
+        Builds the ColumnIndex of all the rows added so far.
+
+        Returns:
+            ColumnIndex: The index of the column.
+        """
+        row_codes = np.concatenate(self._row_codes) if self._row_codes else np.empty(0, dtype=np.int64)
+        row_positions = np.concatenate(self._row_positions) if self._row_positions else np.empty(0, dtype=np.int64)
+        order = np.argsort(row_codes, kind="stable")
+        row_offsets = np.concatenate([[0], np.cumsum(np.bincount(row_codes, minlength=len(self._values)))])
+        position_dtype = np.int32 if len(row_positions) == 0 or row_positions.max() < np.iinfo(np.int32).max else np.int64
+
+        embeddings = np.concatenate(self._embeddings) if self._embeddings else np.empty((0, 0), dtype=np.float32)
+        return ColumnIndex(
+            self.column,
+            self.original_column,
+            np.array(self._values, dtype=object),
+            np.array(self._original_values, dtype=object),
+            embeddings,
+            row_offsets=row_offsets,
+            row_positions=row_positions[order].astype(position_dtype),
+        )
+
+
+class TestColumnIndexBuilder(unittest.TestCase):
+    """
+    Unit tests for the ColumnIndexBuilder class.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Sets up a DataFrame with an "s_" column and a fake embedding model.
+        """
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+
+        cls.df = pd.DataFrame({
+            "Days": [2, 5, 2, 3, None, 5, 2],
+            "s_Days": ["days 2", "days 5", "days 2", "days 3", "days nan", "days 5", "days 2"],
+        })
+        cls.model = FakeTextEmbedding()
+
+    def test_chunked_build_matches_full_build(self) -> None:
+        """
+        tests that building chunk by chunk gives the same index as building from the full DataFrame.
+        """
+        builder = ColumnIndexBuilder("s_Days", "Days", self.model)
+        for start in range(0, len(self.df), 3):
+            chunk = self.df.iloc[start:start + 3]
+            builder.add_chunk(chunk["s_Days"], chunk["Days"], np.arange(start, start + len(chunk)))
+        chunked = builder.build()
+        full = ColumnIndex.from_dataframe(self.df, "s_Days", "Days", self.model)
+
+        self.assertEqual(list(chunked.values), list(full.values))
+        np.testing.assert_allclose(chunked.embeddings, full.embeddings)
+        np.testing.assert_array_equal(chunked.row_offsets, full.row_offsets)
+        np.testing.assert_array_equal(chunked.row_positions, full.row_positions)
+
+    def test_values_are_embedded_once(self) -> None:
+        """
+        tests that values repeated across chunks are only embedded the first time they are seen.
+        """
+        builder = ColumnIndexBuilder("s_Days", "Days", self.model)
+        self.assertEqual(builder.add_chunk(self.df["s_Days"][:2], self.df["Days"][:2], np.arange(2)), 2)
+        self.assertEqual(builder.add_chunk(self.df["s_Days"][2:4], self.df["Days"][2:4], np.arange(2, 4)), 1)
+        self.assertEqual(len(builder), 3)
+
+    def test_extend_existing_index(self) -> None:
+        """
+        tests that extending a built index with new rows gives the same index as building it at once.
+        """
+        builder = ColumnIndexBuilder("s_Days", "Days", self.model)
+        builder.add_chunk(self.df["s_Days"][:4], self.df["Days"][:4], np.arange(4))
+        extended = ColumnIndexBuilder.from_column_index(builder.build(), self.model)
+        n_embedded = len(self.model.embedded_texts)
+        extended.add_chunk(self.df["s_Days"][4:], self.df["Days"][4:], np.arange(4, len(self.df)))
+
+        # only "days nan" is new in the appended rows
+        self.assertEqual(len(self.model.embedded_texts) - n_embedded, 1)
+        full = ColumnIndex.from_dataframe(self.df, "s_Days", "Days", self.model)
+        refreshed = extended.build()
+        self.assertEqual(list(refreshed.values), list(full.values))
+        np.testing.assert_array_equal(refreshed.row_offsets, full.row_offsets)
+        np.testing.assert_array_equal(refreshed.row_positions, full.row_positions)
@@ -0,0 +1,112 @@
+import numpy as np
+import os
+import pathlib
+import pickle
+import tempfile
+import unittest
+
+from typing import Any, Dict, Tuple, Union
+from ._column_index import ColumnIndex
+
+
+__all__ = ["save_column_indexes", "load_column_indexes"]
+
+# attributes of a ColumnIndex that are persisted; derived state such as ANN indexes is rebuilt on load
+_PERSISTED_ATTRIBUTES = (
+    "column",
+    "original_column",
+    "values",
+    "original_values",
+    "embeddings",
+    "row_offsets",
+    "row_positions",
+)
+
+
+def save_column_indexes(
+    column_indexes: Dict[str, ColumnIndex],
+    index_path: Union[str, pathlib.Path],
+    manifest: Dict[str, Any],
+) -> None:
+    """
+    Persists column indexes and their manifest to a single file, atomically.
+
+    The file is written to a temporary path in the same directory and moved into place, so readers either
+    see the previous version or the new one, never a partially written index.
+
+    Args:
+        column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+        index_path (str or pathlib.Path): The file to write.
+        manifest (Dict[str, Any]): Metadata describing what the indexes were built from.
+    """
+    index_path = pathlib.Path(index_path)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    state = {
+        "manifest": manifest,
+        "columns": {
+            original_column: {attr: getattr(column_index, attr) for attr in _PERSISTED_ATTRIBUTES}
+            for original_column, column_index in column_indexes.items()
+        },
+    }
+
+    fd, tmp_path = tempfile.mkstemp(dir=index_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, index_path)
+    except Exception:
+        pathlib.Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def load_column_indexes(index_path: Union[str, pathlib.Path]) -> Tuple[Dict[str, ColumnIndex], Dict[str, Any]]:
+    """
+    Loads column indexes saved with `save_column_indexes`.
+
+    Args:
+        index_path (str or pathlib.Path): The file to read.
+
+    Returns:
+        Tuple[Dict[str, ColumnIndex], Dict[str, Any]]: The column indexes, keyed by original column name,
+            and their manifest.
+
+    Raises:
+        FileNotFoundError: If the file does not exist.
+    """
+    with open(index_path, "rb") as f:
+        state = pickle.load(f)
+
+    column_indexes = {
+        original_column: ColumnIndex(**attributes) for original_column, attributes in state["columns"].items()
+    }
+    return column_indexes, state["manifest"]
+
+
+class TestColumnIndexStore(unittest.TestCase):
+    """
+    Unit tests for the save_column_indexes and load_column_indexes functions.
+    """
+
+    def test_round_trip(self) -> None:
+        """
+        tests that saved indexes and manifest are loaded back unchanged.
+        """
+        column_index = ColumnIndex(
+            column="Carrier_name",
+            original_column="Carrier_name",
+            values=np.array(["UPS", "DHL"], dtype=object),
+            original_values=np.array(["UPS", "DHL"], dtype=object),
+            embeddings=np.eye(2, dtype=np.float32),
+            row_offsets=np.array([0, 2, 3]),
+            row_positions=np.array([0, 2, 1], dtype=np.int32),
+        )
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index_path = pathlib.Path(tmp_dir) / "indexes.pkl"
+            save_column_indexes({"Carrier_name": column_index}, index_path, manifest={"n_rows": 3})
+            loaded, manifest = load_column_indexes(index_path)
+            self.assertEqual(sorted(p.name for p in pathlib.Path(tmp_dir).iterdir()), ["indexes.pkl"])
+
+        self.assertEqual(manifest, {"n_rows": 3})
+        self.assertEqual(list(loaded["Carrier_name"].values), ["UPS", "DHL"])
+        np.testing.assert_array_equal(loaded["Carrier_name"].rows_for_value("UPS"), [0, 2])
@@ -0,0 +1,213 @@
+import numpy as np
+import re
+import unittest
+
+from typing import Any, Dict, List, Optional, Set
+from src.metrics import run_metrics
+from ._add_string_version_columns_with_column_name import _clean_column_name
+from ._column_index import ColumnIndex, _l2_normalize
+
+
+__all__ = ["ColumnRouter", "match_queries_routed"]
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _tokens(text: str) -> Set[str]:
+    """
+    Splits a text into its set of lowercase word tokens.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        Set[str]: The tokens.
+    """
+    return set(_TOKEN_PATTERN.findall(str(text).lower()))
+
+
+class ColumnRouter:
+    """
+    Picks the few columns worth scoring for a query, from signals much cheaper than a column scan.
+
+    Every column is ranked by the share of the query words found in its vocabulary (the words of its
+    cleaned name and of its values), plus `name_weight` times the cosine similarity between the query and
+    the embedding of its cleaned name. Only the `top_n` best columns are then scored. When no query word
+    is known to any column beyond `fallback_overlap`, the cheap signals are not trusted and every column is
+    scored, as without routing.
+
+    Attributes:
+        columns (List[str]): The original column names, in the order of the column indexes.
+        name_embeddings (np.ndarray): The L2-normalized embeddings of the cleaned column names.
+        vocabularies (List[Set[str]]): The words of every column.
+        top_n (int): The number of columns scored per query.
+        name_weight (float): The weight of the column name similarity in the routing score.
+        fallback_overlap (float): The largest best word overlap for which every column is scored.
+    """
+
+    def __init__(
+        self,
+        column_indexes: Dict[str, ColumnIndex],
+        textual_model: Any,
+        top_n: int = 3,
+        name_weight: float = 0.5,
+        fallback_overlap: float = 0.0,
+        max_vocabulary_values: int = 100_000,
+    ):
+        """
+        Embeds the cleaned column names and collects the vocabulary of every column.
+
+        Args:
+            column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+            textual_model (Any): The model used for embedding the column names.
+            top_n (int, optional): The number of columns scored per query (default is 3).
+            name_weight (float, optional): The weight of the column name similarity (default is 0.5).
+            fallback_overlap (float, optional): Every column is scored when the best share of query words
+                found in a column vocabulary is at most this value (default is 0.0, i.e. when no query word
+                is known).
+            max_vocabulary_values (int, optional): Columns with more unique values only contribute the words
+                of their name, which keeps the vocabularies of identifier columns small (default is 100,000).
+
+        Raises:
+            ValueError: If `top_n` is not a positive integer.
+        """
+        if top_n <= 0:
+            raise ValueError(f"top_n must be a positive integer, got {top_n}")
+
+        self.columns = list(column_indexes)
+        self.top_n = top_n
+        self.name_weight = name_weight
+        self.fallback_overlap = fallback_overlap
+        clean_names = [_clean_column_name(column) for column in self.columns]
+        self.name_embeddings = _l2_normalize(textual_model.embed_texts(clean_names))
+        self.vocabularies = []
+        for clean_name, column_index in zip(clean_names, column_indexes.values()):
+            vocabulary = _tokens(clean_name)
+            if len(column_index) <= max_vocabulary_values:
+                for value in column_index.values:
+                    vocabulary |= _tokens(value)
+            self.vocabularies.append(vocabulary)
+
+    def route(self, query: str, embedded_query: np.ndarray) -> List[str]:
+        """
+        Picks the columns to score for a query.
+
+        Args:
+            query (str): The query.
+            embedded_query (np.ndarray): The embedding of the query.
+
+        Returns:
+            List[str]: The original names of the `top_n` best columns, best first, or of every column (in
+                index order) if the query shares no known word with any column.
+        """
+        query_tokens = _tokens(query)
+        overlaps = np.array([
+            len(query_tokens & vocabulary) / len(query_tokens) if query_tokens else 0.0
+            for vocabulary in self.vocabularies
+        ])
+        if len(self.columns) <= self.top_n or overlaps.max(initial=0.0) <= self.fallback_overlap:
+            run_metrics.increment("route_fallbacks")
+            return list(self.columns)
+
+        scores = overlaps + self.name_weight * (self.name_embeddings @ _l2_normalize(embedded_query))
+        best = np.argsort(-scores, kind="stable")[:self.top_n]
+        run_metrics.increment("columns_routed", len(best))
+        return [self.columns[i] for i in best]
+
+
+def match_queries_routed(
+    queries: List[str],
+    embedded_queries: np.ndarray,
+    column_indexes: Dict[str, ColumnIndex],
+    router: ColumnRouter,
+    top_k: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Finds the best (or the top k) values of the columns routed to every query.
+
+    The queries routed to the same column are scored together, with one (queries x values) matrix product.
+
+    Args:
+        queries (List[str]): The queries.
+        embedded_queries (np.ndarray): The query embeddings, one row per query.
+        column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+        router (ColumnRouter): The router built on `column_indexes`.
+        top_k (int, optional): The number of matches per column, None for the best match only (default is
+            None).
+
+    Returns:
+        List[Dict[str, Any]]: For every query, the best match (or the `top_k` best matches) of each of its
+            routed columns, keyed by original column name in index order.
+    """
+    routes = [set(router.route(q, embedded_query)) for q, embedded_query in zip(queries, embedded_queries)]
+    results: List[Dict[str, Any]] = [{} for _ in queries]
+    for original_column, column_index in column_indexes.items():
+        routed = [i for i, route in enumerate(routes) if original_column in route]
+        if not routed:
+            continue
+        if top_k:
+            matches = column_index.top_matches(embedded_queries[routed], top_k)
+        else:
+            matches = column_index.best_matches(embedded_queries[routed])
+        for i, match in zip(routed, matches):
+            results[i][original_column] = match
+    return results
+
+
+class TestColumnRouter(unittest.TestCase):
+    """
+    Unit tests for the ColumnRouter class and match_queries_routed.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Builds the column indexes of a small shipment table with a fake embedding model.
+        """
+        import pandas as pd
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+        from ._add_string_version_columns_with_column_name import add_string_version_columns_with_column_name
+        from ._column_index import build_column_indexes
+
+        cls.model = FakeTextEmbedding()
+        df = add_string_version_columns_with_column_name(pd.DataFrame({
+            "Priority": ["High", "Low", "Medium", "High"],
+            "Carrier_name": ["UPS", "DHL", "FedEx", "UPS"],
+            "Product_Category": ["Apparel", "Toys", "Electronics", "Apparel"],
+            "Days_from_shipment_to_delivery": [2, 5, 3, 2],
+        }))
+        cls.column_indexes = build_column_indexes(df, cls.model)
+
+    def test_routes_to_the_targeted_column(self) -> None:
+        """
+        tests that a query naming a value or a column is routed to that column first.
+        """
+        router = ColumnRouter(self.column_indexes, self.model, top_n=2)
+        for query, column in (("UPS", "Carrier_name"), ("apparel products", "Product_Category"),
+                              ("maximum days from shipment to delivery", "Days_from_shipment_to_delivery")):
+            route = router.route(query, self.model.embed_text(query.lower()))
+            self.assertEqual(len(route), 2)
+            self.assertEqual(route[0], column)
+
+    def test_fallback_to_every_column(self) -> None:
+        """
+        tests that a query sharing no word with any column is scored against every column.
+        """
+        router = ColumnRouter(self.column_indexes, self.model, top_n=1)
+        self.assertEqual(router.route("zzz", self.model.embed_text("zzz")), list(self.column_indexes))
+
+    def test_routed_matches_agree_with_exhaustive(self) -> None:
+        """
+        tests that routed queries get the same matches as the exhaustive scan on their routed columns.
+        """
+        from ._search_queries import match_queries
+
+        router = ColumnRouter(self.column_indexes, self.model, top_n=1)
+        queries = ["UPS", "apparel products", "zzz"]
+        embedded_queries = self.model.embed_texts([q.lower() for q in queries])
+        routed = match_queries_routed(queries, embedded_queries, self.column_indexes, router)
+        exhaustive = match_queries(embedded_queries, self.column_indexes)
+
+        self.assertEqual([list(col_res) for col_res in routed[:2]], [["Carrier_name"], ["Product_Category"]])
+        self.assertEqual(routed[2], exhaustive[2])
+        self.assertEqual(routed[0]["Carrier_name"], exhaustive[0]["Carrier_name"])
@@ -1,38 +1,178 @@
+import json
+import numpy as np
 import pandas as pd
+import pathlib
 import logging 
+import tempfile
 import unittest
 
-__all__ = ["convert_date_columns"]
+from pandas.tseries.api import guess_datetime_format
+from typing import Dict, Optional, Union
+
+__all__ = ["convert_date_columns", "detect_date_columns", "cached_date_formats"]
 
 logger = logging.getLogger(__name__)
 
-def convert_date_columns(df: pd.DataFrame) -> pd.DataFrame:
+# the format of date columns whose values have no single format, parsed value by value
+MIXED_FORMAT = "mixed"
+
+
+def _detect_date_format(series: pd.Series, sample_size: Optional[int]) -> Optional[str]:
     """
-    Converts columns in a DataFrame that seem to contain date-like values into datetime type.
+    Finds the format `pd.to_datetime` would parse a column with, if any of its values is a date.
+
+    Like `pd.to_datetime`, the format is guessed from the first non-missing string. If no format can be
+    guessed, the values are parsed one by one, on an evenly spaced sample of the column only.
 
     Args:
-        df (pd.DataFrame): The input DataFrame.
+        series (pd.Series): An object or string column.
+        sample_size (int, optional): The number of values probed when no format can be guessed. The whole
+            column is probed if None.
 
     Returns:
-        pd.DataFrame: A DataFrame with date-like columns converted to datetime type.
+        Optional[str]: The `strptime` format, `MIXED_FORMAT`, or None if the column holds no date.
     """
-    df = df.copy()  # avoid modifying the original DataFrame
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        # the first value in row order guesses the format, the categories are the values to probe
+        codes = series.cat.codes.to_numpy()
+        present = codes[codes >= 0]
+        if len(present) == 0:
+            return None
+        first = series.cat.categories[present[0]]
+        values = series.cat.categories.to_numpy(dtype=object)
+    else:
+        values = series.dropna().to_numpy(dtype=object)
+        if len(values) == 0:
+            return None
+        first = values[0]
+    if isinstance(first, str):
+        date_format = guess_datetime_format(first)
+        if date_format is not None:
+            return date_format
+
+    if sample_size is not None and len(values) > sample_size:
+        values = values[np.linspace(0, len(values) - 1, sample_size).astype(np.int64)]
+    parsed = pd.to_datetime(pd.Series(values), errors="coerce", format=MIXED_FORMAT)
+    return None if parsed.isna().all() else MIXED_FORMAT
+
 
+def detect_date_columns(df: pd.DataFrame, sample_size: Optional[int] = 1000) -> Dict[str, str]:
+    """
+    Finds the date columns of a DataFrame and the format of each of them.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame.
+        sample_size (int, optional): The number of values probed in columns without a recognizable format,
+            e.g. "Carrier_name"; the whole column is probed if None (default is 1000).
+
+    Returns:
+        Dict[str, str]: The date columns, mapped to their `strptime` format or `MIXED_FORMAT`.
+    """
+    date_formats = {}
     for col in df.columns:
-        # check if a column is object or string-like and contains date-like values
+        # string categoricals are also string dtypes
         if pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col]):
             try:
-                # attempt to convert column to datetime
-                converted_col = pd.to_datetime(df[col], errors="coerce")
-                # only update column if it contains valid dates (at least one non-NaT value)
-                if not converted_col.isna().all():
-                    df[col] = converted_col
-                    logger.info(f"Converted column '{col}' to datetime.")
+                date_format = _detect_date_format(df[col], sample_size)
             except Exception as e:
                 logger.info(f"Could not convert column '{col}' to datetime: {e}")
+                continue
+            if date_format is not None:
+                date_formats[col] = date_format
+    return date_formats
+
+
+def convert_date_columns(
+    df: pd.DataFrame,
+    date_formats: Optional[Dict[str, str]] = None,
+    sample_size: Optional[int] = 1000,
+) -> pd.DataFrame:
+    """
+    Converts columns in a DataFrame that seem to contain date-like values into datetime type.
+
+    The date columns and their formats are detected first (see `detect_date_columns`), then every date
+    column is parsed in full with its single format. Values that do not match the format become NaT.
+
+    Args:
+        df (pd.DataFrame): The input DataFrame.
+        date_formats (Dict[str, str], optional): The date columns and their formats, e.g. from
+            `cached_date_formats`; detection is skipped if given (default is None).
+        sample_size (int, optional): See `detect_date_columns` (default is 1000).
+
+    Returns:
+        pd.DataFrame: A DataFrame with date-like columns converted to datetime type.
+    """
+    df = df.copy()  # avoid modifying the original DataFrame
+    if date_formats is None:
+        date_formats = detect_date_columns(df, sample_size=sample_size)
+
+    for col, date_format in date_formats.items():
+        if col not in df.columns:
+            continue
+        try:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                # parse every category once
+                categories = pd.to_datetime(df[col].cat.categories, errors="coerce", format=date_format)
+                converted_col = pd.Series(
+                    categories.take(df[col].cat.codes.to_numpy(), allow_fill=True, fill_value=pd.NaT),
+                    index=df.index,
+                    name=col,
+                )
+            else:
+                converted_col = pd.to_datetime(df[col], errors="coerce", format=date_format)
+            # only update column if it contains valid dates (at least one non-NaT value)
+            if not converted_col.isna().all():
+                df[col] = converted_col
+                logger.info(f"Converted column '{col}' to datetime.")
+        except Exception as e:
+            logger.info(f"Could not convert column '{col}' to datetime: {e}")
     return df
 
 
+def cached_date_formats(
+    df: pd.DataFrame,
+    data_path: Union[str, pathlib.Path],
+    cache_path: Union[str, pathlib.Path],
+    sample_size: Optional[int] = 1000,
+) -> Dict[str, str]:
+    """
+    Returns the date formats of a dataset, detecting them only if the dataset changed since the last run.
+
+    The formats are cached in a JSON file, keyed by the dataset path, size, modification time and the
+    columns of the DataFrame.
+
+    Args:
+        df (pd.DataFrame): The DataFrame read from the dataset.
+        data_path (str or pathlib.Path): The CSV dataset.
+        cache_path (str or pathlib.Path): The JSON file caching the formats.
+        sample_size (int, optional): See `detect_date_columns` (default is 1000).
+
+    Returns:
+        Dict[str, str]: The date columns, mapped to their format.
+    """
+    data_path, cache_path = pathlib.Path(data_path), pathlib.Path(cache_path)
+    stat = data_path.stat()
+    key = f"{data_path.resolve()}|{stat.st_size}|{stat.st_mtime_ns}|{','.join(map(str, df.columns))}"
+
+    cache = {}
+    if cache_path.exists():
+        try:
+            cache = json.loads(cache_path.read_text())
+        except ValueError:
+            logger.warning(f"ignoring the unreadable date format cache {cache_path}")
+    if key in cache:
+        logger.info(f"date columns of {data_path} loaded from {cache_path}")
+        return cache[key]
+
+    date_formats = detect_date_columns(df, sample_size=sample_size)
+    # only the latest schema of every dataset is kept
+    cache = {k: v for k, v in cache.items() if not k.startswith(f"{data_path.resolve()}|")}
+    cache[key] = date_formats
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    cache_path.write_text(json.dumps(cache, indent=4))
+    return date_formats
+
+
 
 class TestConvertDateColumns(unittest.TestCase):
     """
@@ -94,3 +234,25 @@ class TestConvertDateColumns(unittest.TestCase):
         # Assert that non-date columns are identical to the original
         pd.testing.assert_series_equal(df_cleaned["Order_ID"], self.df["Order_ID"])
         pd.testing.assert_series_equal(df_cleaned["Invalid_Date_Column"], self.df["Invalid_Date_Column"])
+
+    def test_detected_formats(self) -> None:
+        """
+        Tests that date columns get the format of their first value and text columns are skipped.
+        """
+        date_formats = detect_date_columns(self.df, sample_size=2)
+        self.assertEqual(date_formats, {"Estimated_Arrival_Date": "%Y-%m-%d", "Order_date": "%Y/%m/%d"})
+
+    def test_cached_date_formats(self) -> None:
+        """
+        Tests that the date formats of an unchanged dataset are read from the cache.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_path = pathlib.Path(tmp_dir) / "data.csv"
+            cache_path = pathlib.Path(tmp_dir) / "date_formats.json"
+            self.df.to_csv(data_path, index=False)
+
+            date_formats = cached_date_formats(self.df, data_path, cache_path)
+            with self.assertLogs(logger, level="INFO") as logs:
+                self.assertEqual(cached_date_formats(self.df, data_path, cache_path), date_formats)
+            self.assertTrue(any("loaded from" in line for line in logs.output))
+            self.assertIn("Order_date", date_formats)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+import time
+import unittest
+
+from default_configs import ORIGINAL_FILENAME_KEY, VALUE_KEY
+from typing import Any, Dict, List, Optional, Tuple
+from ._column_index import build_column_indexes
+from ._get_overall_best_result import get_overall_best_result
+from ._search_queries import match_queries
+
+
+__all__ = ["evaluate_inference_mode"]
+
+
+def _best_pick(col_res: Dict[str, dict]) -> Optional[Tuple[Any, Any]]:
+    """
+    Returns the (column, value) pair of the overall best result of a query, or None if no column matched.
+    """
+    overall_best_result = get_overall_best_result(col_res)
+    if not overall_best_result:
+        return None
+    return overall_best_result[ORIGINAL_FILENAME_KEY], overall_best_result[VALUE_KEY]
+
+
+def evaluate_inference_mode(
+    reference_model: Any,
+    candidate_model: Any,
+    df: pd.DataFrame,
+    queries: List[str],
+) -> Dict[str, float]:
+    """
+    Compares the embeddings and best matches of a candidate inference mode with a reference model.
+
+    Both models embed the unique values of every searchable column of the DataFrame and the queries. The
+    report tells how close the candidate embeddings are (cosine similarity with the reference embedding of
+    the same text) and how often the candidate picks the same best value per column and overall, so a
+    faster inference mode can be accepted knowingly. The models should not use an embedding cache, or the
+    timings only measure cache lookups.
+
+    Args:
+        reference_model (Any): The reference model, e.g. the fp32 DistilBERT model.
+        candidate_model (Any): The model to evaluate, e.g. the int8 or bf16 DistilBERT model.
+        df (pd.DataFrame): The DataFrame produced by `add_string_version_columns_with_column_name`.
+        queries (List[str]): The user queries.
+
+    Returns:
+        Dict[str, float]: The number of embedded values, the mean and minimum cosine similarity between
+            the candidate and reference value embeddings, the fraction of (query, column) pairs and of
+            queries whose best value agrees, and the embedding time of both models in seconds.
+    """
+    indexes, embedded_queries, seconds = [], [], []
+    for model in (reference_model, candidate_model):
+        start = time.perf_counter()
+        indexes.append(build_column_indexes(df, model))
+        embedded_queries.append(model.embed_texts([query.lower() for query in queries]))
+        seconds.append(time.perf_counter() - start)
+    reference_indexes, candidate_indexes = indexes
+
+    # embeddings are L2-normalized by the column indexes, so the row-wise dot product is the cosine
+    cosines = np.concatenate([
+        np.einsum("ij,ij->i", reference_indexes[col].embeddings, candidate_indexes[col].embeddings)
+        for col in reference_indexes
+    ]) if reference_indexes else np.ones(0)
+
+    reference_matches = match_queries(embedded_queries[0], reference_indexes)
+    candidate_matches = match_queries(embedded_queries[1], candidate_indexes)
+    column_agreement = [
+        reference_col_res[col][VALUE_KEY] == candidate_col_res[col][VALUE_KEY]
+        for reference_col_res, candidate_col_res in zip(reference_matches, candidate_matches)
+        for col in reference_col_res
+    ]
+    overall_agreement = [
+        _best_pick(reference_col_res) == _best_pick(candidate_col_res)
+        for reference_col_res, candidate_col_res in zip(reference_matches, candidate_matches)
+    ]
+
+    return {
+        "n_values": int(len(cosines)),
+        "mean_cosine": float(cosines.mean()) if len(cosines) else 1.0,
+        "min_cosine": float(cosines.min()) if len(cosines) else 1.0,
+        "column_best_match_agreement": float(np.mean(column_agreement)) if column_agreement else 1.0,
+        "overall_best_match_agreement": float(np.mean(overall_agreement)) if overall_agreement else 1.0,
+        "reference_seconds": seconds[0],
+        "candidate_seconds": seconds[1],
+    }
+
+
+class TestEvaluateInferenceMode(unittest.TestCase):
+    """
+    Unit tests for the evaluate_inference_mode function.
+    """
+
+    def test_identical_models_agree(self) -> None:
+        """
+        tests that a model compared with an identical model agrees everywhere.
+        """
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+
+        df = pd.DataFrame({"Carrier_name": ["UPS", "DHL", "UPS"], "Priority": ["High", "Low", "Low"]})
+        report = evaluate_inference_mode(FakeTextEmbedding(), FakeTextEmbedding(), df, ["UPS", "low priority"])
+
+        self.assertEqual(report["n_values"], 4)
+        self.assertAlmostEqual(report["min_cosine"], 1.0, places=5)
+        self.assertEqual(report["column_best_match_agreement"], 1.0)
+        self.assertEqual(report["overall_best_match_agreement"], 1.0)
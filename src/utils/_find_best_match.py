@@ -14,6 +14,7 @@ from default_configs import (
     SCORE_KEY,
 )
 from typing import List, Tuple, Any
+from ._column_index import ColumnIndex
 
 
 __all__ = ["find_best_match"]
@@ -29,6 +30,9 @@ def find_best_match(
     """
     Finds the best match from a list of unique column values by calculating cosine similarity with a query embedding.
 
+    The values are embedded in a single batch and scored at once. When the same column is searched for many
+    queries, build a `ColumnIndex` once instead.
+
     Args:
         unique_col_values (List[Any]): A list of unique values from a column.
         embedded_query (np.ndarray): The embedding vector of the query.
@@ -42,41 +46,25 @@ def find_best_match(
             - ORIGINAL_FILENAME_KEY (str): The name of the original column.
             - VALUE_KEY (Any): The best matching value.
             - SCORE_KEY (float): The highest similarity score.
+            - "value_used_for_comparison" (Any): The value the query was compared with.
     """
-    best_score = -1
-    best_match = {
-        ORIGINAL_FILENAME_KEY: None,
-        VALUE_KEY: None,
-        SCORE_KEY: None
-    }
-
-    for value in unique_col_values:
-        # embed the column value
-        embedded_value = textual_model.embed_text(value.lower())
-
-        # compute cosine similarity between query and column value embeddings
-        similarity_score = np.dot(embedded_query, embedded_value) / (
-            np.linalg.norm(embedded_query) * np.linalg.norm(embedded_value)
-        )
+    # map every unique value back to the original value of its first occurrence
+    if column.startswith("s_"):
+        first_rows = df.drop_duplicates(subset=column)
+        lookup = dict(zip(first_rows[column], first_rows[original_column]))
+        original_values = [lookup[value] for value in unique_col_values]
+    else:
+        original_values = list(unique_col_values)
 
-        # map back to the original value if using an "s_" column
-        if column.startswith("s_"):
-            original_value = df[original_column][df[column] == value].iloc[0]
-        else:
-            original_value = value
-
-        # track the best match
-        if similarity_score > best_score:
-            best_score = similarity_score
-            # update the dictionary with new values
-            best_match.update({
-                ORIGINAL_FILENAME_KEY: original_column,
-                VALUE_KEY: original_value,
-                SCORE_KEY: best_score, 
-                "value_used_for_comparison": value # TODO: ignore or delete. More for logging
-            })
-
-    return best_match
+    # embed all the column values in one batch and score them with a single matrix-vector product
+    column_index = ColumnIndex(
+        column=column,
+        original_column=original_column,
+        values=unique_col_values,
+        original_values=original_values,
+        embeddings=textual_model.embed_texts([str(value).lower() for value in unique_col_values]),
+    )
+    return column_index.best_match(embedded_query)
 
 
 class TestFindBestMatch(unittest.TestCase):
@@ -84,4 +72,23 @@ class TestFindBestMatch(unittest.TestCase):
     Unit tests for the find_best_match function.
     """
 
-    pass
\ No newline at end of file
+    def test_maps_back_to_original_value(self) -> None:
+        """
+        tests that the best "s_" value is mapped back to its original value.
+        """
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+
+        model = FakeTextEmbedding()
+        df = pd.DataFrame({"Days": [2, 5, 2], "s_Days": ["days 2", "days 5", "days 2"]})
+        best_match = find_best_match(
+            unique_col_values=df["s_Days"].unique(),
+            embedded_query=model.embed_text("days 5"),
+            column="s_Days",
+            df=df,
+            original_column="Days",
+            textual_model=model,
+        )
+        self.assertEqual(best_match[ORIGINAL_FILENAME_KEY], "Days")
+        self.assertEqual(best_match[VALUE_KEY], 5)
+        self.assertEqual(best_match["value_used_for_comparison"], "days 5")
+        self.assertAlmostEqual(float(best_match[SCORE_KEY]), 1.0, places=5)
\ No newline at end of file
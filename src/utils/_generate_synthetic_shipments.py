@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+import pathlib
+import tempfile
+import unittest
+
+from typing import Dict, List, Optional, Union
+
+
+__all__ = ["generate_synthetic_shipments", "write_synthetic_shipments"]
+
+# the values of the real dataset, extended with numbered values when a larger cardinality is requested
+_VALUE_POOLS: Dict[str, List[str]] = {
+    "Product_Category": ["Apparel", "Cosmetics & Personal Care", "Groceries", "Toys & Games", "Electronics"],
+    "Mode_Of_Transport": ["Less Than Truckload", "Full Truckload", "Air Freight", "Intermodal & Rail Shipments"],
+    "Priority": ["Low", "Medium", "High"],
+    "Carrier_name": [
+        "UPS", "FedEx", "Landstar", "R+L Carriers", "BlueWater Shipping", "Averitt Express",
+        "GlobalConnect Freight", "Estes Express", "DHL", "Maersk",
+    ],
+    "Warehouse": ["BetaDepot", "SthDock", "RapidBase", "EastHub", "NWHouse", "AlphaSite", "MainStrg"],
+    "Supplier_Name": [
+        "Supp-Z", "GenEquip", "PureTech", "BriteSol", "PlastiQ", "BioFibre", "DynaGear", "LuxTextile",
+        "SuppX", "GreenFarm", "ClearChem",
+    ],
+    "Customer_Name": [
+        "ElecHouse", "MobileMax", "AeroTechs", "ElegantEyes", "Cust-040", "GigaMarts", "ShoeShack",
+        "GourmetGal", "TechTrend", "GardenGlow", "ComfortCasa",
+    ],
+    "Status": ["Order received today", "Preparing for Shipment", "Order has been shipped today", "Delivered today", "In transit"],
+}
+
+# number of distinct values of the other generated columns
+_DEFAULT_CARDINALITIES = {
+    "Order_ID": None,  # a quarter of the rows, every order has several status rows
+    "Order_date": 30,
+    "Delivery_distance": 99,
+}
+
+COLUMNS = [
+    "#", "Date", "Order_ID", "Order_date", "Start_Shipping_Date", "Estimated_Arrival_Date", "Actual_Arrival_Date",
+    "Days_from_order_to_shipment", "Days_from_shipment_to_delivery", "Days_from_order_to_delivery",
+    "Days_between_estimated_and_actual_arrival", "Product_Category", "Mode_Of_Transport", "Priority",
+    "Carrier_name", "Warehouse", "Supplier_Name", "Customer_Name", "Delivery_distance", "Status",
+]
+
+
+def _value_pool(column: str, cardinality: Optional[int]) -> np.ndarray:
+    """
+    Lists the values a categorical column is sampled from.
+
+    Args:
+        column (str): The column name.
+        cardinality (int, optional): The number of distinct values (default is the real number).
+
+    Returns:
+        np.ndarray: The values, the real ones first.
+    """
+    pool = _VALUE_POOLS[column]
+    cardinality = cardinality or len(pool)
+    extra = [f"{column.split('_')[0]} {i}" for i in range(cardinality - len(pool))]
+    return np.array((pool + extra)[:cardinality], dtype=object)
+
+
+def generate_synthetic_shipments(
+    n_rows: int,
+    cardinalities: Optional[Dict[str, int]] = None,
+    seed: int = 0,
+    n_orders: Optional[int] = None,
+) -> pd.DataFrame:
+    """
+    Generates shipment rows with the schema of `data/shipment_dataset.csv`.
+
+    Dates are consistent within a row (ordered, shipped, then estimated and actual arrival) and the
+    "Days_*" columns are derived from them. Categorical columns are sampled uniformly from the values of
+    the real dataset, extended with numbered values ("Carrier 12") when a larger cardinality is requested.
+
+    Args:
+        n_rows (int): The number of rows.
+        cardinalities (Dict[str, int], optional): The number of distinct values of some columns, e.g.
+            {"Carrier_name": 1000, "Order_ID": 50_000}. Supported columns are the categorical ones,
+            "Order_ID", "Order_date" and "Delivery_distance" (default is None, the real cardinalities).
+        seed (int, optional): The random seed (default is 0).
+        n_orders (int, optional): The number of distinct order ids, overridden by the "Order_ID" cardinality
+            (default is a quarter of the rows).
+
+    Returns:
+        pd.DataFrame: The rows, with the same columns as the real dataset.
+
+    Raises:
+        ValueError: If a cardinality is given for an unsupported column.
+    """
+    cardinalities = dict(cardinalities or {})
+    unsupported = set(cardinalities) - set(_VALUE_POOLS) - set(_DEFAULT_CARDINALITIES)
+    if unsupported:
+        raise ValueError(f"cardinalities are not supported for columns {sorted(unsupported)}")
+
+    rng = np.random.default_rng(seed)
+    n_orders = cardinalities.get("Order_ID") or n_orders or max(1, n_rows // 4)
+    n_order_dates = cardinalities.get("Order_date") or _DEFAULT_CARDINALITIES["Order_date"]
+    n_distances = cardinalities.get("Delivery_distance") or _DEFAULT_CARDINALITIES["Delivery_distance"]
+
+    order_date = np.datetime64("2023-07-01") + rng.integers(0, n_order_dates, n_rows).astype("timedelta64[D]")
+    to_shipment = rng.integers(0, 4, n_rows)
+    to_estimated = rng.integers(1, 8, n_rows)
+    delay = np.minimum(rng.geometric(0.6, n_rows) - 1, 10)
+    start_shipping = order_date + to_shipment.astype("timedelta64[D]")
+    estimated = start_shipping + to_estimated.astype("timedelta64[D]")
+    actual = estimated + delay.astype("timedelta64[D]")
+    event_date = order_date + rng.integers(0, 1 + to_shipment + to_estimated + delay).astype("timedelta64[D]")
+
+    columns = {
+        "#": np.full(n_rows, np.nan),
+        "Date": np.datetime_as_string(event_date, unit="D"),
+        "Order_ID": rng.integers(1, n_orders + 1, n_rows),
+        "Order_date": np.datetime_as_string(order_date, unit="D"),
+        "Start_Shipping_Date": np.datetime_as_string(start_shipping, unit="D"),
+        "Estimated_Arrival_Date": np.datetime_as_string(estimated, unit="D"),
+        "Actual_Arrival_Date": np.datetime_as_string(actual, unit="D"),
+        "Days_from_order_to_shipment": to_shipment,
+        "Days_from_shipment_to_delivery": to_estimated + delay,
+        "Days_from_order_to_delivery": to_shipment + to_estimated + delay,
+        "Days_between_estimated_and_actual_arrival": delay,
+        "Delivery_distance": 100 * rng.integers(1, n_distances + 1, n_rows),
+    }
+    for column in _VALUE_POOLS:
+        pool = _value_pool(column, cardinalities.get(column))
+        columns[column] = pool[rng.integers(0, len(pool), n_rows)]
+
+    return pd.DataFrame(columns)[COLUMNS]
+
+
+def write_synthetic_shipments(
+    path: Union[str, pathlib.Path],
+    n_rows: int,
+    cardinalities: Optional[Dict[str, int]] = None,
+    seed: int = 0,
+    chunk_rows: int = 500_000,
+    delimiter: str = ";",
+) -> pathlib.Path:
+    """
+    Writes a synthetic shipment CSV file chunk by chunk, so files of millions of rows fit in memory.
+
+    Args:
+        path (str or pathlib.Path): The CSV file to write.
+        n_rows (int): The number of rows.
+        cardinalities (Dict[str, int], optional): See `generate_synthetic_shipments`.
+        seed (int, optional): The random seed; every chunk derives its own seed from it (default is 0).
+        chunk_rows (int, optional): The number of rows generated at once (default is 500,000).
+        delimiter (str, optional): The CSV delimiter (default is ";", like the real dataset).
+
+    Returns:
+        pathlib.Path: The path of the written file.
+    """
+    path = pathlib.Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    n_orders = max(1, n_rows // 4)
+    with open(path, "w", newline="") as f:
+        for i, start in enumerate(range(0, max(n_rows, 1), chunk_rows)):
+            chunk = generate_synthetic_shipments(
+                min(chunk_rows, n_rows - start),
+                cardinalities=cardinalities,
+                seed=seed * 1_000_003 + i,
+                n_orders=n_orders,
+            )
+            chunk.to_csv(f, sep=delimiter, index=False, header=i == 0)
+    return path
+
+
+class TestGenerateSyntheticShipments(unittest.TestCase):
+    """
+    Unit tests for the synthetic shipment generator.
+    """
+
+    def test_schema_and_cardinalities(self) -> None:
+        """
+        tests that generated rows have the real schema, consistent dates and the requested cardinalities.
+        """
+        df = generate_synthetic_shipments(5000, cardinalities={"Carrier_name": 40, "Order_ID": 100})
+        self.assertEqual(list(df.columns), COLUMNS)
+        self.assertEqual(df["Carrier_name"].nunique(), 40)
+        self.assertIn("UPS", set(df["Carrier_name"]))
+        self.assertLessEqual(df["Order_ID"].nunique(), 100)
+        self.assertTrue((df["Actual_Arrival_Date"] >= df["Estimated_Arrival_Date"]).all())
+        self.assertTrue((
+            df["Days_from_order_to_delivery"]
+            == df["Days_from_order_to_shipment"] + df["Days_from_shipment_to_delivery"]
+        ).all())
+
+    def test_written_file_reads_like_the_real_dataset(self) -> None:
+        """
+        tests that a file written in chunks has the expected rows and is parsed like the real dataset.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = write_synthetic_shipments(pathlib.Path(tmp_dir) / "shipments.csv", 2500, chunk_rows=1000)
+            df = pd.read_csv(path, delimiter=";")
+            real = pd.read_csv(pathlib.Path(__file__).parents[2] / "data" / "shipment_dataset.csv", delimiter=";")
+
+        self.assertEqual(len(df), 2500)
+        self.assertEqual(list(df.columns), list(real.columns))
+        self.assertEqual(dict(df.dtypes), dict(real.dtypes))
+
+    def test_unsupported_cardinality(self) -> None:
+        """
+        tests that cardinalities of derived columns are rejected.
+        """
+        with self.assertRaises(ValueError):
+            generate_synthetic_shipments(10, cardinalities={"Days_from_order_to_delivery": 3})
@@ -0,0 +1,251 @@
+import numpy as np
+import time
+import unittest
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+__all__ = ["IVFIndex", "evaluate_ann_recall"]
+
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbour index (inverted file) over L2-normalized embeddings.
+
+    The embeddings are clustered with spherical k-means; every embedding is stored in the list of its
+    closest centroid. A query is only compared with the members of the `n_probe` lists whose centroids
+    are closest to it, which trades recall for latency on columns with many unique values.
+
+    Attributes:
+        n_lists (Optional[int]): The number of k-means clusters (default is the square root of the number of values).
+        n_probe (int): The number of lists searched per query. Higher is slower but more accurate.
+        n_iter (int): The number of k-means iterations.
+        max_train_points (int): The maximum number of embeddings used to train the centroids.
+        seed (int): The random seed of the k-means initialization and training sample.
+        embeddings (np.ndarray): The indexed embeddings.
+        centroids (np.ndarray): The L2-normalized centroids, one row per list.
+        list_offsets (np.ndarray): The start of each list in `list_members`, plus the total count.
+        list_members (np.ndarray): The positions of the embeddings, grouped by list.
+    """
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        n_iter: int = 20,
+        max_train_points: int = 100_000,
+        seed: int = 0,
+    ):
+        """
+        Initializes the index configuration. Call `fit` to build it.
+
+        Args:
+            n_lists (int, optional): The number of k-means clusters (default is the square root of the
+                number of values).
+            n_probe (int, optional): The number of lists searched per query (default is 8).
+            n_iter (int, optional): The number of k-means iterations (default is 20).
+            max_train_points (int, optional): The maximum number of embeddings used to train the
+                centroids (default is 100,000).
+            seed (int, optional): The random seed (default is 0).
+
+        Raises:
+            ValueError: If `n_lists` or `n_probe` is not a positive integer.
+        """
+        if n_lists is not None and n_lists <= 0:
+            raise ValueError(f"n_lists must be a positive integer, got {n_lists}")
+        if n_probe <= 0:
+            raise ValueError(f"n_probe must be a positive integer, got {n_probe}")
+
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.max_train_points = max_train_points
+        self.seed = seed
+        self.embeddings = np.empty((0, 0), dtype=np.float32)
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+        self.list_offsets = np.zeros(1, dtype=np.int64)
+        self.list_members = np.empty(0, dtype=np.int64)
+
+    def fit(self, embeddings: np.ndarray) -> "IVFIndex":
+        """
+        Trains the centroids with spherical k-means and assigns every embedding to a list.
+
+        Args:
+            embeddings (np.ndarray): The L2-normalized embeddings, one row per value.
+
+        Returns:
+            IVFIndex: The fitted index.
+        """
+        self.embeddings = np.asarray(embeddings, dtype=np.float32)
+        n = len(self.embeddings)
+        if n == 0:
+            return self
+
+        n_lists = min(self.n_lists or max(1, int(np.sqrt(n))), n)
+        rng = np.random.default_rng(self.seed)
+
+        # train on a sample of the embeddings, initialized with distinct random points
+        train = self.embeddings
+        if n > self.max_train_points:
+            train = train[rng.choice(n, size=self.max_train_points, replace=False)]
+        centroids = train[rng.choice(len(train), size=n_lists, replace=False)].copy()
+
+        for _ in range(self.n_iter):
+            assignment = np.argmax(train @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, train)
+            counts = np.bincount(assignment, minlength=n_lists)
+
+            # re-seed empty clusters with random training points
+            empty = np.flatnonzero(counts == 0)
+            sums[empty] = train[rng.choice(len(train), size=len(empty))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms == 0, 1, norms)
+
+        # assign every embedding to its closest centroid, grouping positions by list
+        assignment = np.argmax(self.embeddings @ centroids.T, axis=1)
+        self.centroids = centroids.astype(np.float32)
+        self.list_members = np.argsort(assignment, kind="stable")
+        self.list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))])
+        return self
+
+    def search(
+        self,
+        embedded_queries: np.ndarray,
+        k: int = 1,
+        n_probe: Optional[int] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the approximate k most similar embeddings of every query.
+
+        Args:
+            embedded_queries (np.ndarray): The L2-normalized query embeddings, one row per query.
+            k (int, optional): The number of neighbours per query (default is 1).
+            n_probe (int, optional): The number of lists searched per query (default is `self.n_probe`).
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: The scores and positions of the neighbours, each of shape
+                (n_queries, k) and sorted by decreasing score. Missing neighbours have position -1 and
+                score -inf.
+        """
+        embedded_queries = np.atleast_2d(np.asarray(embedded_queries, dtype=np.float32))
+        n_lists = len(self.centroids)
+        n_probe = min(n_probe or self.n_probe, n_lists)
+        scores = np.full((len(embedded_queries), k), -np.inf, dtype=np.float32)
+        positions = np.full((len(embedded_queries), k), -1, dtype=np.int64)
+        if n_lists == 0:
+            return scores, positions
+
+        # closest lists of every query
+        centroid_scores = embedded_queries @ self.centroids.T
+        probed = np.argpartition(-centroid_scores, n_probe - 1, axis=1)[:, :n_probe]
+
+        for q, (embedded_query, lists) in enumerate(zip(embedded_queries, probed)):
+            candidates = np.concatenate([
+                self.list_members[self.list_offsets[i]:self.list_offsets[i + 1]] for i in lists
+            ])
+            if len(candidates) == 0:
+                continue
+
+            candidate_scores = self.embeddings[candidates] @ embedded_query
+            top = min(k, len(candidates))
+            best = np.argpartition(-candidate_scores, top - 1)[:top]
+            best = best[np.argsort(-candidate_scores[best], kind="stable")]
+            scores[q, :top] = candidate_scores[best]
+            positions[q, :top] = candidates[best]
+
+        return scores, positions
+
+
+def evaluate_ann_recall(
+    column_index: Any,
+    embedded_queries: np.ndarray,
+    n_probes: Sequence[int] = (1, 2, 4, 8, 16),
+    k: int = 1,
+) -> List[Dict[str, float]]:
+    """
+    Measures the recall and latency of a column's ANN index against the exact scorer.
+
+    Args:
+        column_index (ColumnIndex): A column index with an ANN index attached.
+        embedded_queries (np.ndarray): The query embeddings, one row per query.
+        n_probes (Sequence[int], optional): The `n_probe` settings to evaluate (default is 1, 2, 4, 8 and 16).
+        k (int, optional): The number of neighbours compared per query (default is 1).
+
+    Returns:
+        List[Dict[str, float]]: One entry per `n_probe` with the recall@k and the mean per-query latency
+            of the ANN index and of the exact scorer, in milliseconds.
+
+    Raises:
+        ValueError: If the column index has no ANN index attached.
+    """
+    if column_index.ann is None:
+        raise ValueError(f"column '{column_index.original_column}' has no ANN index")
+
+    embedded_queries = np.atleast_2d(np.asarray(embedded_queries, dtype=np.float32))
+    norms = np.linalg.norm(embedded_queries, axis=1, keepdims=True)
+    embedded_queries = embedded_queries / np.where(norms == 0, 1, norms)
+    n_queries = max(len(embedded_queries), 1)
+    top = min(k, len(column_index))
+
+    start = time.perf_counter()
+    exact_scores = embedded_queries @ column_index.embeddings.T
+    exact = np.argpartition(-exact_scores, top - 1, axis=1)[:, :top]
+    exact_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+    report = []
+    for n_probe in n_probes:
+        start = time.perf_counter()
+        _, approximate = column_index.ann.search(embedded_queries, k=top, n_probe=n_probe)
+        ann_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+        found = sum(len(set(e) & set(a)) for e, a in zip(exact.tolist(), approximate.tolist()))
+        report.append({
+            "n_probe": n_probe,
+            f"recall@{top}": found / (n_queries * top),
+            "ann_latency_ms": ann_ms,
+            "exact_latency_ms": exact_ms,
+        })
+    return report
+
+
+class TestIVFIndex(unittest.TestCase):
+    """
+    Unit tests for the IVFIndex class.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Sets up clustered, L2-normalized random embeddings.
+        """
+        rng = np.random.default_rng(42)
+        centers = rng.normal(size=(10, 16))
+        points = np.repeat(centers, 50, axis=0) + 0.1 * rng.normal(size=(500, 16))
+        cls.embeddings = (points / np.linalg.norm(points, axis=1, keepdims=True)).astype(np.float32)
+
+    def test_every_value_is_in_one_list(self) -> None:
+        """
+        tests that the lists partition the embeddings.
+        """
+        index = IVFIndex(n_lists=10).fit(self.embeddings)
+        self.assertEqual(sorted(index.list_members.tolist()), list(range(len(self.embeddings))))
+        self.assertEqual(index.list_offsets[-1], len(self.embeddings))
+
+    def test_probing_all_lists_is_exact(self) -> None:
+        """
+        tests that searching every list returns the exact nearest neighbour.
+        """
+        index = IVFIndex(n_lists=10).fit(self.embeddings)
+        queries = self.embeddings[::25]
+        _, positions = index.search(queries, k=1, n_probe=10)
+        exact = np.argmax(queries @ self.embeddings.T, axis=1)
+        np.testing.assert_array_equal(positions[:, 0], exact)
+
+    def test_top_k_is_sorted(self) -> None:
+        """
+        tests that the neighbours are sorted by decreasing score.
+        """
+        index = IVFIndex(n_lists=10, n_probe=2).fit(self.embeddings)
+        scores, _ = index.search(self.embeddings[:3], k=5)
+        self.assertTrue(np.all(np.diff(scores, axis=1) <= 0))
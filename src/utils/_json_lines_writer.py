@@ -0,0 +1,83 @@
+import json
+import numpy as np
+import pathlib
+import tempfile
+import unittest
+
+from typing import Any, Optional, Type, Union
+from ._numpy_encoder import NumpyEncoder
+
+
+__all__ = ["JsonLinesWriter"]
+
+
+class JsonLinesWriter:
+    """
+    Writes records to a JSON Lines file one at a time, so no record list or serialized string is kept.
+
+    Every record is flushed as soon as it is written, so the file can be followed while the run goes on.
+
+    Attributes:
+        path (pathlib.Path): The JSON Lines file.
+        n_records (int): The number of records written so far.
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path], encoder: Type[json.JSONEncoder] = NumpyEncoder):
+        """
+        Opens the file for writing, replacing it if it exists.
+
+        Args:
+            path (str or pathlib.Path): The JSON Lines file.
+            encoder (Type[json.JSONEncoder], optional): The JSON encoder (default is `NumpyEncoder`).
+        """
+        self.path = pathlib.Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.encoder = encoder
+        self.n_records = 0
+        self._file: Optional[Any] = open(self.path, "w")
+
+    def write(self, record: Any) -> None:
+        """
+        Writes a record on its own line.
+
+        Args:
+            record (Any): A JSON-serializable record.
+        """
+        self._file.write(json.dumps(record, cls=self.encoder) + "\n")
+        self._file.flush()
+        self.n_records += 1
+
+    def close(self) -> None:
+        """
+        Closes the file.
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "JsonLinesWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class TestJsonLinesWriter(unittest.TestCase):
+    """
+    Unit tests for the JsonLinesWriter class.
+    """
+
+    def test_one_record_per_line(self) -> None:
+        """
+        tests that every record is written as one line, numpy values included.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = pathlib.Path(tmp_dir) / "results.jsonl"
+            with JsonLinesWriter(path) as writer:
+                writer.write({"user_query": "UPS", "best_score": np.float32(0.5)})
+                writer.write({"user_query": "DHL", "row_ranges": [[2, 4]]})
+            lines = path.read_text().splitlines()
+
+        self.assertEqual(writer.n_records, 2)
+        self.assertEqual([json.loads(line)["user_query"] for line in lines], ["UPS", "DHL"])
+        self.assertEqual(json.loads(lines[0])["best_score"], 0.5)
@@ -0,0 +1,131 @@
+import logging
+import pandas as pd
+import pathlib
+import tempfile
+import unittest
+
+from typing import List, Union
+
+
+__all__ = ["load_compact_dataset", "frame_memory_mb"]
+
+logger = logging.getLogger(__name__)
+
+
+def frame_memory_mb(df: pd.DataFrame) -> float:
+    """
+    Returns the memory held by a DataFrame, including the Python strings of its object columns.
+
+    Args:
+        df (pd.DataFrame): The DataFrame.
+
+    Returns:
+        float: The memory footprint, in MB.
+    """
+    return round(float(df.memory_usage(index=True, deep=True).sum()) / 2**20, 3)
+
+
+def load_compact_dataset(
+    data_path: Union[str, pathlib.Path],
+    cols: List[str],
+    delimiter: str = ";",
+    sample_rows: int = 10_000,
+    max_category_ratio: float = 0.5,
+) -> pd.DataFrame:
+    """
+    Reads the selected columns of a CSV dataset with compact dtypes.
+
+    Only the selected columns are parsed. A sample of the first rows tells which columns hold text:
+    those with at most `max_category_ratio` unique values per row in the sample are read as categoricals,
+    so every distinct string is stored once, including date strings until `convert_date_columns` parses
+    them. Integer columns are downcast to the smallest integer type holding their values. Float columns
+    keep float64, so their string versions are unchanged.
+
+    Args:
+        data_path (str or pathlib.Path): The CSV dataset.
+        cols (List[str]): The columns to read, in the order of the returned DataFrame. All the columns are
+            read if the list is empty, like `filter_data_by_cols`.
+        delimiter (str, optional): The CSV delimiter (default is ";").
+        sample_rows (int, optional): The number of rows sampled to choose the dtypes (default is 10,000).
+        max_category_ratio (float, optional): The maximum number of unique values per row of a text column
+            read as a categorical (default is 0.5).
+
+    Returns:
+        pd.DataFrame: The selected columns.
+
+    Raises:
+        KeyError: If any of the selected columns is not in the dataset.
+    """
+    header = pd.read_csv(data_path, delimiter=delimiter, nrows=0).columns
+    cols = list(cols) or list(header)
+    missing_columns = [col for col in cols if col not in header]
+    if missing_columns:
+        raise KeyError(f"The following columns are not in the DataFrame: {missing_columns}")
+
+    sample = pd.read_csv(data_path, delimiter=delimiter, usecols=cols, nrows=sample_rows)
+    dtypes = {
+        col: "category"
+        for col in cols
+        if pd.api.types.is_object_dtype(sample[col])
+        and sample[col].nunique() <= max_category_ratio * max(len(sample), 1)
+    }
+    del sample
+
+    # usecols keeps the file order, restore the order of the selected columns
+    df = pd.read_csv(data_path, delimiter=delimiter, usecols=cols, dtype=dtypes)[cols]
+    for col in df.columns:
+        if pd.api.types.is_integer_dtype(df[col]) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+
+    logger.info(f"{len(cols)} columns loaded as {dict(df.dtypes.astype(str))}")
+    return df
+
+
+class TestLoadCompactDataset(unittest.TestCase):
+    """
+    Unit tests for the load_compact_dataset function.
+    """
+
+    def setUp(self) -> None:
+        """
+        Writes a small CSV dataset.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_path = pathlib.Path(self.tmp_dir.name) / "data.csv"
+        self.df = pd.DataFrame({
+            "Order_ID": [100001, 100002, 100003, 100004],
+            "Carrier_name": ["UPS", "DHL", "UPS", None],
+            "Days": [1, 5, 3, 2],
+            "Distance": [100.0, 250.5, None, 100.0],
+            "Order_date": ["2023-07-05", "2023-07-05", "2023-07-06", "2023-07-05"],
+        })
+        self.df.to_csv(self.data_path, sep=";", index=False)
+
+    def tearDown(self) -> None:
+        """
+        Removes the CSV dataset.
+        """
+        self.tmp_dir.cleanup()
+
+    def test_compact_dtypes_keep_values(self) -> None:
+        """
+        tests that the selected columns are read in order, with compact dtypes and the same values.
+        """
+        cols = ["Days", "Carrier_name", "Order_date", "Distance"]
+        df = load_compact_dataset(self.data_path, cols)
+        expected = pd.read_csv(self.data_path, delimiter=";")[cols]
+
+        self.assertEqual(list(df.columns), cols)
+        self.assertEqual(str(df["Days"].dtype), "int8")
+        self.assertIsInstance(df["Carrier_name"].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(df["Order_date"].dtype, pd.CategoricalDtype)
+        self.assertEqual(str(df["Distance"].dtype), "float64")
+        for col in cols:
+            pd.testing.assert_series_equal(df[col].astype(object), expected[col].astype(object), check_dtype=False)
+
+    def test_missing_column(self) -> None:
+        """
+        tests that a column missing from the dataset raises a KeyError.
+        """
+        with self.assertRaises(KeyError):
+            load_compact_dataset(self.data_path, ["Days", "Status"])
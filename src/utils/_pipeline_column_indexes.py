@@ -0,0 +1,141 @@
+import logging
+import numpy as np
+import pandas as pd
+import queue
+import threading
+import unittest
+
+from typing import Any, Dict, Optional
+from ._add_string_version_columns_with_column_name import add_string_version_columns_with_column_name
+from ._column_index import ColumnIndex, get_searchable_columns
+from ._convert_date_columns import convert_date_columns
+from ._load_compact_dataset import frame_memory_mb
+
+# setup logger
+logger = logging.getLogger(__name__)
+
+
+__all__ = ["pipeline_column_indexes"]
+
+# marks the end of the prepared columns
+_DONE = object()
+
+
+def pipeline_column_indexes(
+    df: pd.DataFrame,
+    textual_model: Any,
+    date_formats: Optional[Dict[str, str]] = None,
+    ann_columns: Optional[Dict[str, Dict[str, Any]]] = None,
+    stage_memory_mb: Optional[Dict[str, float]] = None,
+    prefetch: int = 2,
+) -> Dict[str, ColumnIndex]:
+    """
+    Preprocesses the loaded columns and builds their indexes in a pipeline, one column at a time.
+
+    A background thread converts the date columns, adds the "s_" string versions and groups the rows of
+    one column after the other, while the calling thread embeds the unique values of every column as soon
+    as they are ready. The first column is embedded as soon as the model and that column are ready, instead
+    of after the whole DataFrame is preprocessed, and a model still loading in the background (see
+    `LazyTextEmbedding.preload`) overlaps with the preprocessing. The indexes are the same as those of
+    `convert_date_columns`, `add_string_version_columns_with_column_name` and `build_column_indexes`, in
+    the same order.
+
+    Args:
+        df (pd.DataFrame): The loaded columns, e.g. from `load_compact_dataset`.
+        textual_model (Any): The model used for embedding the textual values.
+        date_formats (Dict[str, str], optional): The date columns and their formats, e.g. from
+            `cached_date_formats`; detected for every column if None (default is None).
+        ann_columns (Dict[str, Dict[str, Any]], optional): The original columns searched with an approximate
+            nearest-neighbour index, mapped to their `IVFIndex` settings (default is None, exact search only).
+        stage_memory_mb (Dict[str, float], optional): Filled with the memory of the preprocessed columns
+            after the "convert_date_columns" and "add_string_version_columns" stages, in MB (default is None).
+        prefetch (int, optional): The number of columns prepared ahead of the embedding (default is 2).
+
+    Returns:
+        Dict[str, ColumnIndex]: The column indexes, keyed by original column name.
+    """
+    prepared: "queue.Queue" = queue.Queue(maxsize=prefetch)
+    memory = {"convert_date_columns": 0.0, "add_string_version_columns": 0.0}
+
+    def prepare_columns() -> None:
+        try:
+            for col in df.columns:
+                frame = convert_date_columns(df[[col]], date_formats=date_formats)
+                memory["convert_date_columns"] += frame_memory_mb(frame)
+                frame = add_string_version_columns_with_column_name(frame)
+                memory["add_string_version_columns"] += frame_memory_mb(frame)
+                for column, original_column in get_searchable_columns(frame):
+                    prepared.put((column, original_column, ColumnIndex._group_rows(frame, column, original_column)))
+        except BaseException as eee:
+            prepared.put(eee)
+            return
+        prepared.put(_DONE)
+
+    thread = threading.Thread(target=prepare_columns, name="column-preparation", daemon=True)
+    thread.start()
+
+    built = []
+    while (item := prepared.get()) is not _DONE:
+        if isinstance(item, BaseException):
+            raise item
+        column, original_column, groups = item
+        values = [str(value).lower() for value in groups["values"]]
+        embeddings = textual_model.embed_texts(values) if values else np.empty((0, 0), dtype=np.float32)
+        built.append(ColumnIndex(column, original_column, embeddings=embeddings, **groups))
+        logger.info(f"indexed column '{original_column}' ({len(values)} unique values)")
+    thread.join()
+
+    if stage_memory_mb is not None:
+        stage_memory_mb.update({stage: round(mb, 3) for stage, mb in memory.items()})
+
+    # same order as `build_column_indexes`: the columns without an "s_" version come first
+    built.sort(key=lambda column_index: column_index.column != column_index.original_column)
+    column_indexes = {column_index.original_column: column_index for column_index in built}
+    for original_column, ivf_kwargs in (ann_columns or {}).items():
+        column_indexes[original_column].enable_ann(**ivf_kwargs)
+    return column_indexes
+
+
+class TestPipelineColumnIndexes(unittest.TestCase):
+    """
+    Unit tests for the pipeline_column_indexes function.
+    """
+
+    def test_same_indexes_as_sequential_build(self) -> None:
+        """
+        tests that the pipelined indexes equal the indexes built after preprocessing the whole DataFrame.
+        """
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+        from ._column_index import build_column_indexes
+
+        model = FakeTextEmbedding()
+        df = pd.DataFrame({
+            "Days": [2, 5, 2, None],
+            "Carrier_name": ["UPS", "FedEx", "UPS", "DHL"],
+            "Order_date": ["2023-07-05", "2023-07-06", "2023-07-05", "2023-07-07"],
+        })
+        date_formats = {"Order_date": "%Y-%m-%d"}
+        expected = build_column_indexes(
+            add_string_version_columns_with_column_name(convert_date_columns(df, date_formats=date_formats)),
+            model,
+        )
+        stage_memory_mb = {}
+        column_indexes = pipeline_column_indexes(df, model, date_formats, stage_memory_mb=stage_memory_mb)
+
+        self.assertEqual(list(column_indexes), list(expected))
+        for original_column, column_index in column_indexes.items():
+            self.assertEqual(list(column_index.values), list(expected[original_column].values))
+            np.testing.assert_array_equal(column_index.embeddings, expected[original_column].embeddings)
+            np.testing.assert_array_equal(column_index.row_positions, expected[original_column].row_positions)
+        self.assertEqual(set(stage_memory_mb), {"convert_date_columns", "add_string_version_columns"})
+
+    def test_preparation_errors_are_raised(self) -> None:
+        """
+        tests that an error raised while preparing a column is raised by the caller.
+        """
+        from unittest.mock import patch
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+
+        with patch(f"{__name__}.add_string_version_columns_with_column_name", side_effect=ValueError("bad column")):
+            with self.assertRaises(ValueError):
+                pipeline_column_indexes(pd.DataFrame({"Days": [1, 2]}), FakeTextEmbedding())
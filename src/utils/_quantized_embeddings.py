@@ -0,0 +1,205 @@
+import numpy as np
+import time
+import unittest
+
+from typing import Any, Dict, List, Sequence
+
+
+__all__ = ["QuantizedEmbeddings", "evaluate_quantization"]
+
+_SUPPORTED_DTYPES = ("float16", "int8")
+
+
+class QuantizedEmbeddings:
+    """
+    Compressed copy of an L2-normalized embedding matrix, scored without decompressing it as a whole.
+
+    "float16" halves the size of the float32 matrix. "int8" quarters it: every vector is stored as int8
+    codes with its own float32 scale (its largest absolute component / 127), so the quantization error of a
+    vector does not depend on the range of the other vectors. Scores are computed block by block, so only
+    `block_size` rows are ever converted back to float32 at once.
+
+    Attributes:
+        dtype (str): The storage type, "float16" or "int8".
+        block_size (int): The number of rows converted to float32 at once when scoring.
+        codes (np.ndarray): The compressed vectors, one row per value.
+        scales (np.ndarray): The per-vector scales of "int8" codes, empty for "float16".
+    """
+
+    def __init__(self, dtype: str = "int8", block_size: int = 8192):
+        """
+        Initializes the storage configuration. Call `fit` to compress a matrix.
+
+        Args:
+            dtype (str, optional): The storage type, "float16" or "int8" (default is "int8").
+            block_size (int, optional): The number of rows converted to float32 at once (default is 8192).
+
+        Raises:
+            ValueError: If the storage type is not supported.
+        """
+        if dtype not in _SUPPORTED_DTYPES:
+            raise ValueError(f"dtype must be one of {_SUPPORTED_DTYPES}, got '{dtype}'")
+
+        self.dtype = dtype
+        self.block_size = block_size
+        self.codes = np.empty((0, 0), dtype=dtype)
+        self.scales = np.empty(0, dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        int: The memory used by the codes and scales.
+        """
+        return self.codes.nbytes + self.scales.nbytes
+
+    def fit(self, embeddings: np.ndarray) -> "QuantizedEmbeddings":
+        """
+        Compresses an embedding matrix.
+
+        Args:
+            embeddings (np.ndarray): The float32 embeddings, one row per value.
+
+        Returns:
+            QuantizedEmbeddings: The fitted store.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        if self.dtype == "float16":
+            self.codes = embeddings.astype(np.float16)
+            return self
+
+        max_abs = np.abs(embeddings).max(axis=1) if embeddings.size else np.zeros(len(embeddings), dtype=np.float32)
+        self.scales = (np.where(max_abs == 0, 1, max_abs) / 127).astype(np.float32)
+        self.codes = np.rint(embeddings / self.scales[:, None]).astype(np.int8)
+        return self
+
+    def decompress(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Approximately reconstructs the float32 vectors at some positions.
+
+        Args:
+            positions (np.ndarray): The positions of the vectors.
+
+        Returns:
+            np.ndarray: The float32 vectors, one row per position.
+        """
+        vectors = self.codes[positions].astype(np.float32)
+        if self.dtype == "int8":
+            vectors *= self.scales[positions, None]
+        return vectors
+
+    def scores(self, embedded_queries: np.ndarray) -> np.ndarray:
+        """
+        Computes the approximate similarity of every query with every stored vector.
+
+        Args:
+            embedded_queries (np.ndarray): The L2-normalized query embeddings, one row per query.
+
+        Returns:
+            np.ndarray: The float32 scores, of shape (n_queries, n_values).
+        """
+        embedded_queries = np.atleast_2d(np.asarray(embedded_queries, dtype=np.float32))
+        scores = np.empty((len(embedded_queries), len(self.codes)), dtype=np.float32)
+        for start in range(0, len(self.codes), self.block_size):
+            block = slice(start, start + self.block_size)
+            scores[:, block] = embedded_queries @ self.codes[block].astype(np.float32).T
+            if self.dtype == "int8":
+                scores[:, block] *= self.scales[block]
+        return scores
+
+
+def evaluate_quantization(
+    column_index: Any,
+    embedded_queries: np.ndarray,
+    dtypes: Sequence[str] = _SUPPORTED_DTYPES,
+    rescore_k: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    Measures the memory saved by each storage type against its ranking agreement with the exact scorer.
+
+    The exact scores are the float32 cosine similarities returned by `find_best_match`.
+
+    Args:
+        column_index (ColumnIndex): The column index, with its float32 embeddings.
+        embedded_queries (np.ndarray): The query embeddings, one row per query.
+        dtypes (Sequence[str], optional): The storage types to evaluate (default is "float16" and "int8").
+        rescore_k (int, optional): The number of candidates rescored in float32 (default is 10).
+
+    Returns:
+        List[Dict[str, Any]]: One entry per storage type with the float32 and compressed sizes in bytes,
+            the fraction of queries whose best value is unchanged without and with rescoring, the largest
+            absolute score error, and the mean per-query latency of the compressed scorer in milliseconds.
+    """
+    from ._column_index import _l2_normalize
+
+    embedded_queries = _l2_normalize(np.atleast_2d(embedded_queries))
+    n_queries = max(len(embedded_queries), 1)
+    exact_scores = embedded_queries @ np.asarray(column_index.embeddings).T
+    exact_best = np.argmax(exact_scores, axis=1) if len(column_index) else np.empty(0, dtype=np.int64)
+
+    report = []
+    for dtype in dtypes:
+        quantized = QuantizedEmbeddings(dtype).fit(column_index.embeddings)
+        start = time.perf_counter()
+        approximate_scores = quantized.scores(embedded_queries)
+        latency_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+        top1_agreement, rescored_agreement, max_abs_error = 1.0, 1.0, 0.0
+        if len(column_index):
+            approximate_best = np.argmax(approximate_scores, axis=1)
+            top = min(rescore_k, len(column_index))
+            candidates = np.argpartition(-approximate_scores, top - 1, axis=1)[:, :top]
+            rescored_best = candidates[
+                np.arange(len(candidates)), np.argmax(np.take_along_axis(exact_scores, candidates, axis=1), axis=1)
+            ]
+            top1_agreement = float(np.mean(approximate_best == exact_best))
+            rescored_agreement = float(np.mean(rescored_best == exact_best))
+            max_abs_error = float(np.abs(approximate_scores - exact_scores).max())
+
+        report.append({
+            "dtype": dtype,
+            "float32_bytes": int(np.asarray(column_index.embeddings).nbytes),
+            "compressed_bytes": int(quantized.nbytes),
+            "top1_agreement": top1_agreement,
+            f"rescored@{rescore_k}_agreement": rescored_agreement,
+            "max_abs_score_error": max_abs_error,
+            "latency_ms": latency_ms,
+        })
+    return report
+
+
+class TestQuantizedEmbeddings(unittest.TestCase):
+    """
+    Unit tests for the QuantizedEmbeddings class.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Sets up random L2-normalized embeddings and queries.
+        """
+        rng = np.random.default_rng(0)
+        embeddings = rng.standard_normal((500, 64)).astype(np.float32)
+        cls.embeddings = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+        queries = cls.embeddings[:20] + 0.1 * rng.standard_normal((20, 64)).astype(np.float32)
+        cls.queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+    def test_scores_are_close_to_exact(self) -> None:
+        """
+        tests that compressed scores are close to the float32 scores and the stores are smaller.
+        """
+        exact = self.queries @ self.embeddings.T
+        for dtype, atol, max_ratio in [("float16", 1e-3, 0.5), ("int8", 2e-2, 0.3)]:
+            quantized = QuantizedEmbeddings(dtype, block_size=64).fit(self.embeddings)
+            np.testing.assert_allclose(quantized.scores(self.queries), exact, atol=atol)
+            np.testing.assert_allclose(quantized.decompress(np.arange(5)), self.embeddings[:5], atol=atol)
+            self.assertLessEqual(quantized.nbytes, max_ratio * self.embeddings.nbytes)
+
+    def test_unsupported_dtype(self) -> None:
+        """
+        tests that an unsupported storage type is rejected.
+        """
+        with self.assertRaises(ValueError):
+            QuantizedEmbeddings("int4")
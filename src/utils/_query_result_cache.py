@@ -0,0 +1,513 @@
+import hashlib
+import logging
+import numpy as np
+import os
+import pathlib
+import pickle
+import tempfile
+import time
+import unittest
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+from src.metrics import run_metrics
+from ._column_index import ColumnIndex, _l2_normalize
+from ._column_router import ColumnRouter, match_queries_routed
+from ._search_queries import match_queries, match_queries_top_k
+
+# setup logger
+logger = logging.getLogger(__name__)
+
+
+__all__ = ["QueryResultCache", "fingerprint_column_indexes", "cached_match_queries"]
+
+# leading embedding dimensions hashed per value: any changed value changes them, at a fraction of the cost
+_FINGERPRINT_DIMS = 8
+
+
+def fingerprint_column_indexes(column_indexes: Dict[str, ColumnIndex], *settings: Any) -> str:
+    """
+    Computes a version fingerprint of column indexes, which changes whenever a query could match differently.
+
+    The fingerprint covers the columns, the leading dimensions of every value embedding and the inverted
+    index of every column, plus any settings that change the scoring (model, quantization, top k, ...).
+    It must be computed before the embeddings are quantized and moved to disk.
+
+    Args:
+        column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+        *settings (Any): Settings that change the results, hashed through their `repr`.
+
+    Returns:
+        str: The hexadecimal fingerprint.
+    """
+    digest = hashlib.sha1(repr(settings).encode("utf-8"))
+    for original_column, column_index in column_indexes.items():
+        digest.update(f"{original_column}|{column_index.column}|{column_index.embeddings.shape}".encode("utf-8"))
+        digest.update(np.ascontiguousarray(column_index.embeddings[:, :_FINGERPRINT_DIMS]).tobytes())
+        digest.update(column_index.row_offsets.tobytes())
+        digest.update(np.ascontiguousarray(column_index.row_positions).tobytes())
+    return digest.hexdigest()
+
+
+class QueryResultCache:
+    """
+    Persistent, size and age bounded LRU cache of query results.
+
+    Results are the per-column matches of a query, keyed by the normalized query text and bound to the
+    fingerprint of the column indexes they were computed on (see `fingerprint_column_indexes`), so an exact
+    hit skips both the forward pass and the column scan. The optional semantic tier reuses the result of a
+    cached query whose embedding has a cosine similarity of at least `semantic_threshold` with a new query
+    embedding; it skips the column scan only, since the new query has to be embedded first.
+
+    Attributes:
+        cache_path (Optional[pathlib.Path]): The file the cache is persisted to, if any.
+        fingerprint (str): The fingerprint of the column indexes the cached results belong to.
+        max_entries (int): The maximum number of results kept before evicting the least recently used.
+        ttl_seconds (Optional[float]): The age after which a result expires, or None to keep results.
+        semantic_threshold (Optional[float]): The minimum cosine similarity of a semantic hit, or None to
+            disable the semantic tier.
+        hits (int): The number of lookups answered with the exact query.
+        semantic_hits (int): The number of lookups answered with a similar query.
+        misses (int): The number of queries that had to be scored.
+        evictions (int): The number of results dropped to respect `max_entries`.
+        expirations (int): The number of results dropped because they were older than `ttl_seconds`.
+    """
+
+    def __init__(
+        self,
+        fingerprint: str,
+        cache_path: Optional[Union[str, pathlib.Path]] = None,
+        max_entries: int = 10_000,
+        ttl_seconds: Optional[float] = None,
+        semantic_threshold: Optional[float] = None,
+    ):
+        """
+        Initializes the cache and loads the persisted results computed on the same column indexes.
+
+        Args:
+            fingerprint (str): The fingerprint of the column indexes the results are computed on.
+            cache_path (str or pathlib.Path, optional): The file the cache is persisted to, None to keep it
+                in memory only (default is None).
+            max_entries (int, optional): The maximum number of cached results (default is 10,000).
+            ttl_seconds (float, optional): The age after which a result expires, None to keep results until
+                they are evicted (default is None).
+            semantic_threshold (float, optional): The minimum cosine similarity between query embeddings to
+                reuse a result, None to disable the semantic tier (default is None).
+
+        Raises:
+            ValueError: If `max_entries` is not a positive integer or `ttl_seconds` is not positive.
+        """
+        if max_entries <= 0:
+            raise ValueError(f"max_entries must be a positive integer, got {max_entries}")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError(f"ttl_seconds must be positive, got {ttl_seconds}")
+
+        self.cache_path = pathlib.Path(cache_path) if cache_path is not None else None
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # normalized query -> (creation time, result, L2-normalized query embedding or None)
+        self._entries: "OrderedDict[str, Tuple[float, Any, Optional[np.ndarray]]]" = OrderedDict()
+        # the semantic tier: row i of the matrix is the embedding of key i, None keys are removed entries
+        self._semantic_keys: Optional[List[Optional[str]]] = None
+        self._semantic_rows: Dict[str, int] = {}
+        self._semantic_matrix: Optional[np.ndarray] = None
+        self._semantic_live: Optional[np.ndarray] = None
+        self._dirty = False
+        self.load()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """
+        Normalizes a query into a cache key by lowercasing it and collapsing runs of whitespace.
+
+        Args:
+            query (str): The raw query.
+
+        Returns:
+            str: The normalized cache key.
+        """
+        return " ".join(str(query).lower().split())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, query: str) -> bool:
+        return self.normalize(query) in self._entries
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl_seconds is not None and time.time() - created > self.ttl_seconds
+
+    def _drop(self, key: str) -> None:
+        del self._entries[key]
+        self._semantic_remove(key)
+        self._dirty = True
+
+    def _semantic_rebuild(self) -> None:
+        """
+        Stacks the embeddings of the cached entries into the semantic matrix, dropping removed rows.
+        """
+        self._semantic_keys, self._semantic_rows = [], {}
+        self._semantic_matrix = self._semantic_live = None
+        for key, entry in self._entries.items():
+            if entry[2] is not None:
+                self._semantic_append(key, entry[2])
+
+    def _semantic_append(self, key: str, embedding: np.ndarray) -> None:
+        """
+        Adds or replaces the embedding of a key in the semantic matrix, doubling its capacity when full.
+        """
+        row = self._semantic_rows.get(key)
+        if row is None:
+            row = len(self._semantic_keys)
+            if self._semantic_matrix is None or row == len(self._semantic_matrix):
+                matrix = np.zeros((max(16, 2 * row), len(embedding)), dtype=embedding.dtype)
+                live = np.zeros(len(matrix), dtype=bool)
+                if self._semantic_matrix is not None:
+                    matrix[:row], live[:row] = self._semantic_matrix, self._semantic_live
+                self._semantic_matrix, self._semantic_live = matrix, live
+            self._semantic_keys.append(key)
+            self._semantic_rows[key] = row
+        self._semantic_matrix[row] = embedding
+        self._semantic_live[row] = True
+
+    def _semantic_remove(self, key: str) -> None:
+        """
+        Removes the embedding of a key from the semantic matrix, compacting it once half its rows are removed.
+        """
+        if self._semantic_keys is None:
+            return
+        row = self._semantic_rows.pop(key, None)
+        if row is None:
+            return
+        self._semantic_keys[row] = None
+        self._semantic_live[row] = False
+        if 2 * len(self._semantic_rows) < len(self._semantic_keys):
+            self._semantic_rebuild()
+
+    def get(self, query: str) -> Optional[Any]:
+        """
+        Looks up the result of a query, marking it as recently used. Expired results are dropped.
+
+        Args:
+            query (str): The query.
+
+        Returns:
+            Optional[Any]: The cached result, or None if the query is not cached. Misses are only counted by
+                `get_similar`, which is called next for them.
+        """
+        key = self.normalize(query)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry[0]):
+            self._drop(key)
+            self.expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        run_metrics.increment("query_cache_hits")
+        return entry[1]
+
+    def get_similar(self, embedded_query: np.ndarray) -> Optional[Any]:
+        """
+        Looks up the result of the cached query most similar to a query embedding (the semantic tier).
+
+        Args:
+            embedded_query (np.ndarray): The embedding of a query missing from the cache.
+
+        Returns:
+            Optional[Any]: The result of the most similar cached query if its cosine similarity reaches
+                `semantic_threshold`, otherwise None (always None if the semantic tier is disabled).
+        """
+        if self.semantic_threshold is not None and self._entries:
+            if self._semantic_keys is None:
+                # built on the first lookup, then kept in step by `put` and `_drop`
+                self._semantic_rebuild()
+            if self._semantic_rows:
+                n_rows = len(self._semantic_keys)
+                similarities = self._semantic_matrix[:n_rows] @ _l2_normalize(embedded_query)
+                similarities[~self._semantic_live[:n_rows]] = -np.inf
+                best = int(np.argmax(similarities))
+                key = self._semantic_keys[best]
+                created, result, _ = self._entries[key]
+                if similarities[best] >= self.semantic_threshold and not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self.semantic_hits += 1
+                    run_metrics.increment("query_cache_semantic_hits")
+                    return result
+
+        self.misses += 1
+        run_metrics.increment("query_cache_misses")
+        return None
+
+    def put(self, query: str, result: Any, embedded_query: Optional[np.ndarray] = None) -> None:
+        """
+        Stores the result of a query, evicting the least recently used results if the cache is full.
+
+        Args:
+            query (str): The query.
+            result (Any): The result, e.g. the best match of each column.
+            embedded_query (np.ndarray, optional): The query embedding, used by the semantic tier.
+        """
+        key = self.normalize(query)
+        embedding = _l2_normalize(embedded_query) if embedded_query is not None else None
+        self._entries[key] = (time.time(), result, embedding)
+        self._entries.move_to_end(key)
+        if self._semantic_keys is not None:
+            if embedding is not None:
+                self._semantic_append(key, embedding)
+            else:
+                self._semantic_remove(key)
+        self._dirty = True
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._semantic_remove(evicted)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """
+        Summarizes the cache usage since it was created.
+
+        Returns:
+            Dict[str, Union[int, float]]: The entries, hits, semantic hits, misses, evictions, expirations and
+                hit rate (exact and semantic hits per lookup) of the cache.
+        """
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": (self.hits + self.semantic_hits) / lookups if lookups else 0.0,
+        }
+
+    def load(self) -> None:
+        """
+        Loads the persisted results, if any.
+
+        Results computed on other column indexes (a different fingerprint) or a file that cannot be read are
+        ignored. Expired results and results beyond `max_entries` are dropped.
+        """
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+
+        try:
+            with open(self.cache_path, "rb") as f:
+                state = pickle.load(f)
+        except Exception as eee:
+            logger.error(f"Error loading query result cache {self.cache_path}: {str(eee)}")
+            return
+        if state["fingerprint"] != self.fingerprint:
+            logger.info(f"ignoring query result cache {self.cache_path}: the column indexes changed")
+            return
+
+        # entries are persisted oldest first, so re-inserting them restores the LRU order
+        self._entries = OrderedDict(
+            (key, entry) for key, entry in state["entries"].items() if not self._expired(entry[0])
+        )
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._semantic_keys = None
+        logger.info(f"loaded {len(self._entries)} cached query results from {self.cache_path}")
+
+    def save(self) -> None:
+        """
+        Persists the cache atomically if it changed since it was loaded.
+        """
+        if self.cache_path is None or not self._dirty:
+            return
+
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(
+                    {"fingerprint": self.fingerprint, "entries": self._entries},
+                    f,
+                    protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(tmp_path, self.cache_path)
+        except Exception:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        self._dirty = False
+        logger.info(f"saved {len(self._entries)} cached query results to {self.cache_path}")
+
+
+def cached_match_queries(
+    queries: List[str],
+    textual_model,
+    column_indexes: Dict[str, ColumnIndex],
+    result_cache: QueryResultCache,
+    top_k: Optional[int] = None,
+    router: Optional[ColumnRouter] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Finds the best (or the top k) values of every column for a batch of queries, through a result cache.
+
+    Cached queries are neither embedded nor scored. The other queries are embedded in one batch; those
+    similar enough to a cached query reuse its result, the rest are scored with `match_queries` (or
+    `match_queries_top_k`, or `match_queries_routed` with a router) and cached.
+
+    Args:
+        queries (List[str]): The user queries.
+        textual_model: The embedding model, with an `embed_texts` method.
+        column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+        result_cache (QueryResultCache): The cache, bound to the fingerprint of `column_indexes`.
+        top_k (int, optional): The number of matches per column, None for the best match only (default is
+            None). It must be part of the cache fingerprint.
+        router (ColumnRouter, optional): Scores only the columns routed to every query, None to score every
+            column (default is None). Its settings must be part of the cache fingerprint.
+
+    Returns:
+        List[Dict[str, Any]]: For every query, the best match (or the `top_k` best matches) of each column,
+            keyed by original column name.
+    """
+    results: List[Optional[Dict[str, Any]]] = [result_cache.get(q) for q in queries]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if not missing:
+        return results
+
+    embedded_queries = textual_model.embed_texts([queries[i].lower() for i in missing])
+    to_score = []
+    for i, embedded_query in zip(missing, embedded_queries):
+        results[i] = result_cache.get_similar(embedded_query)
+        if results[i] is None:
+            to_score.append(i)
+
+    if to_score:
+        embedded_to_score = embedded_queries[[missing.index(i) for i in to_score]]
+        if router is not None:
+            scored = match_queries_routed(
+                [queries[i] for i in to_score], embedded_to_score, column_indexes, router, top_k
+            )
+        elif top_k:
+            scored = match_queries_top_k(embedded_to_score, column_indexes, top_k)
+        else:
+            scored = match_queries(embedded_to_score, column_indexes)
+        for i, embedded_query, col_res in zip(to_score, embedded_to_score, scored):
+            results[i] = col_res
+            result_cache.put(queries[i], col_res, embedded_query)
+    return results
+
+
+class TestQueryResultCache(unittest.TestCase):
+    """
+    Unit tests for the QueryResultCache class and cached_match_queries.
+    """
+
+    def setUp(self) -> None:
+        """
+        Creates a temporary cache directory for each test.
+        """
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache_path = pathlib.Path(self.tmp_dir.name) / "query_results.pkl"
+
+    def tearDown(self) -> None:
+        """
+        Removes the temporary cache directory.
+        """
+        self.tmp_dir.cleanup()
+
+    def test_exact_hits_lru_and_ttl(self) -> None:
+        """
+        tests normalized exact hits, LRU eviction and expiration.
+        """
+        cache = QueryResultCache("fp", max_entries=2)
+        cache.put("UPS", {"Carrier_name": 1})
+        self.assertEqual(cache.get("  ups "), {"Carrier_name": 1})
+        cache.put("dhl", {})
+        cache.get("ups")
+        cache.put("fedex", {})
+        self.assertIn("ups", cache)
+        self.assertNotIn("dhl", cache)
+        self.assertEqual(cache.evictions, 1)
+
+        expiring = QueryResultCache("fp", ttl_seconds=60)
+        expiring.put("ups", {})
+        expiring._entries["ups"] = (time.time() - 61, *expiring._entries["ups"][1:])
+        self.assertIsNone(expiring.get("ups"))
+        self.assertEqual(expiring.expirations, 1)
+
+    def test_semantic_tier(self) -> None:
+        """
+        tests that a close query embedding reuses a cached result only when the semantic tier is enabled.
+        """
+        for threshold, expected in ((0.99, "ups result"), (None, None)):
+            cache = QueryResultCache("fp", semantic_threshold=threshold)
+            cache.put("ups", "ups result", np.array([1.0, 0.0, 0.0]))
+            self.assertEqual(cache.get_similar(np.array([1.0, 0.01, 0.0])), expected)
+            self.assertIsNone(cache.get_similar(np.array([0.0, 1.0, 0.0])))
+        self.assertEqual(cache.stats()["misses"], 2)
+
+    def test_semantic_matrix_is_updated_in_place(self) -> None:
+        """
+        tests that puts and evictions update the semantic matrix without stacking every embedding again.
+        """
+        from unittest.mock import patch
+
+        cache = QueryResultCache("fp", max_entries=3, semantic_threshold=0.99)
+        cache.put("ups", "ups result", np.array([1.0, 0.0, 0.0]))
+        self.assertEqual(cache.get_similar(np.array([1.0, 0.01, 0.0])), "ups result")
+
+        with patch.object(cache, "_semantic_rebuild", wraps=cache._semantic_rebuild) as rebuild:
+            cache.put("dhl", "dhl result", np.array([0.0, 1.0, 0.0]))
+            self.assertEqual(cache.get_similar(np.array([0.01, 1.0, 0.0])), "dhl result")
+            cache.put("ups", "new ups result", np.array([1.0, 0.0, 0.0]))
+            self.assertEqual(cache.get_similar(np.array([1.0, 0.01, 0.0])), "new ups result")
+            self.assertEqual(rebuild.call_count, 0)
+
+            # "dhl" is the least recently used entry
+            cache.put("fedex", "fedex result", np.array([0.0, 0.0, 1.0]))
+            cache.put("usps", "usps result", np.array([0.0, 0.7, 0.7]))
+            self.assertIsNone(cache.get_similar(np.array([0.01, 1.0, 0.0])))
+            self.assertEqual(cache.get_similar(np.array([0.0, 0.0, 1.0])), "fedex result")
+            self.assertLessEqual(rebuild.call_count, 1)
+        self.assertEqual(len(cache._semantic_rows), 3)
+
+    def test_persistence_is_bound_to_the_fingerprint(self) -> None:
+        """
+        tests that saved results are reloaded for the same fingerprint only.
+        """
+        cache = QueryResultCache("fp", cache_path=self.cache_path)
+        cache.put("ups", {"Carrier_name": 1})
+        cache.save()
+
+        self.assertEqual(QueryResultCache("fp", cache_path=self.cache_path).get("ups"), {"Carrier_name": 1})
+        self.assertEqual(len(QueryResultCache("other", cache_path=self.cache_path)), 0)
+
+    def test_cached_match_queries(self) -> None:
+        """
+        tests that cached results equal scored ones and that hits skip the embedding model.
+        """
+        import pandas as pd
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+        from ._column_index import build_column_indexes
+
+        model = FakeTextEmbedding()
+        df = pd.DataFrame({"Carrier_name": ["UPS", "DHL", "UPS"], "Status": ["Lost", "Delivered", "Lost"]})
+        column_indexes = build_column_indexes(df, model)
+        fingerprint = fingerprint_column_indexes(column_indexes, "fp32")
+        self.assertEqual(fingerprint, fingerprint_column_indexes(build_column_indexes(df, model), "fp32"))
+        self.assertNotEqual(fingerprint, fingerprint_column_indexes(build_column_indexes(df[:2], model), "fp32"))
+
+        cache = QueryResultCache(fingerprint)
+        queries = ["ups", "lost parcels"]
+        expected = match_queries(model.embed_texts(queries), column_indexes)
+        self.assertEqual(cached_match_queries(queries, model, column_indexes, cache), expected)
+
+        n_embedded = len(model.embedded_texts)
+        self.assertEqual(cached_match_queries(["UPS", "lost  parcels"], model, column_indexes, cache), expected)
+        self.assertEqual(len(model.embedded_texts), n_embedded)
+        self.assertEqual(cache.stats()["hits"], 2)
@@ -0,0 +1,372 @@
+import numpy as np
+import pandas as pd
+import re
+import unittest
+
+from default_configs import (
+    ORIGINAL_FILENAME_KEY,
+    VALUE_KEY,
+    SCORE_KEY,
+)
+from typing import Any, Dict, List, Optional, Tuple
+from src.metrics import run_metrics
+from ._add_string_version_columns_with_column_name import _clean_column_name
+from ._column_index import ColumnIndex
+from ._get_column_type import get_column_type
+from ._search_queries import _row_id_fields
+
+
+__all__ = ["RangeQueryIndex", "parse_range_intent", "build_range_result"]
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+_NUMBER_PATTERN = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+_DATE_PATTERNS = [
+    re.compile(r"\b\d{4}-\d{1,2}-\d{1,2}\b"),
+    re.compile(r"\b\d{1,2}/\d{1,2}/\d{4}\b"),
+    re.compile(rf"\b{_MONTHS}\s+\d{{1,2}}(?:st|nd|rd|th)?,?\s+\d{{4}}\b"),
+    re.compile(rf"\b\d{{1,2}}(?:st|nd|rd|th)?\s+{_MONTHS},?\s+\d{{4}}\b"),
+]
+_ORDINAL_SUFFIX = re.compile(r"(?<=\d)(?:st|nd|rd|th)\b")
+
+# comparison phrases, longest first so "no less than" is not read as "less than"
+_COMPARISONS = [
+    (re.compile(r"\bbetween\b"), "between"),
+    (re.compile(r"\b(?:no less than|not less than|at least|or more|since)\b|>="), "ge"),
+    (re.compile(r"\b(?:no more than|not more than|at most|up to|or less|until)\b|<="), "le"),
+    (re.compile(r"\b(?:less than|fewer than|lower than|below|under|before|earlier than)\b|<"), "lt"),
+    (re.compile(r"\b(?:more than|greater than|higher than|above|over|after|later than)\b|>"), "gt"),
+]
+_EXTREMES = [
+    (re.compile(r"\b(?:max|maximum|highest|largest|longest|most|latest|greatest)\b"), "max"),
+    (re.compile(r"\b(?:min|minimum|lowest|smallest|shortest|least|earliest|fewest)\b"), "min"),
+]
+_OPERATOR_SYMBOLS = {"lt": "<", "le": "<=", "gt": ">", "ge": ">=", "eq": "=="}
+
+
+def _tokens(text: str) -> set:
+    return set(_TOKEN_PATTERN.findall(str(text).lower()))
+
+
+def _date_literals(query: str) -> Tuple[List[pd.Timestamp], str]:
+    """
+    Extracts the dates written in a query.
+
+    Args:
+        query (str): The lowercase query.
+
+    Returns:
+        Tuple[List[pd.Timestamp], str]: The dates in order of appearance, and the query without them.
+    """
+    found = []
+    for pattern in _DATE_PATTERNS:
+        for match in pattern.finditer(query):
+            date = pd.to_datetime(_ORDINAL_SUFFIX.sub("", match.group()).replace(",", ""), errors="coerce")
+            if not pd.isna(date):
+                found.append((match.start(), match.group(), date))
+    for _, text, _ in found:
+        query = query.replace(text, " ")
+    return [date for _, _, date in sorted(found, key=lambda item: item[0])], query
+
+
+def parse_range_intent(query: str, column_type: str) -> Optional[Tuple[str, List[Any]]]:
+    """
+    Detects a comparison or an extreme in a query and its literals.
+
+    Args:
+        query (str): The query.
+        column_type (str): The type of the targeted column, "numeric" or "date" (see `get_column_type`).
+
+    Returns:
+        Optional[Tuple[str, List[Any]]]: The operator ("lt", "le", "gt", "ge", "eq", "between", "max" or
+            "min") and its operands (numbers or timestamps), or None if the query has neither an extreme nor
+            a literal of the column type.
+    """
+    query = query.lower()
+    dates, query_without_dates = _date_literals(query)
+    if column_type == "date":
+        literals = dates
+    else:
+        literals = [float(number) for number in _NUMBER_PATTERN.findall(query_without_dates)]
+
+    for pattern, operator in _COMPARISONS:
+        if pattern.search(query_without_dates):
+            if operator == "between" and len(literals) >= 2:
+                return "between", sorted(literals[:2])
+            if operator != "between" and literals:
+                return operator, literals[:1]
+    if literals:
+        return "eq", literals[:1]
+    for pattern, operator in _EXTREMES:
+        if pattern.search(query_without_dates):
+            return operator, []
+    return None
+
+
+def _format_literal(literal: Any) -> str:
+    # "5" rather than "5.0", "2023-07-05" rather than "2023-07-05 00:00:00"
+    if isinstance(literal, pd.Timestamp):
+        return str(literal.date()) if literal == literal.normalize() else str(literal)
+    return f"{literal:g}"
+
+
+class _RangeColumn:
+    """
+    The values of a numeric or date column sorted once, with the rows of every value in the same order.
+
+    The rows holding the values in `sorted_values[i:j]` are `sorted_rows[row_offsets[i]:row_offsets[j]]`,
+    so any range of values is found with two binary searches and read as one slice.
+    """
+
+    def __init__(self, column_index: ColumnIndex, values: pd.Series, column_type: str):
+        if column_type == "date":
+            values = pd.to_datetime(values)
+            if values.dt.tz is not None:
+                values = values.dt.tz_localize(None)
+        valid = np.flatnonzero(~values.isna().to_numpy())
+        typed = values.to_numpy()
+        order = valid[np.argsort(typed[valid], kind="stable")]
+
+        self.column_index = column_index
+        self.column_type = column_type
+        self.order = order
+        self.sorted_values = typed[order]
+
+        # gather the rows of every value in sorted value order
+        starts = column_index.row_offsets[:-1][order]
+        counts = np.diff(column_index.row_offsets)[order]
+        self.row_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        gather = np.arange(self.row_offsets[-1]) - np.repeat(self.row_offsets[:-1] - starts, counts)
+        self.sorted_rows = column_index.row_positions[gather]
+
+    def _bound(self, value: Any, side: str) -> int:
+        if self.column_type == "date":
+            value = np.datetime64(pd.Timestamp(value).tz_localize(None), "ns")
+        return int(np.searchsorted(self.sorted_values, value, side=side))
+
+    def _day_end(self, value: Any) -> int:
+        # a date matches the whole day, up to the next midnight
+        return self._bound(pd.Timestamp(value) + pd.Timedelta(days=1), "left")
+
+    def select(self, operator: str, operands: List[Any]) -> Tuple[int, int]:
+        """
+        Finds the range of sorted values satisfying a condition.
+
+        Args:
+            operator (str): The operator, see `parse_range_intent`.
+            operands (List[Any]): The literals of the operator.
+
+        Returns:
+            Tuple[int, int]: The start and end (excluded) positions in `sorted_values`.
+        """
+        n = len(self.sorted_values)
+        is_date = self.column_type == "date"
+        if n == 0:
+            return 0, 0
+        if operator == "max":
+            return self._bound(self.sorted_values[-1], "left"), n
+        if operator == "min":
+            return 0, self._bound(self.sorted_values[0], "right")
+
+        first = operands[0]
+        if operator == "lt":
+            return 0, self._bound(first, "left")
+        if operator == "le":
+            return 0, self._day_end(first) if is_date else self._bound(first, "right")
+        if operator == "gt":
+            return self._day_end(first) if is_date else self._bound(first, "right"), n
+        if operator == "ge":
+            return self._bound(first, "left"), n
+        last = operands[-1]
+        return self._bound(first, "left"), self._day_end(last) if is_date else self._bound(last, "right")
+
+    def rows(self, start: int, end: int) -> np.ndarray:
+        """
+        Returns the sorted row positions holding the values at positions `start` to `end` (excluded).
+        """
+        return np.sort(self.sorted_rows[self.row_offsets[start]:self.row_offsets[end]])
+
+
+class RangeQueryIndex:
+    """
+    Answers comparison and extreme queries on numeric and date columns without embedding them.
+
+    A query like "shipment to delivery days less than 5" or "maximum days from shipment to delivery"
+    targets the numeric or date column sharing most of the words of its cleaned name, and its operator and
+    literals are detected with `parse_range_intent`. The matching rows are then found with binary searches
+    on the values of the column, sorted once, instead of comparing the query with the embeddings of values
+    such as "days from shipment to delivery 2", which ignore their order.
+
+    Attributes:
+        columns (Dict[str, _RangeColumn]): The numeric and date columns, keyed by original column name.
+        min_name_overlap (float): The minimum share of the column name words a query must contain.
+    """
+
+    def __init__(self, column_indexes: Dict[str, ColumnIndex], min_name_overlap: float = 0.6):
+        """
+        Sorts the values of the numeric and date columns of the indexes.
+
+        Args:
+            column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+            min_name_overlap (float, optional): The minimum share of the words of a cleaned column name
+                that a query must contain to target the column (default is 0.6).
+        """
+        self.min_name_overlap = min_name_overlap
+        self.columns: Dict[str, _RangeColumn] = {}
+        self._name_tokens: Dict[str, set] = {}
+        for original_column, column_index in column_indexes.items():
+            values = pd.DataFrame({original_column: pd.Series(column_index.original_values.tolist(), dtype=None)})
+            column_type = get_column_type(values, original_column)
+            if column_type not in ("numeric", "date") or pd.api.types.is_bool_dtype(values[original_column]):
+                continue
+            self.columns[original_column] = _RangeColumn(column_index, values[original_column], column_type)
+            self._name_tokens[original_column] = _tokens(_clean_column_name(original_column))
+
+    def _target_column(self, query: str) -> Optional[str]:
+        query_tokens = _tokens(query)
+        best_column, best_overlap = None, 0.0
+        for original_column, name_tokens in self._name_tokens.items():
+            overlap = len(query_tokens & name_tokens) / len(name_tokens) if name_tokens else 0.0
+            if overlap > best_overlap:
+                best_column, best_overlap = original_column, overlap
+        return best_column if best_overlap >= self.min_name_overlap else None
+
+    def match(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Answers a query structurally, if it is a comparison or an extreme on a numeric or date column.
+
+        Args:
+            query (str): The query.
+
+        Returns:
+            Optional[Dict[str, Any]]: The match, with the original column name (ORIGINAL_FILENAME_KEY), the
+                extreme or equal value, or the condition for ranges (VALUE_KEY), a score of 1.0 (SCORE_KEY),
+                the "condition" and the sorted "row_positions"; None if the query is not structured.
+        """
+        original_column = self._target_column(query)
+        if original_column is None:
+            return None
+        range_column = self.columns[original_column]
+        intent = parse_range_intent(query, range_column.column_type)
+        if intent is None:
+            return None
+
+        operator, operands = intent
+        start, end = range_column.select(operator, operands)
+        run_metrics.increment("range_queries")
+        if operator in ("max", "min", "eq") and start < end:
+            value = range_column.column_index.original_values[range_column.order[start if operator != "max" else end - 1]]
+        else:
+            value = None
+
+        if operator in ("max", "min"):
+            condition = operator
+        elif operator == "between":
+            condition = f"between {_format_literal(operands[0])} and {_format_literal(operands[1])}"
+        else:
+            condition = f"{_OPERATOR_SYMBOLS[operator]} {_format_literal(operands[0])}"
+        return {
+            ORIGINAL_FILENAME_KEY: original_column,
+            VALUE_KEY: value if value is not None else condition,
+            SCORE_KEY: 1.0,
+            "condition": condition,
+            "row_positions": range_column.rows(start, end),
+        }
+
+
+def build_range_result(
+    query: str,
+    range_match: Dict[str, Any],
+    row_id_format: str = "list",
+    top_k: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Builds the output record of a query answered by `RangeQueryIndex.match`.
+
+    Args:
+        query (str): The user query.
+        range_match (Dict[str, Any]): The structured match.
+        row_id_format (str, optional): How the matching rows are reported, see `build_query_result`
+            (default is "list").
+        top_k (int, optional): If set, the record has the layout of `build_top_k_result`, with the match as
+            its only candidate (default is None).
+
+    Returns:
+        Dict[str, Any]: The record with the column, value, condition, row ids and score of the match.
+    """
+    fields = {
+        "column_name": range_match[ORIGINAL_FILENAME_KEY],
+        "value": range_match[VALUE_KEY],
+        "condition": range_match["condition"],
+        **_row_id_fields(range_match["row_positions"], row_id_format),
+    }
+    if top_k:
+        return {"user_query": query, "candidates": [{"rank": 1, **fields, "score": 1.0}]}
+    return {**fields, "best_score": 1.0, "user_query": query}
+
+
+class TestRangeQueries(unittest.TestCase):
+    """
+    Unit tests for the range query fast path.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Builds the column indexes of a small shipment table with a fake embedding model.
+        """
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+        from ._add_string_version_columns_with_column_name import add_string_version_columns_with_column_name
+        from ._column_index import build_column_indexes
+
+        cls.df = pd.DataFrame({
+            "Carrier_name": ["UPS", "DHL", "FedEx", "UPS", "DHL"],
+            "Days_from_shipment_to_delivery": [2, 5, 3, 7, None],
+            "Estimated_Arrival_Date": pd.to_datetime(
+                ["2023-07-05 00:00", "2023-07-06 00:00", "2023-07-05 10:30", "2023-07-08 00:00", "2023-07-01 00:00"]
+            ),
+        })
+        column_indexes = build_column_indexes(add_string_version_columns_with_column_name(cls.df), FakeTextEmbedding())
+        cls.index = RangeQueryIndex(column_indexes)
+
+    def test_only_numeric_and_date_columns(self) -> None:
+        """
+        tests that textual columns are left to the embedding search.
+        """
+        self.assertEqual(set(self.index.columns), {"Days_from_shipment_to_delivery", "Estimated_Arrival_Date"})
+        self.assertIsNone(self.index.match("UPS"))
+        self.assertIsNone(self.index.match("days from shipment to delivery"))
+
+    def test_numeric_comparisons_and_extremes(self) -> None:
+        """
+        tests that comparisons and extremes return the same rows as a boolean mask.
+        """
+        days = self.df["Days_from_shipment_to_delivery"]
+        cases = {
+            "shipment to delivery days less than 5": days < 5,
+            "days from shipment to delivery at least 5": days >= 5,
+            "days from shipment to delivery between 3 and 5": days.between(3, 5),
+            "days from shipment to delivery 5": days == 5,
+            "maximum days from shipment to delivery": days == days.max(),
+            "minimum days from shipment to delivery": days == days.min(),
+        }
+        for query, mask in cases.items():
+            match = self.index.match(query)
+            self.assertEqual(match[ORIGINAL_FILENAME_KEY], "Days_from_shipment_to_delivery", query)
+            np.testing.assert_array_equal(match["row_positions"], np.flatnonzero(mask), query)
+        self.assertEqual(self.index.match("maximum days from shipment to delivery")[VALUE_KEY], 7)
+        self.assertEqual(self.index.match("shipment to delivery days less than 5")["condition"], "< 5")
+
+    def test_date_comparisons(self) -> None:
+        """
+        tests that a date matches its whole day and that dates compare in order.
+        """
+        match = self.index.match("estimated arrival date on july 5 2023")
+        self.assertEqual(match[ORIGINAL_FILENAME_KEY], "Estimated_Arrival_Date")
+        np.testing.assert_array_equal(match["row_positions"], [0, 2])
+        np.testing.assert_array_equal(self.index.match("estimated arrival date before 2023-07-06")["row_positions"], [0, 2, 4])
+        np.testing.assert_array_equal(self.index.match("latest estimated arrival date")["row_positions"], [3])
+
+        result = build_range_result("latest estimated arrival date", self.index.match("latest estimated arrival date"))
+        self.assertEqual(result["row_ids"], ["row5"])
+        self.assertEqual(result["best_score"], 1.0)
@@ -0,0 +1,337 @@
+import hashlib
+import io
+import logging
+import numpy as np
+import pandas as pd
+import pathlib
+import tempfile
+import unittest
+
+from typing import Any, Dict, List, Optional, Union
+from ._column_index import ColumnIndex
+from ._column_index_builder import ColumnIndexBuilder
+from ._column_index_store import load_column_indexes, save_column_indexes
+from ._stream_column_indexes import index_csv_chunks
+
+
+__all__ = ["refresh_column_indexes"]
+
+logger = logging.getLogger(__name__)
+
+# number of bytes before the indexed end of the file that must be unchanged for an append-only refresh
+_FINGERPRINT_BYTES = 4096
+
+
+class _ByteRangeReader(io.RawIOBase):
+    """
+    Read-only view of a byte range of a binary file.
+    """
+
+    def __init__(self, file: io.BufferedReader, start: int, end: int):
+        """
+        Initializes the view and moves the file to the start of the range.
+
+        Args:
+            file (io.BufferedReader): The file opened in binary mode.
+            start (int): The first byte of the range.
+            end (int): The byte after the last byte of the range.
+        """
+        self._file = file
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        """
+        Reads the next bytes of the range into a buffer.
+
+        Args:
+            buffer (bytearray or memoryview): The buffer to fill.
+
+        Returns:
+            int: The number of bytes read, 0 at the end of the range.
+        """
+        data = self._file.read(min(len(buffer), self._remaining))
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+def _last_byte(data_path: pathlib.Path, end: int) -> bytes:
+    """
+    Reads the byte just before `end`.
+
+    Args:
+        data_path (pathlib.Path): The path to the file.
+        end (int): The position after the byte to read.
+
+    Returns:
+        bytes: The byte, or an empty bytes object if `end` is 0.
+    """
+    with open(data_path, "rb") as f:
+        f.seek(max(0, end - 1))
+        return f.read(min(end, 1))
+
+
+def _fingerprint(data_path: pathlib.Path, end: int) -> str:
+    """
+    Hashes the bytes just before `end`, to detect files that were rewritten rather than appended to.
+
+    Args:
+        data_path (pathlib.Path): The path to the file.
+        end (int): The end of the hashed range.
+
+    Returns:
+        str: The SHA-1 hex digest of up to `_FINGERPRINT_BYTES` bytes before `end`.
+    """
+    with open(data_path, "rb") as f:
+        f.seek(max(0, end - _FINGERPRINT_BYTES))
+        return hashlib.sha1(f.read(min(end, _FINGERPRINT_BYTES))).hexdigest()
+
+
+def _read_header(data_path: pathlib.Path, delimiter: str) -> List[str]:
+    """
+    Reads the column names of a CSV file.
+
+    Args:
+        data_path (pathlib.Path): The path to the CSV file.
+        delimiter (str): The CSV delimiter.
+
+    Returns:
+        List[str]: The column names.
+    """
+    return list(pd.read_csv(data_path, delimiter=delimiter, nrows=0).columns)
+
+
+def refresh_column_indexes(
+    data_path: Union[str, pathlib.Path],
+    cols: List[str],
+    textual_model: Any,
+    index_path: Union[str, pathlib.Path],
+    chunksize: int = 100_000,
+    delimiter: str = ";",
+) -> Dict[str, ColumnIndex]:
+    """
+    Brings the persisted column indexes of an append-only CSV file up to date.
+
+    The indexes are saved together with a manifest recording how many bytes and rows of the file they
+    cover and a fingerprint of the last indexed bytes. If the file still starts with those bytes, only the
+    rows appended since the last build are read: their unseen values are embedded and their row positions
+    are added to the existing postings, so a refresh costs time proportional to the new rows. The new
+    rows are parsed with the date formats recorded in the manifest, like the rows already indexed.
+    Otherwise (first run, different columns, rewritten file, last indexed row extended by the append,
+    manifest without date formats, different model or inference mode) the indexes are rebuilt from
+    scratch, so the vectors of one model are never scored against, or mixed with, those of another. The updated indexes are persisted atomically.
+
+    Args:
+        data_path (str or pathlib.Path): The path to the CSV file.
+        cols (List[str]): The columns to index. All columns are indexed if the list is empty.
+        textual_model (Any): The model used for embedding the textual values. Its `cache_namespace`, if any,
+            is recorded in the manifest.
+        index_path (str or pathlib.Path): The file the indexes are persisted to.
+        chunksize (int, optional): The number of rows read at once (default is 100,000).
+        delimiter (str, optional): The CSV delimiter (default is ";").
+
+    Returns:
+        Dict[str, ColumnIndex]: The up-to-date column indexes, keyed by original column name.
+    """
+    data_path = pathlib.Path(data_path)
+    index_path = pathlib.Path(index_path)
+    data_end = data_path.stat().st_size
+    model_namespace = getattr(textual_model, "cache_namespace", None)
+
+    column_indexes: Dict[str, ColumnIndex] = {}
+    manifest: Optional[Dict[str, Any]] = None
+    if index_path.exists():
+        column_indexes, manifest = load_column_indexes(index_path)
+        if (
+            manifest.get("cols") != list(cols)
+            or manifest.get("delimiter") != delimiter
+            # manifests written before the date formats were recorded cannot parse new rows consistently
+            or "date_formats" not in manifest
+            or manifest.get("model_namespace") != model_namespace
+            or manifest["byte_offset"] > data_end
+            or manifest["fingerprint"] != _fingerprint(data_path, manifest["byte_offset"])
+            or (
+                # the last indexed row had no line break, so appended bytes may have extended it
+                _last_byte(data_path, manifest["byte_offset"]) not in (b"", b"\n")
+                and manifest["byte_offset"] < data_end
+                and _last_byte(data_path, manifest["byte_offset"] + 1) not in (b"\n", b"\r")
+            )
+        ):
+            logger.info(
+                f"{data_path} is not an append-only continuation of the indexed data, or the indexing settings "
+                f"changed, rebuilding the indexes"
+            )
+            column_indexes, manifest = {}, None
+
+    if manifest is not None and manifest["byte_offset"] == data_end:
+        logger.info(f"column indexes are up to date with {data_path} ({manifest['n_rows']} rows)")
+        return column_indexes
+
+    if manifest is None:
+        # full build: the header is parsed from the file itself
+        header = _read_header(data_path, delimiter)
+        start_byte, start_row, date_formats, builders = 0, 0, {}, None
+        read_kwargs = {}
+    else:
+        header = manifest["header"]
+        start_byte, start_row, date_formats = manifest["byte_offset"], manifest["n_rows"], manifest["date_formats"]
+        builders = {
+            original_column: ColumnIndexBuilder.from_column_index(column_index, textual_model)
+            for original_column, column_index in column_indexes.items()
+        }
+        read_kwargs = {"header": None, "names": header}
+        logger.info(f"refreshing column indexes with {data_end - start_byte} new bytes from {data_path}")
+
+    with open(data_path, "rb") as f:
+        reader = pd.read_csv(
+            io.BufferedReader(_ByteRangeReader(f, start_byte, data_end)),
+            delimiter=delimiter,
+            usecols=cols or None,
+            chunksize=chunksize,
+            **read_kwargs,
+        )
+        builders, date_formats, n_rows = index_csv_chunks(
+            reader, cols, textual_model, builders=builders, date_formats=date_formats, start_row=start_row,
+        )
+
+    column_indexes = {original_column: builder.build() for original_column, builder in builders.items()}
+    save_column_indexes(
+        column_indexes,
+        index_path,
+        manifest={
+            "data_path": str(data_path),
+            "cols": list(cols),
+            "delimiter": delimiter,
+            "header": header,
+            "date_formats": date_formats,
+            "model_namespace": model_namespace,
+            "byte_offset": data_end,
+            "n_rows": n_rows,
+            "fingerprint": _fingerprint(data_path, data_end),
+        },
+    )
+    logger.info(f"column indexes covering {n_rows} rows saved to {index_path}")
+    return column_indexes
+
+
+class TestRefreshColumnIndexes(unittest.TestCase):
+    """
+    Unit tests for the refresh_column_indexes function.
+    """
+
+    def setUp(self) -> None:
+        """
+        Writes a small shipment-like CSV file and sets up a fake embedding model.
+        """
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_path = pathlib.Path(self.tmp_dir.name) / "shipments.csv"
+        self.index_path = pathlib.Path(self.tmp_dir.name) / "indexes.pkl"
+        self.data_path.write_text(
+            "Carrier_name;Days_from_shipment_to_delivery\n"
+            "UPS;1\n"
+            "DHL;2\n"
+        )
+        self.cols = ["Carrier_name", "Days_from_shipment_to_delivery"]
+        self.model = FakeTextEmbedding()
+
+    def tearDown(self) -> None:
+        """
+        Removes the temporary files.
+        """
+        self.tmp_dir.cleanup()
+
+    def test_refresh_only_embeds_new_values(self) -> None:
+        """
+        tests that appended rows are indexed and only their unseen values are embedded.
+        """
+        refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        with open(self.data_path, "a") as f:
+            f.write("UPS;3\nFedEx;1\n")
+
+        n_embedded = len(self.model.embedded_texts)
+        column_indexes = refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        self.assertEqual(
+            self.model.embedded_texts[n_embedded:],
+            ["fedex", "days from shipment to delivery 3"],
+        )
+        np.testing.assert_array_equal(column_indexes["Carrier_name"].rows_for_value("UPS"), [0, 2])
+        np.testing.assert_array_equal(column_indexes["Days_from_shipment_to_delivery"].rows_for_value(1), [0, 3])
+
+    def test_extended_last_row_is_rebuilt(self) -> None:
+        """
+        tests that appending to a last row without a line break re-indexes the file from scratch.
+        """
+        self.data_path.write_text("Carrier_name;Days_from_shipment_to_delivery\nUPS;1\nDHL;2")
+        refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        with open(self.data_path, "a") as f:
+            f.write("5\n")
+
+        column_indexes = refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        self.assertEqual(list(column_indexes["Days_from_shipment_to_delivery"].original_values), [1, 25])
+
+    def test_appended_dates_keep_the_indexed_format(self) -> None:
+        """
+        tests that appended dates are parsed with the format of the dates already indexed.
+        """
+        self.data_path.write_text("Carrier_name;Order_date\nUPS;13/07/2023\nDHL;14/07/2023\n")
+        cols = ["Carrier_name", "Order_date"]
+        refresh_column_indexes(self.data_path, cols, self.model, self.index_path)
+        self.assertEqual(load_column_indexes(self.index_path)[1]["date_formats"], {"Order_date": "%d/%m/%Y"})
+        with open(self.data_path, "a") as f:
+            f.write("UPS;05/07/2023\n")
+
+        column_indexes = refresh_column_indexes(self.data_path, cols, self.model, self.index_path)
+        np.testing.assert_array_equal(
+            column_indexes["Order_date"].rows_for_value(pd.Timestamp("2023-07-05")), [2]
+        )
+
+    def test_manifest_without_date_formats_is_rebuilt(self) -> None:
+        """
+        tests that indexes persisted without their date formats are indexed from scratch.
+        """
+        column_indexes = refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        _, manifest = load_column_indexes(self.index_path)
+        del manifest["date_formats"]
+        save_column_indexes(column_indexes, self.index_path, manifest={**manifest, "date_cols": []})
+        with open(self.data_path, "a") as f:
+            f.write("FedEx;3\n")
+
+        n_embedded = len(self.model.embedded_texts)
+        column_indexes = refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        self.assertIn("ups", self.model.embedded_texts[n_embedded:])
+        self.assertIn("date_formats", load_column_indexes(self.index_path)[1])
+        np.testing.assert_array_equal(column_indexes["Carrier_name"].rows_for_value("FedEx"), [2])
+
+    def test_other_model_namespace_is_rebuilt(self) -> None:
+        """
+        tests that indexes embedded by another model or inference mode are indexed from scratch.
+        """
+        self.model.cache_namespace = "fake|inference_mode=fp32"
+        refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        self.model.cache_namespace = "fake|inference_mode=int8"
+
+        n_embedded = len(self.model.embedded_texts)
+        refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        self.assertIn("ups", self.model.embedded_texts[n_embedded:])
+        self.assertEqual(load_column_indexes(self.index_path)[1]["model_namespace"], "fake|inference_mode=int8")
+
+        n_embedded = len(self.model.embedded_texts)
+        refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        self.assertEqual(self.model.embedded_texts[n_embedded:], [])
+
+    def test_rewritten_file_is_rebuilt(self) -> None:
+        """
+        tests that a file whose indexed bytes changed is indexed from scratch.
+        """
+        refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        self.data_path.write_text("Carrier_name;Days_from_shipment_to_delivery\nDHL;5\n")
+
+        column_indexes = refresh_column_indexes(self.data_path, self.cols, self.model, self.index_path)
+        self.assertEqual(list(column_indexes["Carrier_name"].values), ["DHL"])
+        np.testing.assert_array_equal(column_indexes["Carrier_name"].rows_for_value("DHL"), [0])
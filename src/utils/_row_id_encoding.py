@@ -0,0 +1,116 @@
+import base64
+import numpy as np
+import unittest
+import zlib
+
+from typing import Dict, List, Union
+
+
+__all__ = ["ROW_ID_FORMATS", "encode_row_ranges", "decode_row_ranges", "encode_row_bitmap", "decode_row_bitmap"]
+
+# "list": ["row2", "row3", ...], "ranges": [[2, 3], ...], "bitmap": a zlib-compressed bit per row
+ROW_ID_FORMATS = ("list", "ranges", "bitmap")
+
+
+def encode_row_ranges(rows: np.ndarray) -> List[List[int]]:
+    """
+    Encodes row numbers as sorted runs of consecutive rows.
+
+    Args:
+        rows (np.ndarray): The row numbers, in any order.
+
+    Returns:
+        List[List[int]]: The [first, last] row numbers of every run, both inclusive, e.g. rows 2, 3, 4 and 7
+            give [[2, 4], [7, 7]].
+    """
+    rows = np.unique(np.asarray(rows, dtype=np.int64))
+    if len(rows) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(rows) != 1)
+    firsts = rows[np.concatenate([[0], breaks + 1])]
+    lasts = rows[np.concatenate([breaks, [len(rows) - 1]])]
+    return np.stack([firsts, lasts], axis=1).tolist()
+
+
+def decode_row_ranges(ranges: List[List[int]]) -> np.ndarray:
+    """
+    Decodes the runs produced by `encode_row_ranges`.
+
+    Args:
+        ranges (List[List[int]]): The [first, last] row numbers of every run.
+
+    Returns:
+        np.ndarray: The sorted row numbers.
+    """
+    if not ranges:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate([np.arange(first, last + 1, dtype=np.int64) for first, last in ranges])
+
+
+def encode_row_bitmap(rows: np.ndarray) -> Dict[str, Union[int, str]]:
+    """
+    Encodes row numbers as a compressed bitmap, one bit per row from the first to the last row.
+
+    Args:
+        rows (np.ndarray): The row numbers, in any order.
+
+    Returns:
+        Dict[str, Union[int, str]]: The "first" row number, the "n_bits" of the bitmap and the bitmap
+            ("zlib_base64"), packed big-endian (`np.packbits`), zlib-compressed and base64-encoded.
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    if len(rows) == 0:
+        return {"first": 0, "n_bits": 0, "zlib_base64": ""}
+    first = int(rows.min())
+    bits = np.zeros(int(rows.max()) - first + 1, dtype=bool)
+    bits[rows - first] = True
+    return {
+        "first": first,
+        "n_bits": len(bits),
+        "zlib_base64": base64.b64encode(zlib.compress(np.packbits(bits).tobytes())).decode("ascii"),
+    }
+
+
+def decode_row_bitmap(bitmap: Dict[str, Union[int, str]]) -> np.ndarray:
+    """
+    Decodes the bitmap produced by `encode_row_bitmap`.
+
+    Args:
+        bitmap (Dict[str, Union[int, str]]): The encoded bitmap.
+
+    Returns:
+        np.ndarray: The sorted row numbers.
+    """
+    if not bitmap["n_bits"]:
+        return np.empty(0, dtype=np.int64)
+    packed = np.frombuffer(zlib.decompress(base64.b64decode(bitmap["zlib_base64"])), dtype=np.uint8)
+    bits = np.unpackbits(packed, count=bitmap["n_bits"]).astype(bool)
+    return np.flatnonzero(bits).astype(np.int64) + bitmap["first"]
+
+
+class TestRowIdEncoding(unittest.TestCase):
+    """
+    Unit tests for the row id encodings.
+    """
+
+    def test_round_trips(self) -> None:
+        """
+        tests that both encodings decode to the sorted rows.
+        """
+        rows = np.array([7, 2, 3, 4, 10, 11, 40])
+        self.assertEqual(encode_row_ranges(rows), [[2, 4], [7, 7], [10, 11], [40, 40]])
+        np.testing.assert_array_equal(decode_row_ranges(encode_row_ranges(rows)), np.sort(rows))
+        np.testing.assert_array_equal(decode_row_bitmap(encode_row_bitmap(rows)), np.sort(rows))
+
+    def test_empty_and_dense(self) -> None:
+        """
+        tests empty rows and that a dense run of a million rows stays small.
+        """
+        self.assertEqual(encode_row_ranges(np.array([], dtype=int)), [])
+        self.assertEqual(len(decode_row_bitmap(encode_row_bitmap(np.array([], dtype=int)))), 0)
+
+        rows = np.arange(2, 1_000_002)
+        self.assertEqual(encode_row_ranges(rows), [[2, 1_000_001]])
+        bitmap = encode_row_bitmap(rows)
+        self.assertLess(len(bitmap["zlib_base64"]), 2000)
+        np.testing.assert_array_equal(decode_row_bitmap(bitmap), rows)
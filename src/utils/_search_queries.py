@@ -0,0 +1,266 @@
+import heapq
+import itertools
+import numpy as np
+import unittest
+
+from default_configs import (
+    ORIGINAL_FILENAME_KEY,
+    VALUE_KEY,
+    SCORE_KEY,
+)
+from typing import Any, Dict, List, Optional
+from ._column_index import ColumnIndex
+from ._get_overall_best_result import get_overall_best_result
+from ._row_id_encoding import ROW_ID_FORMATS, encode_row_bitmap, encode_row_ranges
+
+
+__all__ = ["match_queries", "match_queries_top_k", "build_query_result", "build_top_k_result"]
+
+
+def match_queries(embedded_queries: np.ndarray, column_indexes: Dict[str, ColumnIndex]) -> List[Dict[str, dict]]:
+    """
+    Finds the best value of every column for a batch of queries.
+
+    Each column is scored with a single (queries x values) matrix product.
+
+    Args:
+        embedded_queries (np.ndarray): The query embeddings, one row per query.
+        column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+
+    Returns:
+        List[Dict[str, dict]]: For every query, the best match of each column keyed by original column name.
+    """
+    column_matches = {
+        original_column: column_index.best_matches(embedded_queries)
+        for original_column, column_index in column_indexes.items()
+    }
+    return [
+        {original_column: matches[i] for original_column, matches in column_matches.items()}
+        for i in range(len(embedded_queries))
+    ]
+
+
+def match_queries_top_k(
+    embedded_queries: np.ndarray,
+    column_indexes: Dict[str, ColumnIndex],
+    k: int,
+) -> List[Dict[str, List[dict]]]:
+    """
+    Finds the k best values of every column for a batch of queries.
+
+    Args:
+        embedded_queries (np.ndarray): The query embeddings, one row per query.
+        column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+        k (int): The number of values per column and query.
+
+    Returns:
+        List[Dict[str, List[dict]]]: For every query, the k best matches of each column, sorted by decreasing
+            score and keyed by original column name.
+    """
+    column_matches = {
+        original_column: column_index.top_matches(embedded_queries, k)
+        for original_column, column_index in column_indexes.items()
+    }
+    return [
+        {original_column: matches[i] for original_column, matches in column_matches.items()}
+        for i in range(len(embedded_queries))
+    ]
+
+
+def _row_id_fields(matching_rows: np.ndarray, row_id_format: str) -> Dict[str, Any]:
+    """
+    Encodes the matching rows of a result in the requested format.
+
+    Args:
+        matching_rows (np.ndarray): The row positions holding the matched value.
+        row_id_format (str): The row id format, see `build_query_result`.
+
+    Returns:
+        Dict[str, Any]: The "row_ids", or the "row_ranges" or "row_bitmap" and "n_rows" of the result.
+
+    Raises:
+        ValueError: If the row id format is not supported.
+    """
+    if row_id_format not in ROW_ID_FORMATS:
+        raise ValueError(f"row_id_format must be one of {ROW_ID_FORMATS}, got '{row_id_format}'")
+    if row_id_format == "list":
+        return {"row_ids": [f'row{int(index) + 2}' for index in matching_rows]}
+    # CSV line numbers, as integers
+    adjusted_rows = np.asarray(matching_rows, dtype=np.int64) + 2
+    encode = encode_row_ranges if row_id_format == "ranges" else encode_row_bitmap
+    return {f"row_{row_id_format}": encode(adjusted_rows), "n_rows": len(adjusted_rows)}
+
+
+def build_query_result(
+    query: str,
+    col_res: Dict[str, dict],
+    column_indexes: Dict[str, ColumnIndex],
+    row_id_format: str = "list",
+) -> Optional[Dict[str, Any]]:
+    """
+    Builds the output record of a query from the best match of each column.
+
+    Args:
+        query (str): The user query.
+        col_res (Dict[str, dict]): The best match of each column, keyed by original column name.
+        column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+        row_id_format (str, optional): How the matching rows are reported: "list" of "row<n>" strings
+            ("row_ids"), "ranges" of consecutive rows ("row_ranges", see `encode_row_ranges`) or a
+            compressed "bitmap" ("row_bitmap", see `encode_row_bitmap`); the last two also report "n_rows"
+            (default is "list").
+
+    Returns:
+        Optional[Dict[str, Any]]: The record with the best column, value, row ids (1-based CSV line numbers,
+            counting the header) and score, or None if no column matched.
+
+    Raises:
+        ValueError: If the row id format is not supported.
+    """
+    if row_id_format not in ROW_ID_FORMATS:
+        raise ValueError(f"row_id_format must be one of {ROW_ID_FORMATS}, got '{row_id_format}'")
+    overall_best_result = get_overall_best_result(col_res)
+    if not overall_best_result:
+        return None
+
+    f_col_name, f_value, f_best_score = (
+        overall_best_result[ORIGINAL_FILENAME_KEY],
+        overall_best_result[VALUE_KEY],
+        overall_best_result[SCORE_KEY],
+    )
+    matching_rows = column_indexes[f_col_name].rows_for_value(f_value)
+
+    return {
+        "column_name": f_col_name,
+        "value": f_value,
+        **_row_id_fields(matching_rows, row_id_format),
+        "best_score": float(f_best_score),
+        "user_query": query,
+    }
+
+
+def build_top_k_result(
+    query: str,
+    col_top: Dict[str, List[dict]],
+    column_indexes: Dict[str, ColumnIndex],
+    k: int,
+    row_id_format: str = "list",
+) -> Dict[str, Any]:
+    """
+    Builds the output record of a query from the k best matches of each column.
+
+    The per-column matches are already sorted by decreasing score, so they are merged lazily with a heap
+    (`heapq.merge`) and only the first k candidates across all the columns are taken.
+
+    Args:
+        query (str): The user query.
+        col_top (Dict[str, List[dict]]): The k best matches of each column, sorted by decreasing score and
+            keyed by original column name.
+        column_indexes (Dict[str, ColumnIndex]): The column indexes, keyed by original column name.
+        k (int): The number of candidates.
+        row_id_format (str, optional): How the matching rows of every candidate are reported, see
+            `build_query_result` (default is "list").
+
+    Returns:
+        Dict[str, Any]: The "user_query" and its "candidates", up to k records with the rank, column,
+            value, row ids and score of a match, best first.
+
+    Raises:
+        ValueError: If the row id format is not supported.
+    """
+    best_matches = heapq.merge(*col_top.values(), key=lambda match: -match[SCORE_KEY])
+    candidates = []
+    for rank, match in enumerate(itertools.islice(best_matches, k), start=1):
+        column_name, value = match[ORIGINAL_FILENAME_KEY], match[VALUE_KEY]
+        candidates.append({
+            "rank": rank,
+            "column_name": column_name,
+            "value": value,
+            **_row_id_fields(column_indexes[column_name].rows_for_value(value), row_id_format),
+            "score": float(match[SCORE_KEY]),
+        })
+    return {"user_query": query, "candidates": candidates}
+
+
+class TestSearchQueries(unittest.TestCase):
+    """
+    Unit tests for the match_queries and build_query_result functions.
+    """
+
+    def test_query_result_record(self) -> None:
+        """
+        tests that the best column wins and its rows are reported as CSV line numbers.
+        """
+        import pandas as pd
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+        from ._column_index import build_column_indexes
+
+        model = FakeTextEmbedding()
+        df = pd.DataFrame({"Carrier_name": ["UPS", "DHL", "UPS"], "Priority": ["High", "Low", "Low"]})
+        column_indexes = build_column_indexes(df, model)
+
+        col_res = match_queries(model.embed_texts(["ups"]), column_indexes)[0]
+        self.assertEqual(list(col_res), ["Carrier_name", "Priority"])
+        self.assertEqual(
+            build_query_result("UPS", col_res, column_indexes),
+            {
+                "column_name": "Carrier_name",
+                "value": "UPS",
+                "row_ids": ["row2", "row4"],
+                "best_score": float(col_res["Carrier_name"][SCORE_KEY]),
+                "user_query": "UPS",
+            },
+        )
+
+    def test_compact_row_ids(self) -> None:
+        """
+        tests that the row ranges and bitmap hold the same rows as the list.
+        """
+        import pandas as pd
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+        from ._column_index import build_column_indexes
+        from ._row_id_encoding import decode_row_bitmap
+
+        model = FakeTextEmbedding()
+        df = pd.DataFrame({"Carrier_name": ["UPS", "UPS", "DHL", "UPS"]})
+        column_indexes = build_column_indexes(df, model)
+        col_res = match_queries(model.embed_texts(["ups"]), column_indexes)[0]
+
+        ranges = build_query_result("UPS", col_res, column_indexes, row_id_format="ranges")
+        self.assertEqual(ranges["row_ranges"], [[2, 3], [5, 5]])
+        self.assertEqual(ranges["n_rows"], 3)
+        self.assertNotIn("row_ids", ranges)
+        bitmap = build_query_result("UPS", col_res, column_indexes, row_id_format="bitmap")
+        self.assertEqual(decode_row_bitmap(bitmap["row_bitmap"]).tolist(), [2, 3, 5])
+
+    def test_top_k_result(self) -> None:
+        """
+        tests that the top k candidates are the k best matches of all the columns, best first.
+        """
+        import pandas as pd
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+        from ._column_index import build_column_indexes
+
+        model = FakeTextEmbedding()
+        df = pd.DataFrame({
+            "Carrier_name": ["UPS", "UPS", "DHL", "FedEx"],
+            "Status": ["Delivered", "In transit", "Delivered", "Lost"],
+        })
+        column_indexes = build_column_indexes(df, model)
+        embedded_queries = model.embed_texts(["ups"])
+        col_top = match_queries_top_k(embedded_queries, column_indexes, k=3)[0]
+        result = build_top_k_result("UPS", col_top, column_indexes, k=3)
+
+        all_matches = sorted(
+            (match for matches in match_queries_top_k(embedded_queries, column_indexes, k=10)[0].values()
+             for match in matches),
+            key=lambda match: -match[SCORE_KEY],
+        )
+        self.assertEqual(
+            [(c["column_name"], c["value"]) for c in result["candidates"]],
+            [(m[ORIGINAL_FILENAME_KEY], m[VALUE_KEY]) for m in all_matches[:3]],
+        )
+        self.assertEqual([c["rank"] for c in result["candidates"]], [1, 2, 3])
+        self.assertEqual(result["candidates"][0]["row_ids"], ["row2", "row3"])
+
+        best = build_query_result("UPS", match_queries(embedded_queries, column_indexes)[0], column_indexes)
+        self.assertEqual(result["candidates"][0]["value"], best["value"])
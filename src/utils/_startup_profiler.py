@@ -0,0 +1,84 @@
+import contextlib
+import time
+import unittest
+
+from typing import Dict, Iterator, Optional
+
+
+__all__ = ["StartupProfiler"]
+
+
+class StartupProfiler:
+    """
+    Records how long each stage of a run takes, to break down where startup time goes.
+
+    Attributes:
+        start (float): The `time.perf_counter` reference of the run, e.g. taken before the heavy imports.
+        stages (Dict[str, float]): The duration of every recorded stage in seconds, in recording order.
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        """
+        Initializes the profiler.
+
+        Args:
+            start (float, optional): The `time.perf_counter` reference of the run (default is now).
+        """
+        self.start = time.perf_counter() if start is None else start
+        self.stages: Dict[str, float] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        """
+        Records the duration of a stage timed elsewhere. Durations of repeated stages add up.
+
+        Args:
+            name (str): The stage name.
+            seconds (float): The stage duration.
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Times the enclosed block as a stage.
+
+        Args:
+            name (str): The stage name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def report(self) -> Dict[str, float]:
+        """
+        Returns the stage durations and the total time elapsed since `start`, rounded to milliseconds.
+
+        Returns:
+            Dict[str, float]: The duration of every stage and the "total", in seconds.
+        """
+        report = {name: round(seconds, 3) for name, seconds in self.stages.items()}
+        report["total"] = round(time.perf_counter() - self.start, 3)
+        return report
+
+
+class TestStartupProfiler(unittest.TestCase):
+    """
+    Unit tests for the StartupProfiler class.
+    """
+
+    def test_report(self) -> None:
+        """
+        tests that timed and recorded stages are reported in order, with the total.
+        """
+        profiler = StartupProfiler()
+        profiler.record("imports", 0.5)
+        with profiler.stage("data_load"):
+            pass
+        profiler.record("imports", 0.25)
+
+        report = profiler.report()
+        self.assertEqual(list(report), ["imports", "data_load", "total"])
+        self.assertEqual(report["imports"], 0.75)
+        self.assertGreaterEqual(report["total"], 0.0)
@@ -0,0 +1,195 @@
+import logging
+import numpy as np
+import pandas as pd
+import pathlib
+import tempfile
+import unittest
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+from ._add_string_version_columns_with_column_name import add_string_version_columns_with_column_name
+from ._column_index import ColumnIndex, get_searchable_columns
+from ._column_index_builder import ColumnIndexBuilder
+from ._convert_date_columns import convert_date_columns, detect_date_columns
+
+
+__all__ = ["index_csv_chunks", "stream_column_indexes"]
+
+logger = logging.getLogger(__name__)
+
+
+def index_csv_chunks(
+    reader: Iterable[pd.DataFrame],
+    cols: List[str],
+    textual_model: Any,
+    builders: Optional[Dict[str, ColumnIndexBuilder]] = None,
+    date_formats: Optional[Dict[str, str]] = None,
+    start_row: int = 0,
+) -> Tuple[Dict[str, ColumnIndexBuilder], Dict[str, str], int]:
+    """
+    Preprocesses chunks of raw CSV rows and adds them to the column index builders.
+
+    If no builders are given, the date columns with their formats and the searchable columns are detected
+    on the first chunk. Every following chunk is parsed with those same formats instead of guessing them
+    again, so a date like "05/07/2023" means the same day in every chunk.
+
+    Args:
+        reader (Iterable[pd.DataFrame]): The chunks of raw rows, e.g. a chunked `pd.read_csv` reader.
+        cols (List[str]): The selected columns, in order. All columns are kept if the list is empty.
+        textual_model (Any): The model used for embedding the textual values.
+        builders (Dict[str, ColumnIndexBuilder], optional): The builders to extend, keyed by original
+            column name (default is None, the builders are created from the first chunk).
+        date_formats (Dict[str, str], optional): The date columns and their formats, required when
+            extending builders.
+        start_row (int, optional): The row position of the first row of the first chunk (default is 0).
+
+    Returns:
+        Tuple[Dict[str, ColumnIndexBuilder], Dict[str, str], int]: The builders, the date columns mapped
+            to their format and the total number of rows indexed including `start_row`.
+    """
+    builders = builders or {}
+    date_formats = dict(date_formats or {})
+    n_rows = start_row
+    for chunk in reader:
+        if cols:
+            chunk = chunk[cols]  # `usecols` does not preserve the requested column order
+
+        if not builders:
+            # detect the schema and the date formats on the first chunk
+            date_formats = detect_date_columns(chunk)
+            chunk = convert_date_columns(df=chunk, date_formats=date_formats)
+            date_formats = {
+                col: date_format for col, date_format in date_formats.items()
+                if pd.api.types.is_datetime64_any_dtype(chunk[col])
+            }
+            chunk = add_string_version_columns_with_column_name(df=chunk)
+            builders = {
+                original_column: ColumnIndexBuilder(column, original_column, textual_model)
+                for column, original_column in get_searchable_columns(chunk)
+            }
+        else:
+            chunk = convert_date_columns(df=chunk, date_formats=date_formats)
+            chunk = add_string_version_columns_with_column_name(df=chunk)
+
+        row_positions = np.arange(n_rows, n_rows + len(chunk))
+        for original_column, builder in builders.items():
+            builder.add_chunk(chunk[builder.column], chunk[original_column], row_positions)
+        n_rows += len(chunk)
+        logger.info(f"indexed {n_rows} rows...")
+
+    return builders, date_formats, n_rows
+
+
+def stream_column_indexes(
+    data_path: Union[str, pathlib.Path],
+    cols: List[str],
+    textual_model: Any,
+    chunksize: int = 100_000,
+    delimiter: str = ";",
+    ann_columns: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> Dict[str, ColumnIndex]:
+    """
+    Builds the column indexes of a CSV file by reading it in fixed-size chunks.
+
+    Only the selected columns are read. Every chunk goes through the same preprocessing as the full
+    DataFrame (`convert_date_columns` and `add_string_version_columns_with_column_name`), with the date
+    formats fixed by the first chunk (see `index_csv_chunks`), then its new unique values are embedded and
+    its row positions are appended to the indexes, so peak memory is bounded by the chunk size plus the
+    unique values rather than by the full table.
+
+    Args:
+        data_path (str or pathlib.Path): The path to the CSV file.
+        cols (List[str]): The columns to index. All columns are indexed if the list is empty.
+        textual_model (Any): The model used for embedding the textual values.
+        chunksize (int, optional): The number of rows read at once (default is 100,000).
+        delimiter (str, optional): The CSV delimiter (default is ";").
+        ann_columns (Dict[str, Dict[str, Any]], optional): The original columns searched with an approximate
+            nearest-neighbour index, mapped to their `IVFIndex` settings (default is None, exact search only).
+
+    Returns:
+        Dict[str, ColumnIndex]: The column indexes, keyed by original column name.
+
+    Raises:
+        KeyError: If any of the selected columns are not in the CSV file.
+    """
+    reader = pd.read_csv(
+        filepath_or_buffer=data_path,
+        delimiter=delimiter,
+        usecols=cols or None,
+        chunksize=chunksize,
+    )
+    builders, _, _ = index_csv_chunks(reader, cols, textual_model)
+
+    column_indexes = {original_column: builder.build() for original_column, builder in builders.items()}
+    for original_column, ivf_kwargs in (ann_columns or {}).items():
+        column_indexes[original_column].enable_ann(**ivf_kwargs)
+    return column_indexes
+
+
+class TestStreamColumnIndexes(unittest.TestCase):
+    """
+    Unit tests for the stream_column_indexes function.
+    """
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        """
+        Writes a small shipment-like CSV file and sets up a fake embedding model.
+        """
+        from src.utils.tests.fake_text_embedding import FakeTextEmbedding
+
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.data_path = pathlib.Path(cls.tmp_dir.name) / "shipments.csv"
+        pd.DataFrame({
+            "Order_ID": [1, 2, 3, 4, 5],
+            "Carrier_name": ["UPS", "DHL", "UPS", "FedEx", "DHL"],
+            "Estimated_Arrival_Date": ["2023-07-04", "2023-07-05", "2023-07-04", "2023-07-06", "2023-07-05"],
+            "Days_from_shipment_to_delivery": [1, 2, 1, 3, 2],
+        }).to_csv(cls.data_path, sep=";", index=False)
+        cls.cols = ["Carrier_name", "Days_from_shipment_to_delivery", "Estimated_Arrival_Date"]
+        cls.model = FakeTextEmbedding()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        """
+        Removes the temporary CSV file.
+        """
+        cls.tmp_dir.cleanup()
+
+    def test_streamed_indexes_match_full_build(self) -> None:
+        """
+        tests that streaming the file in small chunks gives the same indexes as the in-memory pipeline.
+        """
+        from ._column_index import build_column_indexes
+
+        df = pd.read_csv(self.data_path, delimiter=";")[self.cols]
+        df = add_string_version_columns_with_column_name(convert_date_columns(df))
+        expected = build_column_indexes(df, self.model)
+
+        streamed = stream_column_indexes(self.data_path, self.cols, self.model, chunksize=2)
+        self.assertEqual(list(streamed), list(expected))
+        for col, column_index in streamed.items():
+            self.assertEqual(column_index.column, expected[col].column)
+            self.assertEqual(list(column_index.values), list(expected[col].values))
+            self.assertEqual(list(column_index.original_values), list(expected[col].original_values))
+            np.testing.assert_array_equal(column_index.row_positions, expected[col].row_positions)
+
+    def test_day_first_dates_keep_the_first_chunk_format(self) -> None:
+        """
+        tests that every chunk parses its dates with the format detected on the first chunk.
+        """
+        from ._column_index import build_column_indexes
+
+        data_path = pathlib.Path(self.tmp_dir.name) / "day_first.csv"
+        pd.DataFrame({
+            "Order_date": ["13/07/2023", "05/07/2023", "13/07/2023", "01/08/2023"],
+        }).to_csv(data_path, sep=";", index=False)
+        df = pd.read_csv(data_path, delimiter=";")
+        df = add_string_version_columns_with_column_name(convert_date_columns(df))
+        expected = build_column_indexes(df, self.model)
+
+        streamed = stream_column_indexes(data_path, ["Order_date"], self.model, chunksize=1)
+        self.assertEqual(
+            list(streamed["Order_date"].original_values),
+            list(pd.to_datetime(["2023-07-13", "2023-07-05", "2023-08-01"])),
+        )
+        self.assertEqual(list(streamed["Order_date"].values), list(expected["Order_date"].values))
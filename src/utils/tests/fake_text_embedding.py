@@ -0,0 +1,59 @@
+import hashlib
+import numpy as np
+
+from typing import List, Sequence
+
+
+class FakeTextEmbedding:
+    """
+    Deterministic stand-in for DistilBertTextEmbedding used by the unit tests.
+
+    Texts are embedded as hashed bags of character trigrams, so identical texts get identical
+    vectors and texts sharing substrings are similar, without loading a transformer model.
+
+    Attributes:
+        dim (int): The dimension of the embeddings.
+        embedded_texts (List[str]): Every text passed through the "model", in order.
+    """
+
+    def __init__(self, dim: int = 64):
+        """
+        Initializes the fake model.
+
+        Args:
+            dim (int, optional): The dimension of the embeddings (default is 64).
+        """
+        self.dim = dim
+        self.embedded_texts: List[str] = []
+
+    def embed_text(self, text: str) -> np.ndarray:
+        """
+        Embeds a single text as a hashed bag of character trigrams.
+
+        Args:
+            text (str): The input text to embed.
+
+        Returns:
+            np.ndarray: The float32 embedding of the text.
+        """
+        self.embedded_texts.append(text)
+        padded = f"  {text.lower()}  "
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for i in range(len(padded) - 2):
+            digest = hashlib.md5(padded[i:i + 3].encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0
+        return vector
+
+    def embed_texts(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embeds a list of texts.
+
+        Args:
+            texts (Sequence[str]): The input texts to embed.
+
+        Returns:
+            np.ndarray: A float32 matrix with one embedding per text.
+        """
+        if len(texts) == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.stack([self.embed_text(text) for text in texts])